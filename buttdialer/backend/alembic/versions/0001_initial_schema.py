@@ -0,0 +1,198 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=False),
+        sa.Column('last_name', sa.String(length=50), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table(
+        'teams',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_teams_id'), 'teams', ['id'], unique=False)
+
+    op.create_table(
+        'team_members',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('team_id', 'user_id', name='_team_user_uc')
+    )
+    op.create_index(op.f('ix_team_members_id'), 'team_members', ['id'], unique=False)
+
+    op.create_table(
+        'contacts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('phone_number', sa.String(length=20), nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=True),
+        sa.Column('last_name', sa.String(length=50), nullable=True),
+        sa.Column('email', sa.String(length=120), nullable=True),
+        sa.Column('company', sa.String(length=100), nullable=True),
+        sa.Column('hubspot_contact_id', sa.String(length=50), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('custom_fields', sa.JSON(), nullable=True),
+        sa.Column('is_dnc', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('hubspot_contact_id')
+    )
+    op.create_index(op.f('ix_contacts_id'), 'contacts', ['id'], unique=False)
+    op.create_index(op.f('ix_contacts_phone_number'), 'contacts', ['phone_number'], unique=True)
+
+    op.create_table(
+        'dnc_lists',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('phone_number', sa.String(length=20), nullable=False),
+        sa.Column('reason', sa.String(length=100), nullable=True),
+        sa.Column('added_by_id', sa.Integer(), nullable=True),
+        sa.Column('added_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['added_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dnc_lists_id'), 'dnc_lists', ['id'], unique=False)
+    op.create_index(op.f('ix_dnc_lists_phone_number'), 'dnc_lists', ['phone_number'], unique=True)
+
+    op.create_table(
+        'campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('call_script', sa.Text(), nullable=True),
+        sa.Column('tts_message', sa.Text(), nullable=True),
+        sa.Column('tts_voice_id', sa.String(length=50), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=True),
+        sa.Column('end_date', sa.DateTime(), nullable=True),
+        sa.Column('call_hours_start', sa.Time(), nullable=True),
+        sa.Column('call_hours_end', sa.Time(), nullable=True),
+        sa.Column('max_attempts', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_campaigns_id'), 'campaigns', ['id'], unique=False)
+
+    op.create_table(
+        'campaign_calls',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('contact_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['contact_id'], ['contacts.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('campaign_id', 'contact_id', name='_campaign_contact_uc')
+    )
+    op.create_index(op.f('ix_campaign_calls_id'), 'campaign_calls', ['id'], unique=False)
+
+    op.create_table(
+        'calls',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('twilio_call_sid', sa.String(length=100), nullable=True),
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('contact_id', sa.Integer(), nullable=True),
+        sa.Column('campaign_id', sa.Integer(), nullable=True),
+        sa.Column('direction', sa.String(length=20), nullable=False),
+        sa.Column('from_number', sa.String(length=20), nullable=False),
+        sa.Column('to_number', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('answered_at', sa.DateTime(), nullable=True),
+        sa.Column('ended_at', sa.DateTime(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('disposition', sa.String(length=50), nullable=True),
+        sa.ForeignKeyConstraint(['agent_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['contact_id'], ['contacts.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_calls_id'), 'calls', ['id'], unique=False)
+    op.create_index(op.f('ix_calls_twilio_call_sid'), 'calls', ['twilio_call_sid'], unique=True)
+
+    op.create_table(
+        'call_recordings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('call_id', sa.Integer(), nullable=False),
+        sa.Column('recording_sid', sa.String(length=100), nullable=True),
+        sa.Column('recording_url', sa.String(length=500), nullable=True),
+        sa.Column('s3_url', sa.String(length=500), nullable=True),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['call_id'], ['calls.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('recording_sid')
+    )
+    op.create_index(op.f('ix_call_recordings_id'), 'call_recordings', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_recordings_id'), table_name='call_recordings')
+    op.drop_table('call_recordings')
+    op.drop_index(op.f('ix_calls_twilio_call_sid'), table_name='calls')
+    op.drop_index(op.f('ix_calls_id'), table_name='calls')
+    op.drop_table('calls')
+    op.drop_index(op.f('ix_campaign_calls_id'), table_name='campaign_calls')
+    op.drop_table('campaign_calls')
+    op.drop_index(op.f('ix_campaigns_id'), table_name='campaigns')
+    op.drop_table('campaigns')
+    op.drop_index(op.f('ix_dnc_lists_phone_number'), table_name='dnc_lists')
+    op.drop_index(op.f('ix_dnc_lists_id'), table_name='dnc_lists')
+    op.drop_table('dnc_lists')
+    op.drop_index(op.f('ix_contacts_phone_number'), table_name='contacts')
+    op.drop_index(op.f('ix_contacts_id'), table_name='contacts')
+    op.drop_table('contacts')
+    op.drop_index(op.f('ix_team_members_id'), table_name='team_members')
+    op.drop_table('team_members')
+    op.drop_index(op.f('ix_teams_id'), table_name='teams')
+    op.drop_table('teams')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,43 @@
+"""call duration sketches
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'call_duration_sketches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['agent_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'agent_id', 'campaign_id', 'metric', name='_sketch_key_uc')
+    )
+    op.create_index(op.f('ix_call_duration_sketches_id'), 'call_duration_sketches', ['id'], unique=False)
+    op.create_index(op.f('ix_call_duration_sketches_day'), 'call_duration_sketches', ['day'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_duration_sketches_day'), table_name='call_duration_sketches')
+    op.drop_index(op.f('ix_call_duration_sketches_id'), table_name='call_duration_sketches')
+    op.drop_table('call_duration_sketches')
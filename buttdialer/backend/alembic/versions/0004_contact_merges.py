@@ -0,0 +1,41 @@
+"""contact merges
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'contact_merges',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('merged_contact_id', sa.Integer(), nullable=False),
+        sa.Column('survivor_id', sa.Integer(), nullable=False),
+        sa.Column('merged_phone_number', sa.String(length=20), nullable=True),
+        sa.Column('reason', sa.String(length=50), nullable=True),
+        sa.Column('merged_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_contact_merges_id'), 'contact_merges', ['id'], unique=False)
+    op.create_index(op.f('ix_contact_merges_merged_contact_id'), 'contact_merges', ['merged_contact_id'], unique=True)
+    op.create_index(op.f('ix_contact_merges_survivor_id'), 'contact_merges', ['survivor_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contact_merges_survivor_id'), table_name='contact_merges')
+    op.drop_index(op.f('ix_contact_merges_merged_contact_id'), table_name='contact_merges')
+    op.drop_index(op.f('ix_contact_merges_id'), table_name='contact_merges')
+    op.drop_table('contact_merges')
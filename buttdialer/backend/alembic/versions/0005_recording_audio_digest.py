@@ -0,0 +1,26 @@
+"""recording audio digest
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('call_recordings', sa.Column('audio_digest', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('call_recordings', 'audio_digest')
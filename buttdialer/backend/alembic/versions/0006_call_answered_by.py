@@ -0,0 +1,26 @@
+"""call answered by
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('calls', sa.Column('answered_by', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('calls', 'answered_by')
@@ -0,0 +1,51 @@
+"""call audio analytics
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'call_audio_analytics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('call_id', sa.Integer(), nullable=False),
+        sa.Column('recording_id', sa.Integer(), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('channels', sa.Integer(), nullable=True),
+        sa.Column('speech_seconds', sa.Float(), nullable=True),
+        sa.Column('agent_talk_seconds', sa.Float(), nullable=True),
+        sa.Column('contact_talk_seconds', sa.Float(), nullable=True),
+        sa.Column('talk_listen_ratio', sa.Float(), nullable=True),
+        sa.Column('overtalk_seconds', sa.Float(), nullable=True),
+        sa.Column('overtalk_pct', sa.Float(), nullable=True),
+        sa.Column('longest_silence_seconds', sa.Float(), nullable=True),
+        sa.Column('dead_air_pct', sa.Float(), nullable=True),
+        sa.Column('error', sa.String(length=500), nullable=True),
+        sa.Column('analyzed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['call_id'], ['calls.id']),
+        sa.ForeignKeyConstraint(['recording_id'], ['call_recordings.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('recording_id')
+    )
+    op.create_index(op.f('ix_call_audio_analytics_id'), 'call_audio_analytics', ['id'], unique=False)
+    op.create_index(op.f('ix_call_audio_analytics_call_id'), 'call_audio_analytics', ['call_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_audio_analytics_call_id'), table_name='call_audio_analytics')
+    op.drop_index(op.f('ix_call_audio_analytics_id'), table_name='call_audio_analytics')
+    op.drop_table('call_audio_analytics')
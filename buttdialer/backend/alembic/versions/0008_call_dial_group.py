@@ -0,0 +1,28 @@
+"""call dial group
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('calls', sa.Column('dial_group', sa.String(length=32), nullable=True))
+    op.create_index(op.f('ix_calls_dial_group'), 'calls', ['dial_group'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_calls_dial_group'), table_name='calls')
+    op.drop_column('calls', 'dial_group')
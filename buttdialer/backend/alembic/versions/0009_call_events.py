@@ -0,0 +1,57 @@
+"""call events
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _month(day: date, offset: int) -> date:
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'call_events',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.Column('call_id', sa.Integer(), nullable=False),
+        sa.Column('event', sa.SmallInteger(), nullable=False),
+        sa.Column('sequence', sa.Integer(), nullable=True),
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), server_default=sa.text("(clock_timestamp() AT TIME ZONE 'utc')"),
+                  nullable=True),
+        sa.PrimaryKeyConstraint('id', 'received_at'),
+        postgresql_partition_by='RANGE (received_at)'
+    )
+    op.create_index('ix_call_events_call_id', 'call_events', ['call_id', 'received_at'], unique=False)
+    op.create_index('ix_call_events_received_at', 'call_events', ['received_at'], unique=False,
+                    postgresql_using='brin')
+    
+    # This month and the next two; a daily task keeps creating them
+    this_month = _month(datetime.utcnow().date(), 0)
+    for offset in range(3):
+        start, end = _month(this_month, offset), _month(this_month, offset + 1)
+        op.execute(
+            f"CREATE TABLE call_events_{start:%Y_%m} PARTITION OF call_events "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+
+
+def downgrade() -> None:
+    # Dropping the parent drops every partition
+    op.drop_table('call_events')
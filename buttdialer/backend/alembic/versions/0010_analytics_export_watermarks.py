@@ -0,0 +1,31 @@
+"""analytics export watermarks
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaign_calls', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE campaign_calls SET updated_at = COALESCE(last_attempt_at, created_at)")
+    op.create_index(op.f('ix_campaign_calls_updated_at'), 'campaign_calls', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_contacts_updated_at'), 'contacts', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contacts_updated_at'), table_name='contacts')
+    op.drop_index(op.f('ix_campaign_calls_updated_at'), table_name='campaign_calls')
+    op.drop_column('campaign_calls', 'updated_at')
@@ -0,0 +1,37 @@
+"""call timing grids
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'call_timing_grids',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('area_code', sa.String(length=8), nullable=False),
+        sa.Column('calls', sa.Integer(), nullable=False),
+        sa.Column('counts', sa.LargeBinary(), nullable=False),
+        sa.Column('built_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('area_code')
+    )
+    op.create_index(op.f('ix_call_timing_grids_id'), 'call_timing_grids', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_timing_grids_id'), table_name='call_timing_grids')
+    op.drop_table('call_timing_grids')
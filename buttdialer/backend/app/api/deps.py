@@ -5,6 +5,7 @@ from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.replicas import replica_router
 from app.db.session import SessionLocal
 from app.models.user import User
 
@@ -17,11 +18,25 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-async def get_current_user(
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
-    token = credentials.credentials
+def get_user_from_token(token: str, db: Session) -> Optional[User]:
+    """Resolve a bearer token outside the HTTP security scheme (e.g. WebSockets)"""
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except JWTError:
+        return None
+    
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+    
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None or not user.is_active:
+        return None
+    return user
+
+def _token_user_id(token: str) -> int:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -37,7 +52,9 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
+    return user_id
+
+def _load_user(db: Session, user_id: int) -> User:
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
@@ -46,6 +63,15 @@ async def get_current_user(
         )
     return user
 
+async def get_current_user(
+    db: Session = Depends(get_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    user = _load_user(db, _token_user_id(credentials.credentials))
+    # Lets writes committed on this session pin the user to the primary
+    db.info["user_id"] = user.id
+    return user
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -64,4 +90,31 @@ def get_current_admin_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def get_read_db(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> Generator:
+    """Session for read-only endpoints; may be a replica (see app.db.replicas).
+    
+    Routed from the token's user id alone, so a read request that takes its
+    user from get_current_reader never opens a primary session.
+    """
+    db = replica_router.read_session(int(_token_user_id(credentials.credentials)))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_current_reader(
+    db: Session = Depends(get_read_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> User:
+    """The active user, loaded on the read session (at most REPLICA_MAX_LAG_SECONDS stale)"""
+    user = _load_user(db, _token_user_id(credentials.credentials))
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return user
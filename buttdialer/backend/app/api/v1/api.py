@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, calls, teams, campaigns, contacts, compliance, crm
+from app.api.v1.endpoints import auth, users, calls, teams, campaigns, contacts, compliance, crm, tts, audio, analytics
 
 api_router = APIRouter()
 
@@ -11,4 +11,7 @@ api_router.include_router(teams.router, prefix="/teams", tags=["teams"])
 api_router.include_router(campaigns.router, prefix="/campaigns", tags=["campaigns"])
 api_router.include_router(contacts.router, prefix="/contacts", tags=["contacts"])
 api_router.include_router(compliance.router, prefix="/compliance", tags=["compliance"])
-api_router.include_router(crm.router, prefix="/crm", tags=["crm"])
\ No newline at end of file
+api_router.include_router(crm.router, prefix="/crm", tags=["crm"])
+api_router.include_router(tts.router, prefix="/tts", tags=["tts"])
+api_router.include_router(audio.router, prefix="/audio", tags=["audio"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
\ No newline at end of file
@@ -0,0 +1,49 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+from app.api.deps import get_current_admin_user
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.analytics import AnalyticsExportStatus, AnalyticsQuery, AnalyticsResult
+from app.services.analytics_export import EXPORTS, QueryError, analytics_export
+
+router = APIRouter()
+
+def _require_export():
+    if not analytics_export.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analytics export is not configured"
+        )
+
+@router.post("/query", response_model=AnalyticsResult)
+async def run_analytics_query(
+    query: AnalyticsQuery,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Run read-only SQL over the Parquet export (calls, call_recordings, campaign_calls, contacts)"""
+    _require_export()
+    max_rows = min(query.max_rows or settings.ANALYTICS_QUERY_MAX_ROWS, settings.ANALYTICS_QUERY_MAX_ROWS)
+    
+    try:
+        columns, rows, truncated = await asyncio.to_thread(analytics_export.query, query.sql, max_rows)
+    except QueryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {"columns": columns, "rows": [list(row) for row in rows], "truncated": truncated}
+
+@router.get("/exports", response_model=List[AnalyticsExportStatus])
+async def get_analytics_exports(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """How far each exported table has been copied"""
+    _require_export()
+    
+    return [
+        {"table": name, "watermark": await asyncio.to_thread(analytics_export.watermark, name)}
+        for name in EXPORTS
+    ]
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Request, status
+import asyncio
+
+from app.core.file_response import RangedFileResponse
+from app.services.audio_store import CONTENT_TYPES, audio_store
+
+router = APIRouter()
+
+@router.api_route("/{digest}.{extension}", methods=["GET", "HEAD"])
+async def get_audio(
+    digest: str,
+    extension: str,
+    expires: int,
+    signature: str,
+    request: Request
+):
+    """Stored audio for Twilio <Play> and the softphone, via a signed URL"""
+    if not audio_store.valid(digest, extension) or not audio_store.verify(digest, extension, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio not found"
+        )
+    
+    path = audio_store.cached_path(digest, extension)
+    if path is None:
+        path = await asyncio.to_thread(audio_store.path, digest, extension)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio not found"
+        )
+    
+    return RangedFileResponse(
+        path,
+        etag=f'"{digest}"',
+        media_type=CONTENT_TYPES[extension],
+        request_headers=request.headers,
+        head=request.method == "HEAD"
+    )
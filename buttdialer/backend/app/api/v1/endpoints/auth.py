@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.core.config import settings
-from app.core.security import create_access_token
+from app.core.security import create_access_token, hash_password_async, verify_and_update_password
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, Token
 
@@ -27,7 +27,7 @@ async def register(user_in: UserCreate, db: Session = Depends(get_db)):
         last_name=user_in.last_name,
         role=user_in.role
     )
-    user.set_password(user_in.password)
+    user.hashed_password = await hash_password_async(user_in.password)
     
     db.add(user)
     db.commit()
@@ -50,7 +50,13 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     # Authenticate user
     user = db.query(User).filter(User.email == user_credentials.email).first()
     
-    if not user or not user.verify_password(user_credentials.password):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_and_update_password(
+            user_credentials.password, user.hashed_password
+        )
+    
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -62,6 +68,12 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user"
         )
     
+    # Stored hash uses an old cost factor: upgrade it while we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+        db.refresh(user)
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
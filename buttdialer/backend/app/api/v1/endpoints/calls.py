@@ -1,19 +1,41 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Form, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
 from datetime import datetime, date
+import asyncio
+import json
+from uuid import uuid4
 
-from app.api.deps import get_db, get_current_active_user
+from app.api.deps import get_db, get_read_db, get_current_active_user, get_current_reader, get_user_from_token
+from app.core.config import settings
+from app.core.serialization import encode_rows, model_columns, rows_response
+from app.db.session import SessionLocal
 from app.models.user import User
-from app.models.call import Call
+from app.models.call import Call, CallAudioAnalytics, CallRecording
 from app.models.contact import Contact, DNCList
 from app.services.twilio_service import twilio_service
-from app.schemas.call import CallCreate, CallResponse, CallUpdate, CallStats
+from app.services.call_archive import call_archive
+from app.services.call_board import call_board, publish_board_update
+from app.services.call_timing import OUTCOMES, CONNECTED, call_timing
+from app.services import call_events, duration_sketches
+from app.services.callback_scheduler import schedule_callback, record_call_outcome
+from app.services.webhook_dedup import webhook_dedup
+from app.services.audio_store import audio_store
+from app.services.answering_machine import MediaStreamSession, amd_config, apply_decision
+from app.services.dial_race import dial_race
+from app.services.websocket_manager import manager
+from app.schemas.call import (
+    CallCreate, CallResponse, CallUpdate, CallStats, CallQueued, CallPercentiles, CallAnalytics, CallTimeline,
+    BestTimeGrid
+)
 
 router = APIRouter()
 
+# Column-only select for list responses; mirrors CallResponse
+CALL_RESPONSE_COLUMNS = model_columns(Call, CallResponse.model_fields)
+
 @router.post("/outbound", response_model=CallResponse)
 async def make_outbound_call(
     call_data: CallCreate,
@@ -55,6 +77,48 @@ async def make_outbound_call(
     call = db.query(Call).filter(Call.id == result['call_id']).first()
     return call
 
+@router.post("/outbound/async", response_model=CallQueued, status_code=status.HTTP_202_ACCEPTED)
+async def queue_outbound_call(
+    call_data: CallCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Queue an outbound call for a worker to place.
+    
+    Progress is pushed over the /calls/ws WebSocket and can be polled at
+    /calls/{call_id}/status.
+    """
+    dnc_number = db.query(DNCList.id).filter(DNCList.phone_number == call_data.to_number).first()
+    if dnc_number:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Number is on Do Not Call list"
+        )
+    
+    call = Call(
+        agent_id=current_user.id,
+        campaign_id=call_data.campaign_id,
+        direction='outbound',
+        from_number=settings.TWILIO_PHONE_NUMBER,
+        to_number=call_data.to_number,
+        status='queued'
+    )
+    db.add(call)
+    db.flush()
+    call_id = call.id
+    db.commit()
+    publish_board_update(call)
+    
+    # Imported here so API workers only load Celery once this route is used
+    from app.tasks.calls import originate_call
+    originate_call.delay(call_id)
+    
+    return {
+        "call_id": call_id,
+        "status": "queued",
+        "status_url": f"{settings.API_V1_STR}/calls/{call_id}/status"
+    }
+
 @router.post("/parallel", response_model=List[CallResponse])
 async def make_parallel_calls(
     phone_numbers: List[str],
@@ -124,14 +188,39 @@ async def ivr_handler(request: Request):
     twiml_response = twilio_service.generate_ivr_response(digits)
     return Response(content=twiml_response, media_type="application/xml")
 
+@router.post("/outbound-answer")
+async def outbound_answer_webhook(CallSid: str = Form(...)):
+    """Answered outbound call with AMD enabled: start the media stream"""
+    twiml_response = twilio_service.generate_amd_response(CallSid)
+    return Response(content=twiml_response, media_type="application/xml")
+
 @router.post("/status-webhook")
 async def status_webhook(
     CallSid: str = Form(...),
     CallStatus: str = Form(...),
+    SequenceNumber: Optional[str] = Form(None),
+    Timestamp: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
     """Handle call status updates from Twilio"""
-    await twilio_service.update_call_status(CallSid, CallStatus)
+    # Retries of a callback carry the same SequenceNumber
+    key = f"{CallSid}:{SequenceNumber or CallStatus}"
+    if not await webhook_dedup.claim("status", key):
+        return {"status": "ok"}
+    
+    try:
+        # Hang up the other legs of a parallel dial before anything slower
+        await dial_race.on_status(CallSid, CallStatus)
+        await twilio_service.update_call_status(
+            CallSid,
+            CallStatus,
+            sequence=int(SequenceNumber) if SequenceNumber and SequenceNumber.isdigit() else None,
+            occurred_at=call_events.parse_timestamp(Timestamp)
+        )
+        await record_call_outcome(CallSid, CallStatus)
+    except Exception:
+        await webhook_dedup.release("status", key)
+        raise
     return {"status": "ok"}
 
 @router.post("/recording-webhook")
@@ -139,10 +228,23 @@ async def recording_webhook(
     CallSid: str = Form(...),
     RecordingSid: str = Form(...),
     RecordingUrl: str = Form(...),
+    RecordingStatus: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
     """Handle recording completion from Twilio"""
-    await twilio_service.save_recording(CallSid, RecordingSid, RecordingUrl)
+    key = f"{CallSid}:{RecordingSid}:{RecordingStatus or 'completed'}"
+    if not await webhook_dedup.claim("recording", key):
+        return {"status": "ok"}
+    
+    try:
+        recording_id = await twilio_service.save_recording(CallSid, RecordingSid, RecordingUrl)
+    except Exception:
+        await webhook_dedup.release("recording", key)
+        raise
+    
+    if recording_id is not None:
+        from app.tasks.recordings import store_recording
+        store_recording.delay(recording_id)
     return {"status": "ok"}
 
 @router.get("/", response_model=List[CallResponse])
@@ -152,15 +254,18 @@ async def get_calls(
     status: Optional[str] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    compact: bool = False,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
 ):
-    """Get call history with filters"""
-    query = db.query(Call)
+    """Get call history with filters, newest first"""
+    query = db.query(*CALL_RESPONSE_COLUMNS)
+    agent_id = None
     
     # Filter by user role
     if current_user.role != "admin":
-        query = query.filter(Call.agent_id == current_user.id)
+        agent_id = current_user.id
+        query = query.filter(Call.agent_id == agent_id)
     
     # Apply filters
     if status:
@@ -172,21 +277,39 @@ async def get_calls(
     if date_to:
         query = query.filter(Call.started_at <= date_to)
     
-    calls = query.offset(skip).limit(limit).all()
-    return calls
+    page = query.order_by(Call.started_at.desc(), Call.id.desc()).offset(skip).limit(limit)
+    if not call_archive.reaches(date_from, date_to):
+        return rows_response(page, compact=compact)
+    
+    # Archived calls are all older than live ones, so they continue the page
+    columns = [description["name"] for description in page.column_descriptions]
+    rows = page.all()
+    if len(rows) < limit:
+        live_total = skip + len(rows) if rows or skip == 0 else query.count()
+        rows += await asyncio.to_thread(
+            call_archive.query_calls, columns, agent_id, status, date_from, date_to,
+            max(skip - live_total, 0), limit - len(rows)
+        )
+    return encode_rows(columns, rows, compact=compact)
 
 @router.get("/stats", response_model=CallStats)
 async def get_call_stats(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
 ):
     """Get call statistics"""
-    query = db.query(Call)
+    query = db.query(
+        func.count(Call.id),
+        func.count(Call.id).filter(Call.status == 'completed'),
+        func.coalesce(func.sum(Call.duration), 0)
+    )
+    agent_id = None
     
     if current_user.role != "admin":
-        query = query.filter(Call.agent_id == current_user.id)
+        agent_id = current_user.id
+        query = query.filter(Call.agent_id == agent_id)
     
     if date_from:
         query = query.filter(Call.started_at >= date_from)
@@ -194,9 +317,13 @@ async def get_call_stats(
     if date_to:
         query = query.filter(Call.started_at <= date_to)
     
-    total_calls = query.count()
-    answered_calls = query.filter(Call.status == 'completed').count()
-    total_duration = sum(call.duration or 0 for call in query.all())
+    total_calls, answered_calls, total_duration = query.one()
+    
+    if call_archive.reaches(date_from, date_to):
+        archived = await asyncio.to_thread(call_archive.stats, agent_id, date_from, date_to)
+        total_calls += archived[0]
+        answered_calls += archived[1]
+        total_duration += archived[2]
     
     connect_rate = (answered_calls / total_calls * 100) if total_calls > 0 else 0
     avg_duration = (total_duration / answered_calls) if answered_calls > 0 else 0
@@ -209,6 +336,227 @@ async def get_call_stats(
         "average_duration": avg_duration
     }
 
+@router.get("/stats/percentiles", response_model=CallPercentiles)
+async def get_call_percentiles(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    agent_id: Optional[int] = None,
+    campaign_id: Optional[int] = None,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
+):
+    """p50/p90/p99 talk and ring time in seconds, merged from daily sketches"""
+    if current_user.role != "admin":
+        agent_id = current_user.id
+    
+    return duration_sketches.percentiles(db, date_from, date_to, agent_id, campaign_id)
+
+@router.get("/best-time", response_model=BestTimeGrid)
+async def get_best_time(
+    area_code: Optional[str] = None,
+    top: int = 5,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
+):
+    """Outbound outcome rates by UTC hour of week for an area code, or for all calls"""
+    model = call_timing.model(db)
+    if area_code and area_code not in model.areas:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No call history for this area code"
+        )
+    
+    calls, probabilities = model.grid(area_code)
+    connect_rate = probabilities[:, CONNECTED]
+    return {
+        "area_code": area_code,
+        "calls": calls,
+        "built_at": model.built_at,
+        "connect_rate": connect_rate.round(4).tolist(),
+        "outcome_rates": {name: probabilities[:, i].round(4).tolist() for i, name in enumerate(OUTCOMES)},
+        "best_hours": connect_rate.argsort()[::-1][:top].tolist()
+    }
+
+@router.get("/{call_id}/status", response_model=CallResponse)
+async def get_call_status(
+    call_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current state of a call (e.g. one queued via /outbound/async)"""
+    call = db.query(Call).filter(Call.id == call_id).first()
+    
+    if not call:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Call not found"
+        )
+    
+    if current_user.role != "admin" and call.agent_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this call"
+        )
+    
+    return call
+
+@router.get("/{call_id}/recording")
+async def get_call_recording(
+    call_id: int,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
+):
+    """Signed URL of a call's recording in the audio store"""
+    row = db.query(Call.agent_id, CallRecording.audio_digest, CallRecording.duration).join(
+        CallRecording, CallRecording.call_id == Call.id
+    ).filter(Call.id == call_id).first()
+    
+    if not row or not row.audio_digest:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recording not found"
+        )
+    
+    if current_user.role != "admin" and row.agent_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this recording"
+        )
+    
+    return {
+        "url": audio_store.signed_url(row.audio_digest, "wav"),
+        "duration": row.duration,
+        "expires_in": settings.AUDIO_URL_TTL_SECONDS
+    }
+
+@router.get("/{call_id}/events", response_model=CallTimeline)
+async def get_call_timeline(
+    call_id: int,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
+):
+    """Replay a call's status events, with ring time and answer latency"""
+    call = db.query(Call.agent_id, Call.started_at).filter(Call.id == call_id).first()
+    
+    if not call:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Call not found"
+        )
+    
+    if current_user.role != "admin" and call.agent_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this call"
+        )
+    
+    events = call_events.ordered(call_events.load_events(db, call_id, since=call.started_at))
+    return {
+        "call_id": call_id,
+        "events": [event._asdict() for event in events],
+        **call_events.timings(events, call.started_at)
+    }
+
+@router.get("/{call_id}/analytics", response_model=CallAnalytics)
+async def get_call_analytics(
+    call_id: int,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
+):
+    """Talk/listen, silence and overtalk measures from the call's recording"""
+    call = db.query(Call.agent_id).filter(Call.id == call_id).first()
+    
+    if not call:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Call not found"
+        )
+    
+    if current_user.role != "admin" and call.agent_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this call"
+        )
+    
+    analytics = db.query(CallAudioAnalytics).filter(
+        CallAudioAnalytics.call_id == call_id
+    ).order_by(CallAudioAnalytics.id.desc()).first()
+    
+    if not analytics:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recording not analysed yet"
+        )
+    
+    return analytics
+
+@router.websocket("/ws")
+async def call_updates_websocket(websocket: WebSocket, token: str):
+    """Stream call updates for the authenticated agent"""
+    db = SessionLocal()
+    user = get_user_from_token(token, db)
+    db.close()
+    
+    if not user:
+        await websocket.close(code=1008)
+        return
+    
+    client_id = uuid4().hex
+    await manager.connect(websocket, client_id, user.id)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        manager.disconnect(client_id, user.id)
+
+@router.websocket("/media-stream")
+async def media_stream_websocket(websocket: WebSocket):
+    """Twilio Media Streams: answering-machine detection on the callee's audio.
+    
+    The start message must carry the signature generate_amd_response put
+    in the TwiML, so only streams we started can decide a call's fate.
+    """
+    await websocket.accept()
+    session = MediaStreamSession(amd_config)
+    try:
+        while True:
+            message = json.loads(await websocket.receive_text())
+            if message.get("event") == "stop":
+                return
+            decision = session.handle(message)
+            if message.get("event") == "start" and not twilio_service.verify_stream(session.call_sid, session.parameters):
+                await websocket.close(code=1008)
+                return
+            if decision is not None:
+                if session.call_sid:
+                    await apply_decision(session.call_sid, decision, session.detector.audio_seconds)
+                break
+    except WebSocketDisconnect:
+        return
+    # Closing the socket ends Twilio's stream; the rest of the call isn't analysed
+    await websocket.close()
+
+@router.websocket("/board/ws")
+async def call_board_websocket(websocket: WebSocket, token: str):
+    """Live board of active calls: a snapshot, then deltas (admins see every agent)"""
+    db = SessionLocal()
+    user = get_user_from_token(token, db)
+    db.close()
+    
+    if not user:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    client_id = call_board.subscribe(websocket, None if user.role == "admin" else user.id)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        call_board.unsubscribe(client_id)
+
 @router.put("/{call_id}", response_model=CallResponse)
 async def update_call(
     call_id: int,
@@ -240,6 +588,9 @@ async def update_call(
     db.commit()
     db.refresh(call)
     
+    if call.disposition == 'callback' and call_update.callback_at:
+        await schedule_callback(call, call_update.callback_at)
+    
     return call
 
 @router.post("/{call_id}/end")
@@ -1,10 +1,15 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from datetime import datetime
 
-from app.api.deps import get_db, get_current_active_user
+from app.api.deps import get_db, get_read_db, get_current_active_user, get_current_reader, get_current_admin_user
+from app.core.serialization import model_columns, model_response, rows_response
 from app.models.user import User
 from app.models.campaign import Campaign
+from app.schemas.campaign import LeadScore
+from app.services.call_timing import call_timing
+from app.services.query_cache import query_cache
 
 router = APIRouter()
 
@@ -12,12 +17,17 @@ router = APIRouter()
 async def get_campaigns(
     skip: int = 0,
     limit: int = 100,
+    compact: bool = False,
     current_user: User = Depends(get_current_active_user),
+    # The primary: a lagging replica could refill an invalidated entry with old rows
     db: Session = Depends(get_db)
 ):
     """Get campaigns"""
-    campaigns = db.query(Campaign).offset(skip).limit(limit).all()
-    return campaigns
+    def load():
+        query = db.query(*model_columns(Campaign)).offset(skip).limit(limit)
+        return rows_response(query, compact=compact)
+    
+    return await query_cache.response("campaigns", f"list:{skip}:{limit}:{int(compact)}", ("campaigns:list",), load)
 
 @router.get("/{campaign_id}")
 async def get_campaign(
@@ -26,6 +36,45 @@ async def get_campaign(
     db: Session = Depends(get_db)
 ):
     """Get campaign details"""
+    def load():
+        campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+        
+        if not campaign:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Campaign not found"
+            )
+        
+        return model_response(campaign)
+    
+    return await query_cache.response("campaigns", str(campaign_id), (f"campaigns:{campaign_id}",), load)
+
+@router.get("/{campaign_id}/leads", response_model=List[LeadScore])
+async def get_campaign_leads(
+    campaign_id: int,
+    at: Optional[datetime] = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
+):
+    """Callable leads ranked by the chance of reaching a person if called at `at` (default now, UTC)"""
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    
+    if not campaign:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found"
+        )
+    
+    return call_timing.rank_campaign_calls(db, campaign, at, limit)
+
+@router.post("/{campaign_id}/audio", status_code=status.HTTP_202_ACCEPTED)
+async def render_campaign_audio(
+    campaign_id: int,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Queue rendering of the campaign's TTS message for each pending lead"""
     campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
     
     if not campaign:
@@ -33,5 +82,12 @@ async def get_campaign(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campaign not found"
         )
+    if not campaign.tts_message:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Campaign has no TTS message"
+        )
     
-    return campaign
\ No newline at end of file
+    from app.tasks.campaigns import render_campaign_audio as render_task
+    render_task.delay(campaign_id)
+    return {"message": "Campaign audio rendering queued", "campaign_id": campaign_id}
@@ -5,7 +5,7 @@ from io import StringIO
 import csv
 from datetime import time
 
-from app.api.deps import get_db, get_current_active_user, get_current_admin_user
+from app.api.deps import get_db, get_read_db, get_current_active_user, get_current_reader, get_current_admin_user
 from app.models.user import User
 from app.models.contact import DNCList
 from app.schemas.compliance import DNCAdd, DNCResponse, TCPASettings
@@ -107,8 +107,8 @@ async def get_dnc_list(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
 ):
     """Get DNC list with optional search"""
     query = db.query(DNCList)
@@ -2,9 +2,12 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user
+from app.api.deps import get_db, get_read_db, get_current_active_user, get_current_reader, get_current_admin_user
+from app.core.serialization import model_columns, model_response, rows_response
 from app.models.user import User
 from app.models.contact import Contact
+from app.services.contact_dedup import resolve_contact_id
+from app.services.query_cache import query_cache
 
 router = APIRouter()
 
@@ -13,11 +16,12 @@ async def get_contacts(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    compact: bool = False,
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
 ):
     """Get contacts with optional search"""
-    query = db.query(Contact)
+    query = db.query(*model_columns(Contact))
     
     if search:
         query = query.filter(
@@ -27,8 +31,17 @@ async def get_contacts(
             Contact.email.contains(search)
         )
     
-    contacts = query.offset(skip).limit(limit).all()
-    return contacts
+    return rows_response(query.offset(skip).limit(limit), compact=compact)
+
+@router.post("/merge-duplicates", status_code=status.HTTP_202_ACCEPTED)
+async def merge_duplicate_contacts(
+    dry_run: bool = False,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Queue the duplicate-contact merge job (dry_run only counts clusters)"""
+    from app.tasks.contacts import merge_duplicate_contacts as merge_task
+    merge_task.delay(dry_run=dry_run)
+    return {"message": "Duplicate contact merge queued", "dry_run": dry_run}
 
 @router.get("/{contact_id}")
 async def get_contact(
@@ -36,13 +49,26 @@ async def get_contact(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get contact details"""
-    contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    """Get contact details (a merged contact resolves to its survivor)"""
+    def load(row_id: int):
+        contact = db.query(Contact).filter(Contact.id == row_id).first()
+        
+        if not contact:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Contact not found"
+            )
+        
+        return model_response(contact)
     
-    if not contact:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Contact not found"
-        )
+    try:
+        return await query_cache.response("contacts", str(contact_id), (f"contacts:{contact_id}",),
+                                          lambda: load(contact_id))
+    except HTTPException:
+        # Cached under the survivor, so updates to it reach every merged id
+        survivor_id = resolve_contact_id(db, contact_id)
+        if survivor_id == contact_id:
+            raise
     
-    return contact
\ No newline at end of file
+    return await query_cache.response("contacts", str(survivor_id), (f"contacts:{survivor_id}",),
+                                      lambda: load(survivor_id))
\ No newline at end of file
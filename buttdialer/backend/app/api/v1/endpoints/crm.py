@@ -1,11 +1,12 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.api.deps import get_db, get_current_active_user
 from app.models.user import User
 from app.models.contact import Contact
 from app.models.call import Call
+from app.core.query_profiler import max_queries
 from app.services.hubspot_service import hubspot_service
 from app.schemas.crm import ContactSync, CallLog, DealCreate
 
@@ -68,13 +69,14 @@ async def sync_contacts_task(db: Session):
         logger.error(f"Error in sync_contacts_task: {str(e)}")
 
 @router.post("/log-call/{call_id}")
+@max_queries(2)
 async def log_call_to_hubspot(
     call_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Log a completed call to HubSpot"""
-    call = db.query(Call).filter(Call.id == call_id).first()
+    call = db.query(Call).options(joinedload(Call.contact)).filter(Call.id == call_id).first()
     
     if not call:
         raise HTTPException(
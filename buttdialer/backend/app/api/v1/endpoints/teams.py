@@ -1,10 +1,13 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, joinedload
 
 from app.api.deps import get_db, get_current_active_user, get_current_admin_user
 from app.models.user import User
+from app.core.query_profiler import max_queries
 from app.models.team import Team, TeamMember
+from app.services.query_cache import query_cache
 from app.schemas.team import TeamCreate, TeamResponse, TeamMemberAdd, TeamMemberResponse
 
 router = APIRouter()
@@ -41,17 +44,20 @@ async def get_teams(
     db: Session = Depends(get_db)
 ):
     """Get all teams (admin) or user's teams (agent)"""
-    if current_user.role == "admin":
-        teams = db.query(Team).all()
-    else:
-        # Get teams where user is a member
-        team_ids = db.query(TeamMember.team_id).filter(
-            TeamMember.user_id == current_user.id
-        ).all()
-        team_ids = [t[0] for t in team_ids]
-        teams = db.query(Team).filter(Team.id.in_(team_ids)).all()
-    
-    return teams
+    def load():
+        if current_user.role == "admin":
+            teams = db.query(Team).all()
+        else:
+            # Get teams where user is a member
+            team_ids = db.query(TeamMember.team_id).filter(
+                TeamMember.user_id == current_user.id
+            ).all()
+            team_ids = [t[0] for t in team_ids]
+            teams = db.query(Team).filter(Team.id.in_(team_ids)).all()
+        return ORJSONResponse([TeamResponse.model_validate(team).model_dump() for team in teams])
+    
+    scope = "admin" if current_user.role == "admin" else f"user:{current_user.id}"
+    return await query_cache.response("teams", "all", ("teams:list",), load, scope=scope)
 
 @router.get("/{team_id}", response_model=TeamResponse)
 async def get_team(
@@ -146,6 +152,7 @@ async def add_team_member(
     return team_member
 
 @router.get("/{team_id}/members", response_model=List[TeamMemberResponse])
+@max_queries(4)
 async def get_team_members(
     team_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -173,7 +180,10 @@ async def get_team_members(
                 detail="Not authorized to view team members"
             )
     
-    members = db.query(TeamMember).filter(TeamMember.team_id == team_id).all()
+    # Eager-load users: the response serializes member.user for every row
+    members = db.query(TeamMember).options(
+        joinedload(TeamMember.user)
+    ).filter(TeamMember.team_id == team_id).all()
     return members
 
 @router.delete("/{team_id}/members/{user_id}")
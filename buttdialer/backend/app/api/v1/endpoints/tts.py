@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+import asyncio
+
+from app.api.deps import get_db, get_current_active_user
+from app.core.config import settings
+from app.core.file_response import RangedFileResponse
+from app.models.user import User
+from app.models.call import Call
+from app.services.audio_store import audio_store
+from app.services.telephony_prompts import telephony_prompts
+from app.services.tts_stream import tts_streamer
+from app.services.twilio_service import twilio_service
+from app.schemas.tts import TTSStreamCreate, TTSStream, TTSPromptCreate, TTSPrompt
+
+router = APIRouter()
+
+@router.post("/streams", response_model=TTSStream, status_code=status.HTTP_201_CREATED)
+async def create_tts_stream(
+    stream_in: TTSStreamCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Register text for streamed playback; synthesis starts when the URL is fetched"""
+    call = None
+    if stream_in.call_id is not None:
+        call = db.query(Call).filter(Call.id == stream_in.call_id).first()
+        if not call or not call.twilio_call_sid:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Call not found"
+            )
+        if current_user.role != "admin" and call.agent_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to play audio on this call"
+            )
+    
+    token = await tts_streamer.create(stream_in.text, stream_in.voice_id)
+    url = f"{settings.TWILIO_WEBHOOK_BASE_URL}{settings.API_V1_STR}/tts/streams/{token}.mp3"
+    
+    if call is not None:
+        played = await asyncio.to_thread(twilio_service.play_on_call, call.twilio_call_sid, url)
+        if not played:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Failed to play audio on call"
+            )
+    
+    return TTSStream(token=token, url=url, expires_in=settings.TTS_STREAM_TTL_SECONDS)
+
+@router.get("/streams/{token}.mp3")
+async def play_tts_stream(token: str, request: Request):
+    """Audio for Twilio <Play>: relayed from ElevenLabs as it is generated.
+    
+    Unauthenticated like the other Twilio-facing routes; the token is the
+    credential and expires after TTS_STREAM_TTL_SECONDS.
+    """
+    stream = await tts_streamer.resolve(token)
+    if stream is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stream not found or expired"
+        )
+    
+    digest = await tts_streamer.stored(stream)
+    path = await asyncio.to_thread(audio_store.path, digest, "mp3") if digest else None
+    if path is not None:
+        return RangedFileResponse(path, etag=f'"{digest}"', media_type="audio/mpeg",
+                                  request_headers=request.headers)
+    
+    chunks = await tts_streamer.start(stream)
+    if chunks is None:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Speech synthesis failed"
+        )
+    # No Content-Length, so the body goes out with chunked transfer encoding
+    return StreamingResponse(chunks, media_type="audio/mpeg")
+
+@router.post("/prompts", response_model=TTSPrompt)
+async def create_tts_prompt(
+    prompt_in: TTSPromptCreate,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Synthesize a prompt as 8 kHz mu-law WAV (once per voice and text) for <Play>"""
+    digest = await telephony_prompts.get(prompt_in.text, prompt_in.voice_id)
+    if digest is None:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Speech synthesis failed"
+        )
+    
+    return TTSPrompt(
+        digest=digest,
+        url=audio_store.signed_url(digest, "wav"),
+        expires_in=settings.AUDIO_URL_TTL_SECONDS
+    )
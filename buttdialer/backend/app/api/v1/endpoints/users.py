@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_active_user, get_current_admin_user
+from app.core.security import hash_password_async
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, User as UserSchema
 
@@ -29,7 +30,7 @@ async def update_current_user(
     if user_update.last_name:
         current_user.last_name = user_update.last_name
     if user_update.password:
-        current_user.set_password(user_update.password)
+        current_user.hashed_password = await hash_password_async(user_update.password)
     
     db.commit()
     db.refresh(current_user)
@@ -69,7 +70,7 @@ async def create_user(
         role=user_data.role,
         is_active=user_data.is_active
     )
-    user.set_password(user_data.password)
+    user.hashed_password = await hash_password_async(user_data.password)
     
     db.add(user)
     db.commit()
@@ -121,7 +122,7 @@ async def update_user(
     if user_update.is_active is not None:
         user.is_active = user_update.is_active
     if user_update.password:
-        user.set_password(user_update.password)
+        user.hashed_password = await hash_password_async(user_update.password)
     
     db.commit()
     db.refresh(user)
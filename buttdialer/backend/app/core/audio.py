@@ -0,0 +1,152 @@
+from functools import lru_cache
+from math import gcd
+from typing import Tuple
+import os
+import struct
+
+import numpy as np
+
+TELEPHONY_RATE = 8000
+
+# G.711 mu-law, on 14-bit magnitudes as in the ITU reference coder
+_BIAS = 0x84
+_CLIP = 8159
+_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32)
+
+
+def _decode_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = ((((codes & 0x0F) << 3) + _BIAS) << exponent) - _BIAS
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+MULAW_DECODE = _decode_table()
+
+
+def pcm16_to_float(pcm: bytes) -> np.ndarray:
+    """Little-endian 16-bit PCM bytes as float32 samples in [-1, 1)"""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def mulaw_encode(samples: np.ndarray) -> bytes:
+    """Float samples in [-1, 1] as G.711 mu-law bytes"""
+    linear = np.clip(np.rint(samples * 32768.0), -32768, 32767).astype(np.int32) >> 2
+    mask = np.where(linear < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(linear), _CLIP) + (_BIAS >> 2)
+    segment = np.searchsorted(_SEGMENT_ENDS, magnitude).astype(np.int32)
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    code = np.where(segment > 7, 0x7F, code)  # full scale
+    return (code ^ mask).astype(np.uint8).tobytes()
+
+
+def mulaw_decode(data: bytes) -> np.ndarray:
+    """G.711 mu-law bytes as int16 samples (a table lookup, no per-sample loop)"""
+    return MULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+@lru_cache(maxsize=16)
+def _polyphase_filter(up: int, down: int, taps: int) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass split into `up` phases of `taps` taps"""
+    length = taps * up
+    # Cut off a little below the lower Nyquist rate, relative to the upsampled rate
+    cutoff = 0.45 / max(up, down)
+    t = np.arange(length) - (length - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, 8.0)
+    h *= up / h.sum()  # unity gain once zero-stuffing is accounted for
+    # phases[p, m] = h[p + m * up]
+    return h.reshape(taps, up).T.astype(np.float32).copy()
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int, zero_crossings: int = 16,
+             block: int = 1 << 14) -> np.ndarray:
+    """Rational polyphase resampling of float samples.
+
+    Each output sample is a dot product of a window of input samples with
+    one phase of the filter, computed for a block of outputs at a time with
+    gathered index arrays. The window spans `zero_crossings` lobes of the
+    sinc either side, so it widens with the decimation ratio.
+    """
+    if src_rate == dst_rate:
+        return samples.astype(np.float32, copy=False)
+    divisor = gcd(src_rate, dst_rate)
+    up, down = dst_rate // divisor, src_rate // divisor
+    taps = 2 * zero_crossings * max(-(-down // up), 1)
+    phases = _polyphase_filter(up, down, taps)
+
+    padded = np.concatenate((
+        np.zeros(taps, np.float32), samples.astype(np.float32, copy=False), np.zeros(taps, np.float32)
+    ))
+    count = len(samples) * up // down
+    delay = taps * up // 2  # center of the filter, in upsampled samples
+    offsets = np.arange(taps)
+    out = np.empty(count, dtype=np.float32)
+    for start in range(0, count, block):
+        position = np.arange(start, min(start + block, count), dtype=np.int64) * down + delay
+        base = position // up + taps
+        window = padded[base[:, None] - offsets[None, :]]
+        out[start:start + len(position)] = np.einsum("ij,ij->i", window, phases[position % up])
+    return out
+
+
+def mulaw_wav(data: bytes, rate: int = TELEPHONY_RATE) -> bytes:
+    """Wrap mu-law bytes as a WAV file (format tag 7, mono, 8 bits per sample)"""
+    fmt = struct.pack("<HHIIHHH", 7, 1, rate, rate, 1, 8, 0)
+    chunks = [
+        b"WAVE",
+        b"fmt ", struct.pack("<I", len(fmt)), fmt,
+        # Non-PCM WAVs carry the sample count in a fact chunk
+        b"fact", struct.pack("<II", 4, len(data)),
+        b"data", struct.pack("<I", len(data)), data,
+    ]
+    if len(data) % 2:
+        chunks.append(b"\0")
+    body = b"".join(chunks)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def telephony_wav(pcm: bytes, rate: int) -> bytes:
+    """16-bit PCM at `rate` as an 8 kHz mu-law WAV that Twilio plays as is"""
+    samples = resample(pcm16_to_float(pcm), rate, TELEPHONY_RATE)
+    return mulaw_wav(mulaw_encode(samples))
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """(int16 samples shaped (frames, channels), sample rate) of a PCM16 or mu-law WAV.
+
+    PCM data is memory-mapped rather than read, so long recordings cost no
+    more than the pages actually touched.
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + size % 2, 1)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + size % 2, 1)
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk")
+
+    format_tag, channels, rate, _, _, bits = fmt
+    # A data chunk still being written can claim more than is on disk
+    size = min(size, os.path.getsize(path) - offset)
+    if format_tag == 1 and bits == 16:
+        frames = size // (2 * channels)
+        samples = np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(frames * channels,))
+    elif format_tag == 7 and bits == 8:
+        frames = size // channels
+        samples = mulaw_decode(np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(frames * channels,)))
+    else:
+        raise ValueError(f"Unsupported WAV format {format_tag} with {bits} bits per sample")
+    return samples.reshape(frames, channels), rate
@@ -0,0 +1,56 @@
+from celery import Celery
+from celery.schedules import crontab
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "buttdialer",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    include=["app.tasks.calls", "app.tasks.archive", "app.tasks.stats", "app.tasks.contacts",
+             "app.tasks.recordings", "app.tasks.analytics", "app.tasks.exports",
+             "app.tasks.campaigns"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    task_ignore_result=True,
+    # Never re-run an origination after a worker crash: it could double-dial
+    task_acks_late=False,
+    worker_prefetch_multiplier=1,
+    task_routes={
+        "calls.*": {"queue": "calls"},
+        # Starts its own process pool, so it needs a worker that isn't a
+        # prefork child: `-Q analytics -P solo`
+        "maintenance.analyze_recordings": {"queue": "analytics"},
+        "maintenance.*": {"queue": "maintenance"},
+    },
+    # Run with `celery -A app.core.celery_app beat`
+    beat_schedule={
+        "archive-old-calls": {
+            "task": "maintenance.archive_old_calls",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        "call-event-partitions": {
+            "task": "maintenance.maintain_call_event_partitions",
+            "schedule": crontab(hour=2, minute=30),
+        },
+        "analyze-recordings": {
+            "task": "maintenance.analyze_recordings",
+            "schedule": crontab(minute=15),
+        },
+        "build-call-timing": {
+            "task": "maintenance.build_call_timing",
+            "schedule": crontab(hour=4, minute=0),
+        },
+        "export-analytics": {
+            "task": "maintenance.export_analytics",
+            "schedule": crontab(minute=45),
+        },
+    },
+)
+
+
+# Workers write contacts and campaigns too: register the ORM listeners that
+# invalidate the API's query cache
+import app.services.query_cache  # noqa: E402,F401
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, PostgresDsn, validator
 
@@ -11,6 +11,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
     ALGORITHM: str = "HS256"
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 200
     
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = ["http://localhost:3000"]
@@ -34,6 +37,22 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
     
+    # Read replicas (JSON list of URLs); read-only endpoints fall back to the primary
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_SECONDS: int = 5
+    READ_YOUR_WRITES_SECONDS: int = 15  # route a user to the primary this long after a write
+    
+    # Startup: verify the alembic revision (default) or create tables directly (dev only)
+    SCHEMA_AUTO_CREATE: bool = False
+    
+    # Query profiling (debug headers, N+1 detection, per-route budgets)
+    QUERY_PROFILER_ENABLED: bool = False
+    QUERY_BUDGET_STRICT: bool = False  # raise when a route exceeds its budget (test runs)
+    QUERY_BUDGET_DEFAULT: int = 25
+    N_PLUS_ONE_THRESHOLD: int = 5
+    SLOW_QUERY_MS: int = 200
+    
     # Twilio
     TWILIO_ACCOUNT_SID: str
     TWILIO_AUTH_TOKEN: str
@@ -41,12 +60,32 @@ class Settings(BaseSettings):
     TWILIO_API_KEY: str
     TWILIO_API_SECRET: str
     TWILIO_WEBHOOK_BASE_URL: str = "http://localhost:8000"
+    TWILIO_API_BASE_URL: Optional[str] = None  # override to point at a local simulator
     
     # ElevenLabs
     ELEVENLABS_API_KEY: str
+    ELEVENLABS_API_BASE_URL: str = "https://api.elevenlabs.io/v1"
+    TTS_RENDER_CONCURRENCY: int = 4  # ElevenLabs requests in flight per campaign render
+    TTS_SEGMENT_GAP_MS: int = 40  # silence inserted where segments are spliced
+    TTS_STREAM_TTL_SECONDS: int = 600  # how long a stream URL handed to Twilio stays valid
+    TTS_SOURCE_FORMAT: str = "pcm_22050"  # PCM requested for prompts transcoded to 8 kHz mu-law
+    
+    # Answering-machine detection on a Twilio Media Stream of each outbound
+    # call (durations in ms; defaults follow Asterisk's AMD)
+    AMD_ENABLED: bool = False
+    AMD_HANGUP_ON_MACHINE: bool = True
+    AMD_SILENCE_THRESHOLD_DBFS: float = -42.0
+    AMD_INITIAL_SILENCE_MS: int = 2500
+    AMD_GREETING_MS: int = 1500
+    AMD_AFTER_GREETING_SILENCE_MS: int = 800
+    AMD_TOTAL_ANALYSIS_MS: int = 5000
+    AMD_MIN_WORD_MS: int = 100
+    AMD_BETWEEN_WORDS_SILENCE_MS: int = 50
+    AMD_MAX_WORDS: int = 3
     
     # HubSpot
     HUBSPOT_API_KEY: str
+    HUBSPOT_API_BASE_URL: str = "https://api.hubapi.com"
     
     # AWS
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -54,9 +93,87 @@ class Settings(BaseSettings):
     AWS_REGION: str = "us-east-1"
     S3_BUCKET_NAME: Optional[str] = None
     
+    # Audio store: content-addressed TTS and recording audio on a local path
+    # or s3://bucket/prefix; S3 assets are served from a local cache
+    AUDIO_STORE_URI: str = "/tmp/buttdialer/audio"
+    AUDIO_STORE_S3_ENDPOINT: Optional[str] = None
+    AUDIO_CACHE_DIR: str = "/tmp/buttdialer/audio-cache"
+    AUDIO_URL_TTL_SECONDS: int = 60 * 60  # lifetime of signed audio URLs
+    
+    # Call archive: calls older than the retention period move to Parquet
+    # files under a local path or s3://bucket/prefix
+    CALL_ARCHIVE_URI: Optional[str] = None
+    CALL_ARCHIVE_S3_ENDPOINT: Optional[str] = None  # S3-compatible stores (MinIO etc.)
+    CALL_RETENTION_DAYS: int = 365
+    CALL_ARCHIVE_BATCH_SIZE: int = 5000
+    
+    # Post-call recording analytics. Recordings are dual-channel; Twilio puts
+    # the parent leg (the contact) on channel 0 and the agent's leg on 1
+    CALL_ANALYTICS_WORKERS: Optional[int] = None  # processes; default one per CPU
+    CALL_ANALYTICS_BATCH_SIZE: int = 5000  # recordings per run
+    CALL_ANALYTICS_SILENCE_DBFS: float = -45.0
+    CALL_ANALYTICS_DEAD_AIR_SECONDS: float = 3.0
+    RECORDING_AGENT_CHANNEL: int = 1
+    
+    # Call event log (append-only, monthly partitions of call_events)
+    CALL_EVENT_BATCH_SIZE: int = 500  # most rows per INSERT
+    CALL_EVENT_PARTITION_MONTHS_AHEAD: int = 2
+    CALL_EVENT_RETENTION_DAYS: int = 365  # older partitions are dropped
+    
+    # Best time to call: outbound call outcomes by area code and hour of week
+    CALL_TIMING_LOOKBACK_DAYS: int = 90
+    CALL_TIMING_PRIOR_CALLS: float = 20.0  # weight of the broader pattern in sparse cells
+    
+    # Analytics export: incremental Parquet copies of calls, call_recordings,
+    # campaign_calls and contacts under a local path or s3://bucket/prefix,
+    # queried by admins through an embedded DuckDB
+    ANALYTICS_EXPORT_URI: Optional[str] = None
+    ANALYTICS_EXPORT_S3_ENDPOINT: Optional[str] = None
+    ANALYTICS_EXPORT_BATCH_SIZE: int = 10000
+    ANALYTICS_EXPORT_SETTLE_HOURS: int = 24  # calls and recordings are exported once this old
+    ANALYTICS_EXPORT_SAFETY_SECONDS: int = 300  # rows newer than this wait for the next run
+    ANALYTICS_QUERY_MAX_ROWS: int = 10000
+    ANALYTICS_QUERY_TIMEOUT_SECONDS: float = 60.0
+    ANALYTICS_QUERY_MEMORY_LIMIT: str = "2GB"
+    ANALYTICS_QUERY_THREADS: int = 4
+    
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Celery (defaults to REDIS_URL)
+    CELERY_BROKER_URL: Optional[str] = None
+    
+    # Webhook deduplication (Twilio retries callbacks on timeouts)
+    WEBHOOK_DEDUP_TTL_SECONDS: int = 24 * 60 * 60
+    WEBHOOK_DEDUP_LRU_SIZE: int = 100000
+    
+    # Duplicate-contact merging (clusters per transaction)
+    CONTACT_MERGE_BATCH_SIZE: int = 200
+    
+    # Query-result cache for polled read endpoints: an in-process LRU in front
+    # of Redis, invalidated on writes to teams, campaigns and contacts
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_TTL_SECONDS: Dict[str, int] = {"teams": 300, "campaigns": 60, "contacts": 60}
+    QUERY_CACHE_LOCAL_TTL_SECONDS: float = 10.0
+    QUERY_CACHE_LRU_SIZE: int = 10000
+    
+    # Live call board
+    CALL_BOARD_MAX_AGE_HOURS: int = 4  # ignore calls stuck "active" longer than this on rebuild
+    CALL_BOARD_MAX_QUEUE: int = 256  # per-subscriber backlog before it is disconnected
+    
+    # Parallel dials: how long a dial group's legs and winner are kept in Redis
+    DIAL_RACE_TTL_SECONDS: int = 60 * 60
+    
+    # Delay queue (callbacks and campaign retries)
+    DELAY_QUEUE_TICK_MS: int = 100
+    DELAY_QUEUE_HORIZON_SECONDS: int = 60
+    DELAY_QUEUE_LOAD_BATCH: int = 1000
+    DELAY_QUEUE_MAX_ATTEMPTS: int = 5  # handler runs before a failing job is dropped
+    DELAY_QUEUE_RETRY_BASE_SECONDS: int = 10
+    DELAY_QUEUE_RETRY_MAX_SECONDS: int = 10 * 60
+    RETRY_BACKOFF_BASE_SECONDS: int = 300
+    RETRY_BACKOFF_MAX_SECONDS: int = 4 * 60 * 60
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import mmap
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+
+# ASGI extension for sendfile(2), offered by servers that support it
+ZERO_COPY_SEND = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single "bytes=" range, or None to send the whole file.
+
+    Multiple ranges and malformed headers are ignored, which RFC 9110 allows.
+    """
+    if not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+class MappedFiles:
+    """Read-only mmaps shared by every response sending the same file.
+
+    Only for immutable files (e.g. content-addressed ones): concurrent
+    fetches of one file then all read the same page-cache pages.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._maps: "OrderedDict[str, mmap.mmap]" = OrderedDict()
+
+    def view(self, path: str) -> memoryview:
+        mapped = self._maps.get(path)
+        if mapped is None:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[path] = mapped
+            if len(self._maps) > self.capacity:
+                # Not closed here: responses still sending hold views of it, and
+                # it is unmapped when the last of those is released
+                self._maps.popitem(last=False)
+        else:
+            self._maps.move_to_end(path)
+        return memoryview(mapped)
+
+
+mapped_files = MappedFiles()
+
+
+class RangedFileResponse(Response):
+    """Serves an immutable file with a strong ETag, single byte ranges and 304s.
+
+    The body goes out with sendfile when the server offers the ASGI
+    zero-copy extension, otherwise as slices of a shared mmap, so it is
+    never read into Python bytes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        etag: str,
+        media_type: str,
+        request_headers: Headers,
+        head: bool = False,
+    ):
+        self.path = path
+        self.size = os.stat(path).st_size
+        self.head = head
+        self.range: Optional[Tuple[int, int]] = None
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "cache-control": "public, max-age=31536000, immutable",
+        }
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))):
+            super().__init__(status_code=304, headers=headers)
+            return
+
+        status_code = 200
+        length = self.size
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and self.size and (if_range is None or if_range == etag):
+            try:
+                self.range = parse_range(range_header, self.size)
+            except RangeNotSatisfiable:
+                status_code, length = 416, 0
+                headers["content-range"] = f"bytes */{self.size}"
+        if self.range is not None:
+            start, end = self.range
+            status_code, length = 206, end - start + 1
+            headers["content-range"] = f"bytes {start}-{end}/{self.size}"
+
+        headers["content-length"] = str(length)
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.head or self.status_code not in (200, 206) or self.size == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, end = self.range or (0, self.size - 1)
+        if ZERO_COPY_SEND in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({"type": ZERO_COPY_SEND, "file": f, "offset": start, "count": end - start + 1})
+            return
+
+        view = mapped_files.view(self.path)
+        for offset in range(start, end + 1, CHUNK_SIZE):
+            stop = min(offset + CHUNK_SIZE, end + 1)
+            await send({"type": "http.response.body", "body": view[offset:stop], "more_body": stop <= end})
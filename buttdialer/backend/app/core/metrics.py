@@ -0,0 +1,419 @@
+import asyncio
+import functools
+import os
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Under gunicorn every worker writes its metrics to files in this directory
+# and /metrics aggregates them (see render_metrics)
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Buckets tuned for API/DB latencies (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool")
+DB_POOL_CONNECTS = Counter("db_pool_connects_total", "New physical DB connections opened")
+DB_POOL_INVALIDATIONS = Counter("db_pool_invalidations_total", "DB connections invalidated")
+
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag measured by the last replica health check (-1 when unreachable)",
+    ["replica"],
+    multiprocess_mode="livemax",
+)
+DB_READ_ROUTING = Counter(
+    "db_read_routing_total",
+    "Read-only sessions by target and routing reason",
+    ["target", "reason"],
+)
+
+PROVIDER_REQUEST_DURATION = Histogram(
+    "provider_request_duration_seconds",
+    "Latency of Twilio, HubSpot and ElevenLabs service calls",
+    ["provider", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+PROVIDER_ERRORS = Counter(
+    "provider_errors_total",
+    "Failed Twilio, HubSpot and ElevenLabs service calls",
+    ["provider", "operation"],
+)
+
+PASSWORD_HASH_WAITING = Gauge(
+    "password_hash_waiting",
+    "Password hash/verify requests queued for the bcrypt pool",
+    multiprocess_mode="livesum",
+)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections", "Active WebSocket connections", multiprocess_mode="livesum"
+)
+WEBSOCKET_QUEUED_MESSAGES = Gauge(
+    "websocket_queued_messages",
+    "WebSocket messages accepted by ConnectionManager and not yet delivered",
+    multiprocess_mode="livesum",
+)
+WEBSOCKET_MESSAGES = Counter("websocket_messages_sent_total", "WebSocket messages delivered")
+WEBSOCKET_SEND_ERRORS = Counter("websocket_send_errors_total", "WebSocket sends that failed")
+
+CALL_BOARD_ACTIVE_CALLS = Gauge(
+    "call_board_active_calls", "Calls held on the live call board", multiprocess_mode="livesum"
+)
+CALL_BOARD_MEMORY_BYTES = Gauge(
+    "call_board_memory_bytes",
+    "Approximate memory held by live call board records",
+    multiprocess_mode="livesum",
+)
+CALL_BOARD_SUBSCRIBERS = Gauge(
+    "call_board_subscribers", "WebSockets subscribed to the call board", multiprocess_mode="livesum"
+)
+CALL_BOARD_DROPPED_SUBSCRIBERS = Counter(
+    "call_board_dropped_subscribers_total",
+    "Call board subscribers disconnected for falling behind",
+)
+CALL_BOARD_DELTA_LATENCY = Histogram(
+    "call_board_delta_latency_seconds",
+    "Time from a call state change being published to the delta reaching a subscriber",
+    buckets=LATENCY_BUCKETS,
+)
+
+WEBHOOK_DEDUP_LOOKUPS = Counter(
+    "webhook_dedup_lookups_total",
+    "Provider callbacks checked for duplicates, by event and result "
+    "(new, duplicate_memory, duplicate_redis, error)",
+    ["event", "result"],
+)
+
+DELAY_QUEUE_RETRIES = Counter(
+    "delay_queue_retries_total",
+    "Delayed jobs re-scheduled after their handler raised, by job type",
+    ["job_type"],
+)
+DELAY_QUEUE_DROPPED = Counter(
+    "delay_queue_dropped_total",
+    "Delayed jobs given up on, by job type and reason (failed, no_handler)",
+    ["job_type", "reason"],
+)
+
+TTS_TIME_TO_FIRST_BYTE = Histogram(
+    "tts_time_to_first_byte_seconds",
+    "Time from requesting speech to the first audio byte being available, "
+    "by mode (buffered, streaming)",
+    ["mode"],
+    buckets=LATENCY_BUCKETS,
+)
+TTS_STREAMS = Counter(
+    "tts_streams_total",
+    "TTS stream fetches by how they were served (relayed, stored, failed)",
+    ["result"],
+)
+
+AUDIO_TRANSCODE_DURATION = Histogram(
+    "audio_transcode_duration_seconds",
+    "Time to resample and mu-law encode a TTS asset for telephony",
+    buckets=LATENCY_BUCKETS,
+)
+
+AMD_DECISIONS = Counter(
+    "amd_decisions_total",
+    "Answering-machine detection outcomes by result (human, machine) and reason",
+    ["result", "reason"],
+)
+AMD_DECISION_AUDIO_SECONDS = Histogram(
+    "amd_decision_audio_seconds",
+    "Seconds of call audio analysed before answering-machine detection decided",
+    buckets=(0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 7.5, 10.0),
+)
+MEDIA_STREAM_PROCESSING = Histogram(
+    "media_stream_processing_seconds",
+    "Time to decode and analyse one Twilio media stream message",
+    buckets=LATENCY_BUCKETS,
+)
+
+RECORDING_ANALYSES = Counter(
+    "recording_analyses_total",
+    "Post-call recording analyses by result (ok, failed)",
+    ["result"],
+)
+RECORDING_ANALYSIS_AUDIO_SECONDS = Counter(
+    "recording_analysis_audio_seconds_total",
+    "Seconds of recorded call audio analysed",
+)
+
+DIAL_RACE_CANCELS = Counter(
+    "dial_race_cancels_total",
+    "Parallel dial legs hung up because another leg answered, by result (cancelled, failed)",
+    ["result"],
+)
+DIAL_RACE_CANCEL_SECONDS = Histogram(
+    "dial_race_cancel_seconds",
+    "Time from a parallel dial leg's answer callback to the other legs being hung up",
+    buckets=LATENCY_BUCKETS,
+)
+
+CALL_EVENT_BATCH_ROWS = Histogram(
+    "call_event_batch_rows",
+    "Call events written per INSERT by the event log",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+CALL_EVENT_LAG = Histogram(
+    "call_event_lag_seconds",
+    "Call event lag by stage: delivery (Twilio timestamp to webhook receipt, "
+    "1 s resolution) and write (receipt to commit)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+CALL_RING_SECONDS = Histogram(
+    "call_ring_seconds",
+    "Time answered calls spent ringing",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60),
+)
+CALL_ANSWER_LATENCY = Histogram(
+    "call_answer_latency_seconds",
+    "Time from placing a call to it being answered",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60),
+)
+
+ANALYTICS_EXPORT_ROWS = Counter(
+    "analytics_export_rows_total",
+    "Rows exported to Parquet for analytics, by table",
+    ["table"],
+)
+ANALYTICS_QUERY_DURATION = Histogram(
+    "analytics_query_duration_seconds",
+    "Admin analytics queries over the Parquet export",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+QUERY_CACHE_LOOKUPS = Counter(
+    "query_cache_lookups_total",
+    "Query cache lookups by namespace and result (local, redis, miss, error); "
+    "hit rate is (local + redis) / total",
+    ["namespace", "result"],
+)
+QUERY_CACHE_INVALIDATIONS = Counter(
+    "query_cache_invalidations_total",
+    "Query cache tags bumped by committed writes, by namespace",
+    ["namespace"],
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and status per route template.
+
+    Labels use the matched route path (e.g. /api/v1/calls/{call_id}) rather
+    than the raw URL to keep series cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, path).observe(perf_counter() - start)
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(perf_counter() - start)
+
+
+POOL_GAUGES = {
+    "db_pool_size": "Configured pool size",
+    "db_pool_checked_out": "Connections currently checked out",
+    "db_pool_checked_in": "Idle connections in the pool",
+    "db_pool_overflow": "Connections open beyond pool_size",
+}
+
+
+def pool_values(engine) -> Dict[str, float]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "db_pool_size": pool.size(),
+        "db_pool_checked_out": pool.checkedout(),
+        "db_pool_checked_in": pool.checkedin(),
+        "db_pool_overflow": max(pool.overflow(), 0),
+    }
+
+
+class PoolCollector:
+    """Reads pool occupancy at scrape time, so it costs nothing per request"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def collect(self):
+        for name, value in pool_values(self.engine).items():
+            yield GaugeMetricFamily(name, POOL_GAUGES[name], value=value)
+
+
+# Gauges read from process state at scrape time. The multiprocess collector
+# only sees values written to the shared files, which set_function and
+# custom collectors never write, so there they are sampled into livesum
+# gauges by sample_gauges instead.
+_sampled: List[Tuple[Gauge, Callable[[], float]]] = []
+_pool_gauges: Dict[str, Gauge] = {}
+
+
+def gauge_function(gauge: Gauge, func: Callable[[], float]) -> None:
+    """Gauge.set_function that also works under PROMETHEUS_MULTIPROC_DIR"""
+    if MULTIPROCESS:
+        _sampled.append((gauge, func))
+    else:
+        gauge.set_function(func)
+
+
+def sample_gauges() -> None:
+    for gauge, func in _sampled:
+        gauge.set(func())
+
+
+async def run_gauge_sampler(interval: float = 5.0) -> None:
+    """Keep this worker's sampled gauges current between scrapes (multiprocess only)"""
+    while True:
+        sample_gauges()
+        await asyncio.sleep(interval)
+
+
+def instrument_engine(engine, collect_pool: bool = True) -> None:
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.inc()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.inc()
+
+    if not collect_pool:
+        return
+    if not MULTIPROCESS:
+        REGISTRY.register(PoolCollector(engine))
+        return
+    for name, documentation in POOL_GAUGES.items():
+        if name not in _pool_gauges:
+            # Not in REGISTRY: only the multiprocess files are served
+            _pool_gauges[name] = Gauge(name, documentation, multiprocess_mode="livesum", registry=None)
+        gauge_function(_pool_gauges[name], lambda name=name: pool_values(engine).get(name, 0))
+
+
+def _failed(result) -> bool:
+    # Services swallow provider errors and signal them with None, False
+    # or {'success': False}
+    if result is None or result is False:
+        return True
+    return isinstance(result, dict) and result.get("success") is False
+
+
+def track_provider(provider: str, operation: str) -> Callable:
+    """Decorator recording latency and errors of a provider service method"""
+    def decorator(func: Callable) -> Callable:
+        duration = PROVIDER_REQUEST_DURATION.labels(provider, operation)
+        errors = PROVIDER_ERRORS.labels(provider, operation)
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    duration.observe(perf_counter() - start)
+                if _failed(result):
+                    errors.inc()
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(perf_counter() - start)
+            if _failed(result):
+                errors.inc()
+            return result
+        return wrapper
+    return decorator
+
+
+def render_metrics():
+    """Return (body, content type) for the /metrics endpoint"""
+    if MULTIPROCESS:
+        # gunicorn with several workers: aggregate the per-process files.
+        # Live gauges drop a worker's values once its child_exit hook calls
+        # multiprocess.mark_process_dead(worker.pid)
+        from prometheus_client import multiprocess
+        sample_gauges()
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
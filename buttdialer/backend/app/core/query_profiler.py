@@ -0,0 +1,145 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Iterator, List, Optional, Tuple
+import logging
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+_current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("query_profile", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request or test block issues more queries than allowed"""
+
+
+class QueryProfile:
+    """Statements issued while handling one request (or one test block)"""
+
+    def __init__(self, budget: Optional[int] = None, scope: Optional[dict] = None):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter = Counter()
+        self.budget = budget
+        self.scope = scope
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+
+        budget = self.current_budget()
+        if settings.QUERY_BUDGET_STRICT and budget is not None and self.count > budget:
+            raise QueryBudgetExceeded(
+                f"{self.label()} issued {self.count} queries (budget {budget})"
+            )
+
+    def current_budget(self) -> Optional[int]:
+        if self.budget is not None:
+            return self.budget
+        # The router fills scope["endpoint"] in place before the endpoint runs
+        endpoint = self.scope.get("endpoint") if self.scope else None
+        return getattr(endpoint, "__query_budget__", settings.QUERY_BUDGET_DEFAULT)
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """Identical statements run often enough to look like N+1 lazy loads"""
+        return [
+            (statement, count) for statement, count in self.statements.most_common()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+
+    def label(self) -> str:
+        if not self.scope:
+            return "block"
+        route = self.scope.get("route")
+        return f"{self.scope.get('method')} {route.path if route is not None else self.scope.get('path')}"
+
+
+def max_queries(budget: int) -> Callable:
+    """Declare the query budget of an endpoint (place below the route decorator)"""
+    def decorator(func: Callable) -> Callable:
+        func.__query_budget__ = budget
+        return func
+    return decorator
+
+
+@contextmanager
+def assert_max_queries(budget: int) -> Iterator[QueryProfile]:
+    """Fail if the wrapped block issues more than budget queries (for tests)"""
+    profile = QueryProfile(budget=budget)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+    if profile.count > budget:
+        raise QueryBudgetExceeded(f"block issued {profile.count} queries (budget {budget})")
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement; feed the current profile and the slow-query log"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info["query_start"].pop()
+
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            slow_query_logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {statement}")
+
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, elapsed)
+
+
+class QueryProfilerMiddleware:
+    """Per-request query counting with debug headers and N+1 warnings.
+
+    Adds X-DB-Query-Count, X-DB-Query-Time-Ms and X-DB-N-Plus-One to every
+    response. Enable with QUERY_PROFILER_ENABLED; set QUERY_BUDGET_STRICT in
+    test runs to turn budget overruns into errors.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(scope=scope)
+        token = _current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(profile.count).encode()))
+                headers.append((b"x-db-query-time-ms", f"{profile.total_time * 1000:.2f}".encode()))
+                headers.append((b"x-db-n-plus-one", str(len(profile.repeated())).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            self._report(profile)
+
+    @staticmethod
+    def _report(profile: QueryProfile) -> None:
+        for statement, count in profile.repeated():
+            logger.warning(f"Possible N+1 in {profile.label()}: {count}x {statement}")
+
+        budget = profile.current_budget()
+        if budget is not None and profile.count > budget:
+            logger.warning(f"{profile.label()} issued {profile.count} queries (budget {budget})")
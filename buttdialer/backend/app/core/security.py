@@ -1,10 +1,61 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_WAITING, gauge_function
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost factor than BCRYPT_ROUNDS are flagged for
+# update, so logins transparently migrate them when the setting changes.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are already waiting"""
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated thread pool with admission control.
+    
+    At most PASSWORD_HASH_WORKERS hashes run at once (bcrypt releases the
+    GIL, so the event loop keeps serving other routes). Up to
+    PASSWORD_HASH_MAX_QUEUE more wait their turn; beyond that callers get
+    PasswordHasherBusy instead of piling up.
+    """
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        if self.waiting >= self.max_queue:
+            raise PasswordHasherBusy()
+        
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self._semaphore.release()
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+gauge_function(PASSWORD_HASH_WAITING, lambda: password_hasher.waiting)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -20,4 +71,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def hash_password_async(password: str) -> str:
+    """get_password_hash off the event loop"""
+    return await password_hasher.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; also returns a new hash if the stored one is outdated"""
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,36 @@
+from typing import Any, Iterable, List, Sequence
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Query
+
+
+def model_columns(model, names: Sequence[str] = None) -> List[Any]:
+    """Column attributes of a model, optionally limited to names (e.g. a schema's fields)"""
+    if names is None:
+        names = [column.key for column in model.__table__.columns]
+    return [getattr(model, name) for name in names]
+
+
+def encode_rows(columns: Sequence[str], rows: Iterable[Sequence[Any]], compact: bool = False) -> ORJSONResponse:
+    """Encode result rows as a list of objects, or {"columns", "rows"} when compact"""
+    if compact:
+        content = {"columns": list(columns), "rows": [tuple(row) for row in rows]}
+    else:
+        content = [dict(zip(columns, row)) for row in rows]
+    return ORJSONResponse(content)
+
+
+def model_response(instance) -> ORJSONResponse:
+    """Encode an ORM instance's column values as a JSON object"""
+    return ORJSONResponse({column.key: getattr(instance, column.key) for column in instance.__table__.columns})
+
+
+def rows_response(query: Query, compact: bool = False) -> ORJSONResponse:
+    """Encode a column-only query straight to JSON.
+    
+    Skips ORM identity-map bookkeeping and per-row Pydantic validation. The
+    default shape matches the ORM/response_model output (a list of objects);
+    compact=True returns {"columns": [...], "rows": [[...], ...]}.
+    """
+    columns = [description["name"] for description in query.column_descriptions]
+    return encode_rows(columns, query.all(), compact=compact)
@@ -0,0 +1,115 @@
+from typing import Dict, Iterable, Optional, Tuple
+import math
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch-style) with exact merges.
+
+    Every quantile is within RELATIVE_ACCURACY of a real sample, however many
+    values were added, and merging two sketches gives exactly the sketch of
+    the combined samples. Values <= 0 are counted in a zero bucket.
+    """
+
+    RELATIVE_ACCURACY = 0.01
+    FORMAT_VERSION = 1
+
+    _gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(self):
+        self.zero_count = 0
+        self.buckets: Dict[int, int] = {}
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= 0:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), or None for an empty sketch"""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of (gamma^(i-1), gamma^i] in relative terms
+                return 2 * self._gamma ** index / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.buckets) / (self._gamma + 1)
+
+    def to_bytes(self) -> bytes:
+        """Compact encoding: varint counts and delta-encoded bucket indexes"""
+        out = bytearray([self.FORMAT_VERSION])
+        _write_varint(out, self.zero_count)
+        _write_varint(out, len(self.buckets))
+        previous = 0
+        for index in sorted(self.buckets):
+            _write_varint(out, _zigzag(index - previous))
+            _write_varint(out, self.buckets[index])
+            previous = index
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        sketch = cls()
+        if not data:
+            return sketch
+        if data[0] != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch format {data[0]}")
+        sketch.zero_count, pos = _read_varint(data, 1)
+        size, pos = _read_varint(data, pos)
+        index = 0
+        for _ in range(size):
+            delta, pos = _read_varint(data, pos)
+            count, pos = _read_varint(data, pos)
+            index += _unzigzag(delta)
+            sketch.buckets[index] = count
+        return sketch
+
+    @classmethod
+    def merged(cls, sketches: Iterable["QuantileSketch"]) -> "QuantileSketch":
+        result = cls()
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
@@ -1,6 +1,6 @@
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.team import Team, TeamMember
-from app.models.call import Call, CallRecording
-from app.models.contact import Contact, DNCList
+from app.models.call import Call, CallRecording, CallEvent, CallAudioAnalytics, CallDurationSketch, CallTimingGrid
+from app.models.contact import Contact, DNCList, ContactMerge
 from app.models.campaign import Campaign, CampaignCall
\ No newline at end of file
@@ -0,0 +1,34 @@
+from pathlib import Path
+import logging
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+def expected_heads() -> set:
+    """Revision heads shipped with this build (reads alembic/versions, no DB)"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+def check_schema_version(engine) -> None:
+    """Fail fast unless the database is migrated to this build's head.
+    
+    One lookup of alembic_version instead of inspecting every table as
+    metadata.create_all does.
+    """
+    heads = expected_heads()
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(heads)}. "
+            "Run `alembic upgrade head` (or `alembic stamp head` for a database "
+            "created by an older build with create_all)."
+        )
+    logger.info(f"Database schema at revision {', '.join(sorted(current))}")
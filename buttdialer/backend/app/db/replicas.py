@@ -0,0 +1,189 @@
+from typing import Dict, List, Optional
+import asyncio
+import itertools
+import logging
+import time
+
+import redis
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import DB_READ_ROUTING, DB_REPLICA_LAG
+from app.db.session import ReadSessionLocal, SessionLocal, replica_engines
+
+logger = logging.getLogger(__name__)
+
+# Seconds behind the primary; 0 when fully replayed or not a standby at all
+LAG_QUERY = text("""
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+""")
+
+RECENT_WRITE_KEY = "buttdialer:recent-write:{user_id}"
+
+
+class ReplicaRouter:
+    """Hands out read-only sessions bound to a healthy, caught-up replica.
+    
+    Falls back to the primary when no replica is configured, when every
+    replica is down or lagging past REPLICA_MAX_LAG_SECONDS, and for
+    READ_YOUR_WRITES_SECONDS after the requesting user committed a write.
+    """
+    
+    # After a Redis error, recent-write checks go straight to the primary
+    # for this long instead of waiting on a timeout per request
+    REDIS_RETRY_SECONDS = 5.0
+    
+    def __init__(self, engines: List, max_lag: float, check_interval: float, sticky_seconds: int):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        # None until a health check succeeds
+        self.lag: List[Optional[float]] = [None] * len(engines)
+        self._round_robin = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self._redis: Optional[redis.Redis] = None
+        # Local copy of recent writes, used when Redis is unavailable
+        self._recent_writes: Dict[int, float] = {}
+        self._redis_down_until = 0.0
+    
+    @staticmethod
+    def label(engine) -> str:
+        return f"{engine.url.host}:{engine.url.port or 5432}"
+    
+    def check(self) -> None:
+        """Measure lag on every replica (blocking; run off the event loop)"""
+        for index, engine in enumerate(self.engines):
+            try:
+                with engine.connect() as conn:
+                    lag = float(conn.execute(LAG_QUERY).scalar() or 0)
+            except Exception as e:
+                if self.lag[index] is not None:
+                    logger.warning(f"Replica {self.label(engine)} unavailable: {e}")
+                lag = None
+            else:
+                if lag > self.max_lag:
+                    logger.warning(f"Replica {self.label(engine)} lagging {lag:.1f}s")
+            self.lag[index] = lag
+            DB_REPLICA_LAG.labels(self.label(engine)).set(-1 if lag is None else lag)
+    
+    def available(self) -> List:
+        return [
+            engine for engine, lag in zip(self.engines, self.lag)
+            if lag is not None and lag <= self.max_lag
+        ]
+    
+    def read_session(self, user_id: Optional[int] = None) -> Session:
+        """Session for a read-only request; the primary when a replica is unsafe"""
+        if not self.engines:
+            reason = "no_replicas"
+        elif user_id is not None and self.recently_wrote(user_id):
+            reason = "read_your_writes"
+        else:
+            candidates = self.available()
+            if candidates:
+                engine = candidates[next(self._round_robin) % len(candidates)]
+                DB_READ_ROUTING.labels("replica", "healthy").inc()
+                return ReadSessionLocal(bind=engine)
+            reason = "unhealthy"
+        
+        DB_READ_ROUTING.labels("primary", reason).inc()
+        return SessionLocal()
+    
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+        return self._redis
+    
+    def _redis_failed(self, e: Exception) -> None:
+        # Logged once per outage window rather than on every request
+        if time.monotonic() >= self._redis_down_until:
+            logger.warning(
+                f"Recent-write tracking unavailable, reading from the primary "
+                f"for {self.REDIS_RETRY_SECONDS:.0f}s: {e}"
+            )
+        self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+    
+    def record_write(self, user_id: int) -> None:
+        if not self.engines:
+            return
+        now = time.monotonic()
+        self._recent_writes = {
+            uid: until for uid, until in self._recent_writes.items() if until > now
+        }
+        self._recent_writes[user_id] = now + self.sticky_seconds
+        if now < self._redis_down_until:
+            return
+        try:
+            # Shared so the user's next request sticks to the primary on any API process
+            self._client().set(RECENT_WRITE_KEY.format(user_id=user_id), 1, ex=self.sticky_seconds)
+        except Exception as e:
+            self._redis_failed(e)
+    
+    def recently_wrote(self, user_id: int) -> bool:
+        """Blocking Redis check (at most socket_timeout); get_read_db runs in the threadpool"""
+        now = time.monotonic()
+        if self._recent_writes.get(user_id, 0) > now:
+            return True
+        if now < self._redis_down_until:
+            # Can't tell, so prefer consistency over offloading
+            return True
+        try:
+            return bool(self._client().exists(RECENT_WRITE_KEY.format(user_id=user_id)))
+        except Exception as e:
+            self._redis_failed(e)
+            return True
+    
+    async def start(self) -> None:
+        if not self.engines or self._task is not None:
+            return
+        await asyncio.to_thread(self.check)
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await asyncio.to_thread(self.check)
+            except Exception as e:
+                logger.error(f"Replica health check failed: {e}")
+
+
+replica_router = ReplicaRouter(
+    replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_write(session):
+    # user_id is set by get_current_user on the request's primary session
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        replica_router.record_write(session.info["user_id"])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
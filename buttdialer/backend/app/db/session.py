@@ -1,6 +1,18 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core import metrics, query_profiler
 
-engine = create_engine(str(settings.DATABASE_URL), pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+def create_db_engine(url: str, primary: bool = True):
+    db_engine = create_engine(url, pool_pre_ping=True, poolclass=metrics.TimedQueuePool)
+    # Pool occupancy gauges describe the primary pool only
+    metrics.instrument_engine(db_engine, collect_pool=primary)
+    query_profiler.instrument_engine(db_engine)
+    return db_engine
+
+engine = create_db_engine(str(settings.DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Read replicas; sessions are bound per request by app.db.replicas.replica_router
+replica_engines = [create_db_engine(url, primary=False) for url in settings.DATABASE_REPLICA_URLS]
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
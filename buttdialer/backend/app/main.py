@@ -1,19 +1,51 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
 from app.core.config import settings
+from app.core.metrics import MULTIPROCESS, MetricsMiddleware, render_metrics, run_gauge_sampler
+from app.core.query_profiler import QueryProfilerMiddleware
+from app.core.security import PasswordHasherBusy
 from app.api.v1.api import api_router
 from app.db.base import Base
 from app.db.session import engine
+from app.db.migrations import check_schema_version
+from app.db.replicas import replica_router
+from app.services.call_board import call_board
+from app.services.call_events import call_event_log
+from app.services.delay_queue import delay_queue
+from app.services.query_cache import query_cache
+from app.services.websocket_manager import manager
+from app.services import callback_scheduler  # registers delayed job handlers
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    Base.metadata.create_all(bind=engine)
+    if settings.SCHEMA_AUTO_CREATE:
+        Base.metadata.create_all(bind=engine)
+    else:
+        check_schema_version(engine)
+    await replica_router.start()
+    await delay_queue.start()
+    await call_event_log.start()
+    await manager.start_relay()
+    await call_board.start()
+    await query_cache.start()
+    # Every worker's live gauges must reach the shared files, not only the scraped one's
+    sampler = asyncio.create_task(run_gauge_sampler()) if MULTIPROCESS else None
     yield
     # Shutdown
+    if sampler is not None:
+        sampler.cancel()
+    await query_cache.stop()
+    await call_board.stop()
+    await manager.stop_relay()
+    await call_event_log.stop()
+    await delay_queue.stop()
+    await replica_router.stop()
 
 app = FastAPI(
     title="Buttdialer API",
@@ -30,6 +62,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+if settings.QUERY_PROFILER_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
 
 # Include routers
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -38,5 +81,10 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
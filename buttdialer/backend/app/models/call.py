@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import (
+    BigInteger, Column, Integer, SmallInteger, String, Date, DateTime, Float, ForeignKey, Identity, Index,
+    Text, LargeBinary, UniqueConstraint, text
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -17,11 +20,13 @@ class Call(Base):
     to_number = Column(String(20), nullable=False)
     status = Column(String(20), nullable=False, default="initiated")
     duration = Column(Integer, default=0)  # seconds
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
     answered_at = Column(DateTime)
     ended_at = Column(DateTime)
     notes = Column(Text)
     disposition = Column(String(50))  # interested, not-interested, callback, voicemail
+    answered_by = Column(String(20))  # human, machine (answering-machine detection)
+    dial_group = Column(String(32), index=True)  # shared by the legs of one parallel dial
     
     # Relationships
     agent = relationship("User", back_populates="calls")
@@ -37,8 +42,77 @@ class CallRecording(Base):
     recording_sid = Column(String(100), unique=True)
     recording_url = Column(String(500))
     s3_url = Column(String(500))
+    audio_digest = Column(String(64))  # WAV copy in the audio store
     duration = Column(Integer)  # seconds
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    call = relationship("Call", back_populates="recording")
\ No newline at end of file
+    call = relationship("Call", back_populates="recording")
+
+class CallEvent(Base):
+    """Append-only log of a call's status callbacks, partitioned by month.
+    
+    No foreign key to calls: events outlive archived calls until their
+    partition is dropped (see call_events.drop_partitions_before).
+    """
+    __tablename__ = "call_events"
+    __table_args__ = (
+        Index("ix_call_events_call_id", "call_id", "received_at"),
+        Index("ix_call_events_received_at", "received_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (received_at)"},
+    )
+    
+    id = Column(BigInteger, Identity(), primary_key=True)
+    received_at = Column(DateTime, primary_key=True)  # partition key; when the webhook arrived
+    call_id = Column(Integer, nullable=False)
+    event = Column(SmallInteger, nullable=False)  # index into call_events.EVENTS
+    sequence = Column(Integer)  # Twilio SequenceNumber
+    occurred_at = Column(DateTime, nullable=False)  # Twilio Timestamp, else received_at
+    recorded_at = Column(DateTime, server_default=text("(clock_timestamp() AT TIME ZONE 'utc')"))
+
+class CallAudioAnalytics(Base):
+    """Talk, silence and overtalk measures of a call's recording (see call_analytics)"""
+    __tablename__ = "call_audio_analytics"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(Integer, ForeignKey("calls.id"), nullable=False, index=True)
+    recording_id = Column(Integer, ForeignKey("call_recordings.id"), nullable=False, unique=True)
+    duration_seconds = Column(Float)
+    channels = Column(Integer)
+    speech_seconds = Column(Float)
+    # Per-party measures need a dual-channel recording
+    agent_talk_seconds = Column(Float)
+    contact_talk_seconds = Column(Float)
+    talk_listen_ratio = Column(Float)  # agent talk / contact talk
+    overtalk_seconds = Column(Float)
+    overtalk_pct = Column(Float)  # of the time between first and last speech
+    longest_silence_seconds = Column(Float)
+    dead_air_pct = Column(Float)  # silences of CALL_ANALYTICS_DEAD_AIR_SECONDS or more
+    error = Column(String(500))  # set instead of the measures when analysis failed
+    analyzed_at = Column(DateTime, default=datetime.utcnow)
+
+class CallDurationSketch(Base):
+    """Quantile sketch of one duration metric per day, agent and campaign"""
+    __tablename__ = "call_duration_sketches"
+    __table_args__ = (
+        UniqueConstraint('day', 'agent_id', 'campaign_id', 'metric', name='_sketch_key_uc'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    agent_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    campaign_id = Column(Integer, nullable=False, default=0)  # 0 = no campaign
+    metric = Column(String(20), nullable=False)  # talk, ring
+    count = Column(Integer, nullable=False, default=0)
+    sketch = Column(LargeBinary, nullable=False)  # QuantileSketch.to_bytes()
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CallTimingGrid(Base):
+    """Outbound call outcomes by hour of week for one area code (see call_timing)"""
+    __tablename__ = "call_timing_grids"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    area_code = Column(String(8), nullable=False, unique=True)  # "*" = all calls
+    calls = Column(Integer, nullable=False, default=0)
+    counts = Column(LargeBinary, nullable=False)  # zlib'd uint32 (168 hours, outcomes)
+    built_at = Column(DateTime, default=datetime.utcnow)
@@ -27,6 +27,11 @@ class Campaign(Base):
     team = relationship("Team", back_populates="campaigns")
     calls = relationship("Call", back_populates="campaign")
     campaign_calls = relationship("CampaignCall", back_populates="campaign")
+    
+    @property
+    def attempt_limit(self) -> int:
+        # Dials allowed per lead; shared by the scheduler and the timing ranker
+        return self.max_attempts or 1
 
 class CampaignCall(Base):
     __tablename__ = "campaign_calls"
@@ -38,7 +43,9 @@ class CampaignCall(Base):
     attempts = Column(Integer, default=0)
     last_attempt_at = Column(DateTime)
     scheduled_at = Column(DateTime)
+    audio_digest = Column(String(64))  # audio store digest of the personalized tts_message WAV
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     campaign = relationship("Campaign", back_populates="campaign_calls")
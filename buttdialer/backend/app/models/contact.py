@@ -18,7 +18,7 @@ class Contact(Base):
     custom_fields = Column(JSON)
     is_dnc = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     calls = relationship("Call", back_populates="contact")
@@ -34,4 +34,15 @@ class DNCList(Base):
     added_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    added_by = relationship("User")
\ No newline at end of file
+    added_by = relationship("User")
+
+class ContactMerge(Base):
+    """A contact folded into another by the duplicate-contact job"""
+    __tablename__ = "contact_merges"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    merged_contact_id = Column(Integer, nullable=False, unique=True, index=True)  # deleted contact
+    survivor_id = Column(Integer, nullable=False, index=True)  # may itself be merged later
+    merged_phone_number = Column(String(20))
+    reason = Column(String(50))
+    merged_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,16 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class AnalyticsQuery(BaseModel):
+    sql: str = Field(..., min_length=1, max_length=20000)
+    max_rows: Optional[int] = Field(None, ge=1, le=100000)
+
+class AnalyticsResult(BaseModel):
+    columns: List[str]
+    rows: List[List[Any]]
+    truncated: bool
+
+class AnalyticsExportStatus(BaseModel):
+    table: str
+    watermark: Optional[datetime]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -12,6 +12,7 @@ class CallCreate(CallBase):
 class CallUpdate(BaseModel):
     disposition: Optional[str] = None
     notes: Optional[str] = None
+    callback_at: Optional[datetime] = None  # required with disposition "callback"
 
 class CallResponse(BaseModel):
     id: int
@@ -29,13 +30,70 @@ class CallResponse(BaseModel):
     ended_at: Optional[datetime]
     disposition: Optional[str]
     notes: Optional[str]
+    dial_group: Optional[str] = None
     
     class Config:
         from_attributes = True
 
+class CallAnalytics(BaseModel):
+    call_id: int
+    duration_seconds: Optional[float]
+    channels: Optional[int]
+    speech_seconds: Optional[float]
+    agent_talk_seconds: Optional[float]
+    contact_talk_seconds: Optional[float]
+    talk_listen_ratio: Optional[float]
+    overtalk_seconds: Optional[float]
+    overtalk_pct: Optional[float]
+    longest_silence_seconds: Optional[float]
+    dead_air_pct: Optional[float]
+    error: Optional[str]
+    analyzed_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+class CallEventEntry(BaseModel):
+    event: str
+    sequence: Optional[int]
+    occurred_at: datetime
+    received_at: datetime
+    recorded_at: Optional[datetime]
+
+class CallTimeline(BaseModel):
+    call_id: int
+    events: List[CallEventEntry]
+    ring_seconds: Optional[float]
+    answer_latency_seconds: Optional[float]
+    talk_seconds: Optional[float]
+
+class CallQueued(BaseModel):
+    call_id: int
+    status: str
+    status_url: str
+
 class CallStats(BaseModel):
     total_calls: int
     answered_calls: int
     connect_rate: float
     total_duration: int
-    average_duration: float
\ No newline at end of file
+    average_duration: float
+
+class DurationPercentiles(BaseModel):
+    count: int
+    p50: Optional[float]
+    p90: Optional[float]
+    p99: Optional[float]
+
+class CallPercentiles(BaseModel):
+    talk_time: DurationPercentiles
+    ring_time: DurationPercentiles
+
+class BestTimeGrid(BaseModel):
+    area_code: Optional[str]  # None: all calls
+    calls: int
+    built_at: Optional[datetime]
+    # Indexed by UTC hour of week, Monday 00:00 first
+    connect_rate: List[float]
+    outcome_rates: Dict[str, List[float]]
+    best_hours: List[int]
@@ -0,0 +1,11 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class LeadScore(BaseModel):
+    campaign_call_id: int
+    contact_id: int
+    phone_number: str
+    attempts: int
+    connect_probability: float
+    best_hour_of_week: int  # UTC, Monday 00:00 = 0
+    audio_url: Optional[str] = None  # personalized message, once rendered
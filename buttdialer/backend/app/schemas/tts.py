@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class TTSStreamCreate(BaseModel):
+    text: str = Field(..., min_length=1, max_length=2500)
+    voice_id: str = "21m00Tcm4TlvDq8ikWAM"
+    call_id: Optional[int] = None  # play on this live call as soon as audio starts
+
+class TTSStream(BaseModel):
+    token: str
+    url: str
+    expires_in: int
+
+class TTSPromptCreate(BaseModel):
+    text: str = Field(..., min_length=1, max_length=2500)
+    voice_id: str = "21m00Tcm4TlvDq8ikWAM"
+
+class TTSPrompt(BaseModel):
+    digest: str
+    url: str
+    expires_in: int
@@ -0,0 +1,300 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time as clock, timedelta
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import threading
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import ANALYTICS_EXPORT_ROWS, ANALYTICS_QUERY_DURATION
+from app.db.replicas import LAG_QUERY
+from app.db.session import SessionLocal, replica_engines
+from app.models.call import Call, CallRecording
+from app.models.campaign import CampaignCall
+from app.models.contact import Contact
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    model: Any
+    watermark: str  # column whose values only grow as rows are added or changed
+    settle: bool = False  # wait ANALYTICS_EXPORT_SETTLE_HOURS, for rows that change shortly after insert
+
+
+EXPORTS = {
+    # Calls and recordings have no updated_at; they are exported once settled
+    # (ended and dispositioned), which later edits to old calls miss
+    "calls": ExportTable(Call, "started_at", settle=True),
+    "call_recordings": ExportTable(CallRecording, "created_at", settle=True),
+    "campaign_calls": ExportTable(CampaignCall, "updated_at"),
+    "contacts": ExportTable(Contact, "updated_at"),
+}
+
+EXPORTED_AT = "_exported_at"
+
+
+class QueryError(Exception):
+    pass
+
+
+def _arrow_type(column):
+    import pyarrow as pa
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pa.string()
+    return {
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp("us"),
+        date: pa.date32(),
+        clock: pa.time64("us"),
+        bytes: pa.binary(),
+    }.get(python_type, pa.string())
+
+
+def _arrow_value(value: Any) -> Any:
+    # JSON columns are stored as their JSON text
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class AnalyticsExport:
+    """Incremental Parquet copies of OLTP tables for analysts, and SQL over them.
+
+    Layout: <ANALYTICS_EXPORT_URI>/<table>/month=YYYY-MM/<table>-<run>.parquet
+    (local path or s3://bucket/prefix), partitioned by the month of the
+    table's watermark column, with one JSON watermark per table under
+    _watermarks/. Each run reads rows whose watermark is past the last one,
+    from a read replica when there is one, so changed rows are appended as
+    new versions; the query views keep the latest version of each id.
+    """
+
+    LISTING_TTL_SECONDS = 60
+
+    def __init__(self, uri: Optional[str]):
+        self.uri = uri.rstrip("/") if uri else None
+        self._filesystem = None
+        self._root = None
+        self._datasets: Dict[str, Any] = {}
+        self._datasets_loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.uri is not None
+
+    def _fs(self):
+        if self._filesystem is None:
+            from pyarrow import fs
+            if self.uri.startswith("s3://"):
+                self._filesystem = fs.S3FileSystem(
+                    access_key=settings.AWS_ACCESS_KEY_ID,
+                    secret_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region=settings.AWS_REGION,
+                    endpoint_override=settings.ANALYTICS_EXPORT_S3_ENDPOINT,
+                )
+                self._root = self.uri[len("s3://"):]
+            else:
+                self._filesystem = fs.LocalFileSystem()
+                self._root = self.uri
+                self._filesystem.create_dir(self._root, recursive=True)
+        return self._filesystem
+
+    @staticmethod
+    def schema(name: str):
+        import pyarrow as pa
+        columns = EXPORTS[name].model.__table__.columns
+        return pa.schema(
+            [(column.name, _arrow_type(column)) for column in columns] + [(EXPORTED_AT, pa.timestamp("us"))]
+        )
+
+    # Watermarks
+
+    def _watermark_path(self, name: str) -> str:
+        return f"{self._root}/_watermarks/{name}.json"
+
+    def watermark(self, name: str) -> Optional[datetime]:
+        try:
+            with self._fs().open_input_stream(self._watermark_path(name)) as f:
+                state = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        return datetime.fromisoformat(state["watermark"])
+
+    def _save_watermark(self, name: str, watermark: datetime, rows: int) -> None:
+        filesystem = self._fs()
+        filesystem.create_dir(f"{self._root}/_watermarks", recursive=True)
+        state = {"watermark": watermark.isoformat(), "exported_at": datetime.utcnow().isoformat(), "rows": rows}
+        with filesystem.open_output_stream(self._watermark_path(name)) as f:
+            f.write(json.dumps(state).encode())
+
+    # Export
+
+    @staticmethod
+    def _source() -> Tuple[Session, float]:
+        """A session on the first replica if there is one, and its replication lag"""
+        if not replica_engines:
+            return SessionLocal(), 0.0
+        db = Session(bind=replica_engines[0])
+        return db, float(db.execute(LAG_QUERY).scalar() or 0)
+
+    def export_table(self, name: str, batch_size: int = None) -> int:
+        """Append rows changed since the table's watermark; returns the row count"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = EXPORTS[name]
+        batch_size = batch_size or settings.ANALYTICS_EXPORT_BATCH_SIZE
+        previous = self.watermark(name)
+        run = datetime.utcnow()
+        schema = self.schema(name)
+        columns = list(table.model.__table__.columns)
+        watermark = getattr(table.model, table.watermark)
+        filesystem = self._fs()
+        writers: Dict[str, Any] = {}
+        rows = 0
+
+        db, lag = self._source()
+        try:
+            # Leave time for transactions that stamped rows before committing,
+            # and for the replica to replay them
+            upper = run - timedelta(seconds=settings.ANALYTICS_EXPORT_SAFETY_SECONDS + lag)
+            if table.settle:
+                upper -= timedelta(hours=settings.ANALYTICS_EXPORT_SETTLE_HOURS)
+            if previous is not None and upper <= previous:
+                return 0
+
+            query = db.query(*columns)
+            if previous is None:
+                # First run: everything so far, rows never stamped included
+                query = query.filter(or_(watermark <= upper, watermark.is_(None)))
+            else:
+                query = query.filter(watermark > previous, watermark <= upper)
+
+            def flush(batch: List[Any]) -> None:
+                by_month: Dict[str, List[dict]] = {}
+                for row in batch:
+                    stamp = getattr(row, table.watermark) or getattr(row, "created_at", None) or run
+                    record = {column.name: _arrow_value(value) for column, value in zip(columns, row)}
+                    record[EXPORTED_AT] = run
+                    by_month.setdefault(stamp.strftime("%Y-%m"), []).append(record)
+                for month, records in by_month.items():
+                    writer = writers.get(month)
+                    if writer is None:
+                        directory = f"{self._root}/{name}/month={month}"
+                        filesystem.create_dir(directory, recursive=True)
+                        writer = writers[month] = pq.ParquetWriter(
+                            f"{directory}/{name}-{run:%Y%m%dT%H%M%S}.parquet", schema,
+                            filesystem=filesystem, compression="zstd"
+                        )
+                    writer.write_table(pa.Table.from_pylist(records, schema=schema))
+
+            batch = []
+            for row in query.order_by(watermark).yield_per(batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+                rows += len(batch)
+        finally:
+            db.close()
+            for writer in writers.values():
+                writer.close()
+
+        # Only after the files are complete: a failed run is redone from the
+        # old watermark, and the duplicates it leaves are collapsed by the views
+        self._save_watermark(name, upper, rows)
+        ANALYTICS_EXPORT_ROWS.labels(name).inc(rows)
+        self._datasets_loaded_at = float("-inf")
+        return rows
+
+    def export_all(self) -> Dict[str, int]:
+        if not self.enabled:
+            logger.info("ANALYTICS_EXPORT_URI not set, skipping analytics export")
+            return {}
+        exported = {}
+        for name in EXPORTS:
+            exported[name] = self.export_table(name)
+            logger.info(f"Analytics export: {exported[name]} {name} rows")
+        return exported
+
+    # Query
+
+    def _load_datasets(self) -> Dict[str, Any]:
+        """Arrow datasets over each table's files, re-listed at most once a minute"""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        with self._lock:
+            if monotonic() - self._datasets_loaded_at < self.LISTING_TTL_SECONDS:
+                return self._datasets
+            filesystem = self._fs()
+            datasets = {}
+            for name in EXPORTS:
+                directory = f"{self._root}/{name}"
+                if filesystem.get_file_info(directory).type != fs.FileType.Directory:
+                    continue
+                partitioning = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+                # An explicit schema lines up files written before a column was added
+                datasets[name] = ds.dataset(
+                    directory, format="parquet", filesystem=filesystem, partitioning=partitioning,
+                    schema=self.schema(name).append(pa.field("month", pa.string())),
+                )
+            self._datasets, self._datasets_loaded_at = datasets, monotonic()
+            return datasets
+
+    def query(self, sql: str, max_rows: int = None) -> Tuple[List[str], List[tuple], bool]:
+        """Run SQL over the exported tables; (columns, rows, truncated).
+
+        Each table is a view of the latest version of every row, with all
+        versions in <table>_versions. The in-memory DuckDB sees the files
+        only through registered Arrow datasets and runs with external
+        access disabled, so SQL can't read or write other files, attach
+        databases or load extensions.
+        """
+        import duckdb
+
+        max_rows = max_rows or settings.ANALYTICS_QUERY_MAX_ROWS
+        conn = duckdb.connect(config={
+            "enable_external_access": False,
+            "memory_limit": settings.ANALYTICS_QUERY_MEMORY_LIMIT,
+            "threads": settings.ANALYTICS_QUERY_THREADS,
+        })
+        timer = threading.Timer(settings.ANALYTICS_QUERY_TIMEOUT_SECONDS, conn.interrupt)
+        started = monotonic()
+        try:
+            for name, dataset in self._load_datasets().items():
+                conn.register(f"{name}_versions", dataset)
+                conn.execute(
+                    f"CREATE VIEW {name} AS SELECT * EXCLUDE ({EXPORTED_AT}) FROM {name}_versions "
+                    f"QUALIFY row_number() OVER (PARTITION BY id ORDER BY {EXPORTED_AT} DESC) = 1"
+                )
+            timer.start()
+            try:
+                cursor = conn.execute(sql)
+                if cursor.description is None:
+                    return [], [], False
+                rows = cursor.fetchmany(max_rows + 1)
+            except duckdb.Error as e:
+                raise QueryError(str(e)) from e
+            return [column[0] for column in cursor.description], rows[:max_rows], len(rows) > max_rows
+        finally:
+            timer.cancel()
+            conn.close()
+            ANALYTICS_QUERY_DURATION.observe(monotonic() - started)
+
+
+analytics_export = AnalyticsExport(settings.ANALYTICS_EXPORT_URI)
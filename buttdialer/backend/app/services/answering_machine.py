@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+import asyncio
+import base64
+import logging
+
+import numpy as np
+
+from app.core.audio import TELEPHONY_RATE, mulaw_decode
+from app.core.config import settings
+from app.core.metrics import AMD_DECISION_AUDIO_SECONDS, AMD_DECISIONS, MEDIA_STREAM_PROCESSING
+from app.db.session import SessionLocal
+from app.models.call import Call
+from app.services.dial_race import dial_race
+from app.services.twilio_service import twilio_service
+from app.services.websocket_manager import publish_call_update
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 10
+FRAME_SAMPLES = TELEPHONY_RATE * FRAME_MS // 1000
+
+
+@dataclass(frozen=True)
+class AMDConfig:
+    """Detection thresholds; the defaults follow Asterisk's AMD() application"""
+    silence_threshold_dbfs: float = -42.0
+    initial_silence_ms: int = 2500
+    greeting_ms: int = 1500
+    after_greeting_silence_ms: int = 800
+    total_analysis_ms: int = 5000
+    min_word_ms: int = 100
+    between_words_silence_ms: int = 50
+    max_words: int = 3
+
+    @classmethod
+    def from_settings(cls) -> "AMDConfig":
+        return cls(
+            silence_threshold_dbfs=settings.AMD_SILENCE_THRESHOLD_DBFS,
+            initial_silence_ms=settings.AMD_INITIAL_SILENCE_MS,
+            greeting_ms=settings.AMD_GREETING_MS,
+            after_greeting_silence_ms=settings.AMD_AFTER_GREETING_SILENCE_MS,
+            total_analysis_ms=settings.AMD_TOTAL_ANALYSIS_MS,
+            min_word_ms=settings.AMD_MIN_WORD_MS,
+            between_words_silence_ms=settings.AMD_BETWEEN_WORDS_SILENCE_MS,
+            max_words=settings.AMD_MAX_WORDS,
+        )
+
+
+def frame_levels(samples: np.ndarray) -> np.ndarray:
+    """RMS level in dBFS of each whole FRAME_MS frame of int16 samples"""
+    frames = samples[:len(samples) // FRAME_SAMPLES * FRAME_SAMPLES].reshape(-1, FRAME_SAMPLES)
+    power = np.mean(np.square(frames, dtype=np.float32), axis=1) / (32768.0 ** 2)
+    return 10 * np.log10(np.maximum(power, 1e-10))
+
+
+def words(voiced: np.ndarray, config: AMDConfig) -> np.ndarray:
+    """(start, end) frame of each word: voiced runs joined across short gaps, short blips dropped"""
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    runs = np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+    if len(runs) > 1:
+        gaps = runs[1:, 0] - runs[:-1, 1]
+        joined = np.concatenate(([True], gaps * FRAME_MS > config.between_words_silence_ms))
+        runs = np.column_stack((runs[joined, 0], np.maximum.reduceat(runs[:, 1], np.flatnonzero(joined))))
+    if len(runs):
+        runs = runs[(runs[:, 1] - runs[:, 0]) * FRAME_MS >= config.min_word_ms]
+    return runs
+
+
+def classify(voiced: np.ndarray, config: AMDConfig) -> Optional[Tuple[str, str]]:
+    """("human" | "machine", reason) once the frames so far decide it, else None"""
+    elapsed_ms = len(voiced) * FRAME_MS
+    spoken = words(voiced, config)
+
+    if not len(spoken):
+        if elapsed_ms >= config.initial_silence_ms:
+            return "machine", "initial_silence"
+        return None
+
+    if len(spoken) > config.max_words:
+        return "machine", "max_words"
+    greeting_ms = (spoken[-1, 1] - spoken[0, 0]) * FRAME_MS
+    if greeting_ms >= config.greeting_ms:
+        return "machine", "long_greeting"
+    if (len(voiced) - spoken[-1, 1]) * FRAME_MS >= config.after_greeting_silence_ms:
+        return "human", "short_greeting"
+    if elapsed_ms >= config.total_analysis_ms:
+        # Undecided: put the call through rather than drop a live person
+        return "human", "timeout"
+    return None
+
+
+class AnsweringMachineDetector:
+    """Energy-based voice activity and answering-machine detection for one stream.
+
+    Media payloads (base64 mu-law, 8 kHz) are decoded with a table lookup
+    and cut into 10 ms frames whose levels are computed per message as
+    arrays; the decision re-runs run-length analysis over the frames so far,
+    which stays cheap because analysis stops after total_analysis_ms.
+    """
+
+    def __init__(self, config: AMDConfig):
+        self.config = config
+        self.voiced = np.zeros(config.total_analysis_ms // FRAME_MS + 1, dtype=bool)
+        self.frames = 0
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self.decision: Optional[Tuple[str, str]] = None
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.frames * FRAME_MS / 1000
+
+    def feed(self, samples: np.ndarray) -> Optional[Tuple[str, str]]:
+        if self.decision is not None:
+            return self.decision
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+        whole = len(samples) // FRAME_SAMPLES * FRAME_SAMPLES
+        self._remainder = samples[whole:]
+
+        levels = frame_levels(samples[:whole])
+        count = min(len(levels), len(self.voiced) - self.frames)
+        self.voiced[self.frames:self.frames + count] = levels[:count] > self.config.silence_threshold_dbfs
+        self.frames += count
+        self.decision = classify(self.voiced[:self.frames], self.config)
+        return self.decision
+
+    def feed_payload(self, payload: str) -> Optional[Tuple[str, str]]:
+        return self.feed(mulaw_decode(base64.b64decode(payload)))
+
+
+class MediaStreamSession:
+    """One Twilio Media Streams connection running answering-machine detection"""
+
+    def __init__(self, config: AMDConfig):
+        self.detector = AnsweringMachineDetector(config)
+        self.call_sid: Optional[str] = None
+        self.stream_sid: Optional[str] = None
+        self.parameters: Dict[str, str] = {}
+
+    def handle(self, message: dict) -> Optional[Tuple[str, str]]:
+        """Process one stream message; returns the decision when it is made"""
+        event = message.get("event")
+        if event == "start":
+            self.call_sid = message["start"].get("callSid")
+            self.stream_sid = message["start"].get("streamSid")
+            self.parameters = message["start"].get("customParameters") or {}
+            return None
+        if event != "media" or message["media"].get("track", "inbound") != "inbound":
+            return None
+
+        started = perf_counter()
+        decision = self.detector.feed_payload(message["media"]["payload"])
+        MEDIA_STREAM_PROCESSING.observe(perf_counter() - started)
+        return decision
+
+
+def _record_decision(call_sid: str, answered_by: str) -> Optional[Tuple[int, int]]:
+    """Store the decision on the call; returns (call id, agent id) if the call is known"""
+    db = SessionLocal()
+    try:
+        call = db.query(Call).filter(Call.twilio_call_sid == call_sid).first()
+        if not call:
+            return None
+        call.answered_by = answered_by
+        known = call.id, call.agent_id
+        db.commit()
+        return known
+    finally:
+        db.close()
+
+
+async def apply_decision(call_sid: str, decision: Tuple[str, str], audio_seconds: float) -> None:
+    """Act on a decision: bridge the agent for a person, hang up on a machine"""
+    answered_by, reason = decision
+    AMD_DECISIONS.labels(answered_by, reason).inc()
+    AMD_DECISION_AUDIO_SECONDS.observe(audio_seconds)
+    logger.info(f"AMD for {call_sid}: {answered_by} ({reason}) after {audio_seconds:.2f}s of audio")
+
+    known = await asyncio.to_thread(_record_decision, call_sid, answered_by)
+    if known is None:
+        logger.warning(f"AMD decision for unknown call {call_sid}")
+        return
+    call_id, agent_id = known
+
+    if answered_by == "human":
+        # In a parallel dial only the first leg found to be a person gets the agent
+        if await dial_race.on_human(call_sid):
+            await asyncio.to_thread(twilio_service.connect_agent, call_sid, agent_id)
+        else:
+            logger.info(f"{call_sid} lost its dial group to another leg")
+    elif settings.AMD_HANGUP_ON_MACHINE:
+        await asyncio.to_thread(twilio_service.end_call, call_sid)
+    await asyncio.to_thread(
+        publish_call_update,
+        {"id": call_id, "twilio_call_sid": call_sid, "answered_by": answered_by, "amd_reason": reason},
+        agent_id,
+    )
+
+
+amd_config = AMDConfig.from_settings()
@@ -0,0 +1,182 @@
+from threading import Lock
+from typing import Optional, Tuple
+import hashlib
+import hmac
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+}
+
+DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AudioStore:
+    """Content-addressed audio files on a local path or s3://bucket/prefix.
+
+    Assets are named by the SHA-256 of their bytes, <digest[:2]>/<digest>.<ext>,
+    so storing the same audio twice is a no-op and a URL always means the
+    same bytes (which makes the digest a strong ETag). Assets are always
+    served from local disk: an S3 store keeps a read-through copy of what it
+    serves under cache_dir.
+    """
+
+    def __init__(self, uri: str, cache_dir: str):
+        self.uri = uri.rstrip("/")
+        self.cache_dir = cache_dir
+        self._filesystem = None
+        self._root = None
+        # Striped so concurrent first fetches of one S3 asset download it once
+        self._locks = [Lock() for _ in range(64)]
+
+    @property
+    def is_s3(self) -> bool:
+        return self.uri.startswith("s3://")
+
+    @property
+    def local_root(self) -> str:
+        return self.cache_dir if self.is_s3 else self.uri
+
+    def _fs(self):
+        if self._filesystem is None:
+            from pyarrow import fs
+            self._filesystem = fs.S3FileSystem(
+                access_key=settings.AWS_ACCESS_KEY_ID,
+                secret_key=settings.AWS_SECRET_ACCESS_KEY,
+                region=settings.AWS_REGION,
+                endpoint_override=settings.AUDIO_STORE_S3_ENDPOINT,
+            )
+            self._root = self.uri[len("s3://"):]
+        return self._filesystem
+
+    @staticmethod
+    def valid(digest: str, extension: str) -> bool:
+        return bool(DIGEST.match(digest)) and extension in CONTENT_TYPES
+
+    @staticmethod
+    def _name(digest: str, extension: str) -> str:
+        return f"{digest[:2]}/{digest}.{extension}"
+
+    def _local(self, digest: str, extension: str) -> str:
+        return os.path.join(self.local_root, self._name(digest, extension))
+
+    # Writing
+
+    def staging_file(self) -> str:
+        """Path for writing a new asset, on the same filesystem as the store"""
+        directory = os.path.join(self.local_root, "tmp")
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=directory, suffix=".partial")
+        os.close(fd)
+        return path
+
+    def put_file(self, path: str, extension: str, digest: Optional[str] = None) -> str:
+        """Move a finished staging file into the store; returns its digest"""
+        digest = digest or hash_file(path)
+        local = self._local(digest, extension)
+        if os.path.exists(local):
+            os.remove(path)
+            return digest
+
+        if self.is_s3:
+            with open(path, "rb") as source, \
+                    self._fs().open_output_stream(f"{self._root}/{self._name(digest, extension)}") as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        os.replace(path, local)
+        return digest
+
+    def put(self, data: bytes, extension: str) -> str:
+        path = self.staging_file()
+        with open(path, "wb") as f:
+            f.write(data)
+        return self.put_file(path, extension, hashlib.sha256(data).hexdigest())
+
+    def fetch(self, url: str, extension: str, auth: Optional[Tuple[str, str]] = None) -> str:
+        """Download a URL into the store, hashing as it streams; returns the digest"""
+        path = self.staging_file()
+        digest = hashlib.sha256()
+        try:
+            with open(path, "wb") as f, httpx.stream("GET", url, auth=auth, timeout=30.0,
+                                                     follow_redirects=True) as response:
+                response.raise_for_status()
+                for block in response.iter_bytes(1024 * 1024):
+                    digest.update(block)
+                    f.write(block)
+        except Exception:
+            os.remove(path)
+            raise
+        return self.put_file(path, extension, digest.hexdigest())
+
+    # Reading
+
+    def cached_path(self, digest: str, extension: str) -> Optional[str]:
+        """Local path of an asset if it is on this node's disk (a stat, no download)"""
+        local = self._local(digest, extension)
+        return local if os.path.exists(local) else None
+
+    def path(self, digest: str, extension: str) -> Optional[str]:
+        """Local path of an asset, downloading it from S3 on first use"""
+        local = self.cached_path(digest, extension)
+        if local is not None or not self.is_s3:
+            return local
+
+        with self._locks[int(digest[:4], 16) % len(self._locks)]:
+            local = self.cached_path(digest, extension)
+            if local is not None:
+                return local
+            path = self.staging_file()
+            try:
+                with self._fs().open_input_stream(f"{self._root}/{self._name(digest, extension)}") as source, \
+                        open(path, "wb") as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+            except FileNotFoundError:
+                os.remove(path)
+                return None
+            local = self._local(digest, extension)
+            os.makedirs(os.path.dirname(local), exist_ok=True)
+            os.replace(path, local)
+            return local
+
+    # Signed URLs (Twilio can't send credentials when it fetches <Play> audio)
+
+    @staticmethod
+    def signature(digest: str, extension: str, expires: int) -> str:
+        message = f"{digest}.{extension}:{expires}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+    def signed_url(self, digest: str, extension: str, ttl_seconds: int = None) -> str:
+        expires = int(time.time()) + (ttl_seconds or settings.AUDIO_URL_TTL_SECONDS)
+        signature = self.signature(digest, extension, expires)
+        return (
+            f"{settings.TWILIO_WEBHOOK_BASE_URL}{settings.API_V1_STR}/audio/{digest}.{extension}"
+            f"?expires={expires}&signature={signature}"
+        )
+
+    def verify(self, digest: str, extension: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self.signature(digest, extension, expires), signature)
+
+
+audio_store = AudioStore(settings.AUDIO_STORE_URI, settings.AUDIO_CACHE_DIR)
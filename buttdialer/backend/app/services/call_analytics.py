@@ -0,0 +1,228 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+
+from app.core.audio import read_wav
+from app.core.config import settings
+from app.core.metrics import RECORDING_ANALYSES, RECORDING_ANALYSIS_AUDIO_SECONDS
+from app.db.session import SessionLocal
+from app.models.call import CallAudioAnalytics, CallRecording
+from app.services.audio_store import audio_store
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 20
+BLOCK_FRAMES = 3000  # frames converted to float at a time (a minute of audio)
+MIN_SPEECH_MS = 100  # shorter bursts are clicks and line noise
+MAX_PAUSE_MS = 300  # shorter gaps are pauses inside a phrase, not silence
+
+
+@dataclass(frozen=True)
+class AnalyticsConfig:
+    silence_threshold_dbfs: float = -45.0
+    dead_air_seconds: float = 3.0
+    agent_channel: int = 1
+
+    @classmethod
+    def from_settings(cls) -> "AnalyticsConfig":
+        return cls(
+            silence_threshold_dbfs=settings.CALL_ANALYTICS_SILENCE_DBFS,
+            dead_air_seconds=settings.CALL_ANALYTICS_DEAD_AIR_SECONDS,
+            agent_channel=settings.RECORDING_AGENT_CHANNEL,
+        )
+
+
+def frame_levels(samples: np.ndarray, rate: int) -> np.ndarray:
+    """RMS level in dBFS of each FRAME_MS frame, shaped (frames, channels).
+
+    `samples` is int16 shaped (samples, channels) and may be a memmap; it is
+    converted a block at a time so a long call never exists as floats whole.
+    """
+    frame = rate * FRAME_MS // 1000
+    count = len(samples) // frame
+    channels = samples.shape[1]
+    levels = np.empty((count, channels), dtype=np.float32)
+    for start in range(0, count, BLOCK_FRAMES):
+        stop = min(start + BLOCK_FRAMES, count)
+        block = np.asarray(samples[start * frame:stop * frame], dtype=np.float32).reshape(-1, frame, channels)
+        power = np.einsum("ijk,ijk->ik", block, block) / (frame * 32768.0 ** 2)
+        levels[start:stop] = 10 * np.log10(np.maximum(power, 1e-10))
+    return levels
+
+
+def runs(mask: np.ndarray) -> np.ndarray:
+    """(start, end) index pairs of the True runs of a 1-D mask"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def speech(levels: np.ndarray, threshold_dbfs: float) -> np.ndarray:
+    """Voice activity of one channel: pauses inside phrases bridged, blips dropped"""
+    voiced = levels > threshold_dbfs
+    gaps = runs(~voiced)
+    if len(gaps):
+        # Only gaps between two voiced frames are pauses
+        inner = gaps[(gaps[:, 0] > 0) & (gaps[:, 1] < len(voiced))]
+        short = inner[(inner[:, 1] - inner[:, 0]) * FRAME_MS < MAX_PAUSE_MS]
+        fill = np.zeros(len(voiced) + 1, dtype=np.int32)
+        np.add.at(fill, short[:, 0], 1)
+        np.add.at(fill, short[:, 1], -1)
+        voiced |= np.cumsum(fill[:-1]) > 0
+    bursts = runs(voiced)
+    blips = bursts[(bursts[:, 1] - bursts[:, 0]) * FRAME_MS < MIN_SPEECH_MS]
+    if len(blips):
+        clear = np.zeros(len(voiced) + 1, dtype=np.int32)
+        np.add.at(clear, blips[:, 0], 1)
+        np.add.at(clear, blips[:, 1], -1)
+        voiced &= np.cumsum(clear[:-1]) == 0
+    return voiced
+
+
+def seconds(frames) -> float:
+    return round(float(frames) * FRAME_MS / 1000, 2)
+
+
+def analyze(samples: np.ndarray, rate: int, config: AnalyticsConfig) -> Dict[str, Optional[float]]:
+    """Talk, silence and overtalk measures of one recording.
+
+    Dual-channel recordings give per-party talk time, the talk/listen ratio
+    and overtalk; mono ones only the silence measures. Silence is measured
+    between the first and last speech, so ringing and the hangup tail are
+    not dead air.
+    """
+    levels = frame_levels(samples, rate)
+    active = np.column_stack([speech(levels[:, c], config.silence_threshold_dbfs) for c in range(levels.shape[1])])
+    anyone = active.any(axis=1)
+    result = {
+        "duration_seconds": seconds(len(levels)),
+        "channels": int(levels.shape[1]),
+        "speech_seconds": seconds(anyone.sum()),
+        "agent_talk_seconds": None,
+        "contact_talk_seconds": None,
+        "talk_listen_ratio": None,
+        "overtalk_seconds": None,
+        "overtalk_pct": None,
+        "longest_silence_seconds": 0.0,
+        "dead_air_pct": 0.0,
+    }
+    if not anyone.any():
+        return result
+
+    spoken = np.flatnonzero(anyone)
+    conversation = anyone[spoken[0]:spoken[-1] + 1]
+    silences = runs(~conversation)
+    lengths = silences[:, 1] - silences[:, 0]
+    if len(lengths):
+        result["longest_silence_seconds"] = seconds(lengths.max())
+        dead = lengths[lengths * FRAME_MS >= config.dead_air_seconds * 1000].sum()
+        result["dead_air_pct"] = round(100.0 * float(dead) / len(conversation), 2)
+
+    if active.shape[1] >= 2:
+        agent = active[:, config.agent_channel]
+        contact = active[:, 1 - config.agent_channel]
+        overtalk = (agent & contact)[spoken[0]:spoken[-1] + 1].sum()
+        result.update(
+            agent_talk_seconds=seconds(agent.sum()),
+            contact_talk_seconds=seconds(contact.sum()),
+            talk_listen_ratio=round(float(agent.sum()) / float(contact.sum()), 3) if contact.any() else None,
+            overtalk_seconds=seconds(overtalk),
+            overtalk_pct=round(100.0 * float(overtalk) / len(conversation), 2),
+        )
+    return result
+
+
+def analyze_file(path: str, config: AnalyticsConfig) -> Dict[str, Optional[float]]:
+    samples, rate = read_wav(path)
+    return analyze(samples, rate, config)
+
+
+def _analyze_recording(job: Tuple[int, int, str, AnalyticsConfig]) -> Tuple[int, int, Optional[dict], Optional[str]]:
+    """Pool worker: (recording id, call id, metrics or None, error or None)"""
+    recording_id, call_id, digest, config = job
+    try:
+        path = audio_store.path(digest, "wav")
+        if path is None:
+            return recording_id, call_id, None, "recording missing from the audio store"
+        return recording_id, call_id, analyze_file(path, config), None
+    except Exception as e:
+        return recording_id, call_id, None, str(e)[:500]
+
+
+def _save(rows: List[CallAudioAnalytics]) -> int:
+    db = SessionLocal()
+    try:
+        db.add_all(rows)
+        db.commit()
+        return len(rows)
+    except IntegrityError:
+        # Another run analysed some of these; keep the ones it didn't
+        db.rollback()
+        saved = 0
+        for row in rows:
+            try:
+                db.add(row)
+                db.commit()
+                saved += 1
+            except IntegrityError:
+                db.rollback()
+        return saved
+    finally:
+        db.close()
+
+
+def analyze_pending(limit: int = None, workers: int = None, flush_every: int = 200) -> Dict[str, int]:
+    """Analyse stored recordings that have no analytics row yet.
+
+    Recordings are fanned out over a process pool (the work is CPU-bound
+    NumPy on memory-mapped WAVs) and results are written in batches as they
+    come back. Recordings that fail get a row with the error, so they are
+    not retried on every run.
+    """
+    limit = limit or settings.CALL_ANALYTICS_BATCH_SIZE
+    config = AnalyticsConfig.from_settings()
+    db = SessionLocal()
+    try:
+        jobs = [
+            (row.id, row.call_id, row.audio_digest, config)
+            for row in db.query(CallRecording.id, CallRecording.call_id, CallRecording.audio_digest)
+            .outerjoin(CallAudioAnalytics, CallAudioAnalytics.recording_id == CallRecording.id)
+            .filter(CallRecording.audio_digest.isnot(None), CallAudioAnalytics.id.is_(None))
+            .order_by(CallRecording.id)
+            .limit(limit)
+        ]
+    finally:
+        db.close()
+
+    summary = {"analyzed": 0, "failed": 0, "saved": 0}
+    if not jobs:
+        return summary
+
+    pending: List[CallAudioAnalytics] = []
+    workers = workers or settings.CALL_ANALYTICS_WORKERS
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for recording_id, call_id, metrics, error in pool.map(_analyze_recording, jobs, chunksize=4):
+            if error is None:
+                summary["analyzed"] += 1
+                RECORDING_ANALYSES.labels("ok").inc()
+                RECORDING_ANALYSIS_AUDIO_SECONDS.inc(metrics["duration_seconds"])
+            else:
+                summary["failed"] += 1
+                RECORDING_ANALYSES.labels("failed").inc()
+                logger.warning(f"Recording {recording_id} analysis failed: {error}")
+            pending.append(CallAudioAnalytics(
+                call_id=call_id, recording_id=recording_id, error=error,
+                analyzed_at=datetime.utcnow(), **(metrics or {})
+            ))
+            if len(pending) >= flush_every:
+                summary["saved"] += _save(pending)
+                pending = []
+    if pending:
+        summary["saved"] += _save(pending)
+
+    logger.info(f"Recording analytics finished: {summary}")
+    return summary
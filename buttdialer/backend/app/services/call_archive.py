@@ -0,0 +1,317 @@
+from datetime import date, datetime, time, timedelta
+from time import monotonic
+from typing import Any, List, Optional, Sequence, Tuple
+import logging
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.call import Call, CallAudioAnalytics, CallRecording
+
+logger = logging.getLogger(__name__)
+
+# Archived row layout: one row per call, with its recordings' metadata nested
+# in a list column so both can leave Postgres together (call_recordings
+# references calls)
+CALL_FIELDS = [
+    "id", "twilio_call_sid", "agent_id", "contact_id", "campaign_id", "direction",
+    "from_number", "to_number", "status", "duration", "started_at", "answered_at",
+    "ended_at", "notes", "disposition", "answered_by", "dial_group",
+]
+RECORDING_FIELDS = {
+    "recording_sid": CallRecording.recording_sid,
+    "recording_url": CallRecording.recording_url,
+    "s3_url": CallRecording.s3_url,
+    "duration": CallRecording.duration,
+    "audio_digest": CallRecording.audio_digest,
+}
+
+
+def _archive_schema():
+    import pyarrow as pa
+    # Explicit types so files whose batch happens to be all-NULL in a column
+    # still line up with the rest of the archive
+    timestamp, text, integer = pa.timestamp("us"), pa.string(), pa.int64()
+    recording = pa.struct([
+        ("recording_sid", text), ("recording_url", text), ("s3_url", text),
+        ("duration", integer), ("audio_digest", text),
+    ])
+    return pa.schema([
+        ("id", integer), ("twilio_call_sid", text), ("agent_id", integer),
+        ("contact_id", integer), ("campaign_id", integer), ("direction", text),
+        ("from_number", text), ("to_number", text), ("status", text),
+        ("duration", integer), ("started_at", timestamp), ("answered_at", timestamp),
+        ("ended_at", timestamp), ("notes", text), ("disposition", text), ("answered_by", text),
+        ("dial_group", text),
+        ("recordings", pa.list_(recording)),
+    ])
+
+
+def _month_start(month: str) -> datetime:
+    return datetime.strptime(month, "%Y-%m")
+
+
+def _next_month(start: datetime) -> datetime:
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _as_datetime(value: Optional[date]) -> Optional[datetime]:
+    # Endpoints compare started_at with a date, i.e. midnight of that day
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+
+class CallArchive:
+    """Cold storage for old calls as zstd Parquet files, one directory per month.
+
+    Layout: <CALL_ARCHIVE_URI>/month=YYYY-MM/calls-<first id>-<last id>.parquet
+    on a local path or s3://bucket/prefix. Archived calls are queried with
+    DuckDB so history and stats endpoints can read through to them.
+    """
+
+    LISTING_TTL_SECONDS = 60
+
+    def __init__(self, uri: Optional[str]):
+        self.uri = uri.rstrip("/") if uri else None
+        self._filesystem = None
+        self._root = None
+        self._months: List[str] = []
+        self._months_checked_at = float("-inf")
+
+    @property
+    def enabled(self) -> bool:
+        return self.uri is not None
+
+    @property
+    def is_s3(self) -> bool:
+        return self.uri is not None and self.uri.startswith("s3://")
+
+    # Storage
+
+    def _fs(self):
+        if self._filesystem is None:
+            from pyarrow import fs
+            if self.is_s3:
+                self._filesystem = fs.S3FileSystem(
+                    access_key=settings.AWS_ACCESS_KEY_ID,
+                    secret_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region=settings.AWS_REGION,
+                    endpoint_override=settings.CALL_ARCHIVE_S3_ENDPOINT,
+                )
+                self._root = self.uri[len("s3://"):]
+            else:
+                self._filesystem = fs.LocalFileSystem()
+                self._root = self.uri
+                self._filesystem.create_dir(self._root, recursive=True)
+        return self._filesystem
+
+    def months(self) -> List[str]:
+        """Archived months (YYYY-MM), from a listing cached for a minute"""
+        if not self.enabled:
+            return []
+        if monotonic() - self._months_checked_at < self.LISTING_TTL_SECONDS:
+            return self._months
+
+        from pyarrow import fs
+        try:
+            entries = self._fs().get_file_info(fs.FileSelector(self._root, allow_not_found=True))
+            self._months = sorted(
+                entry.base_name[len("month="):] for entry in entries
+                if entry.type == fs.FileType.Directory and entry.base_name.startswith("month=")
+            )
+        except Exception as e:
+            logger.error(f"Error listing call archive: {e}")
+        self._months_checked_at = monotonic()
+        return self._months
+
+    def reaches(self, date_from: Optional[date], date_to: Optional[date]) -> bool:
+        """Whether a started_at range overlaps any archived month"""
+        months = self.months()
+        if not months:
+            return False
+        date_from, date_to = _as_datetime(date_from), _as_datetime(date_to)
+        if date_from is not None and date_from >= _next_month(_month_start(months[-1])):
+            return False
+        if date_to is not None and date_to < _month_start(months[0]):
+            return False
+        return True
+
+    # Retention job
+
+    def archive_older_than(self, days: int, batch_size: int = None) -> int:
+        """Move calls started more than `days` ago to the archive; returns the count"""
+        if not self.enabled:
+            logger.info("CALL_ARCHIVE_URI not set, skipping call archival")
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        batch_size = batch_size or settings.CALL_ARCHIVE_BATCH_SIZE
+        archived = 0
+        db = SessionLocal()
+        try:
+            while True:
+                moved = self._archive_batch(db, cutoff, batch_size)
+                if not moved:
+                    break
+                archived += moved
+                logger.info(f"Archived {archived} calls started before {cutoff:%Y-%m-%d}")
+        finally:
+            db.close()
+        self._months_checked_at = float("-inf")
+        return archived
+
+    def _archive_batch(self, db, cutoff: datetime, batch_size: int) -> int:
+        # A page of calls first, then every recording of those calls, so no
+        # call is split across batches
+        calls = (
+            db.query(*[getattr(Call, name) for name in CALL_FIELDS])
+            .filter(Call.started_at < cutoff)
+            .order_by(Call.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not calls:
+            db.commit()
+            return 0
+        ids = [call.id for call in calls]
+        recordings = {}
+        for row in (
+            db.query(CallRecording.call_id, *RECORDING_FIELDS.values())
+            .filter(CallRecording.call_id.in_(ids))
+            .order_by(CallRecording.id)
+        ):
+            recordings.setdefault(row.call_id, []).append(dict(zip(RECORDING_FIELDS, row[1:])))
+        # End the read transaction before the (possibly slow) upload
+        db.commit()
+
+        self._write([
+            {**dict(zip(CALL_FIELDS, call)), "recordings": recordings.get(call.id, [])} for call in calls
+        ])
+
+        # Short delete transaction per batch; files are written first, so a
+        # failure here only means the batch is rewritten under the same names
+        db.query(CallAudioAnalytics).filter(CallAudioAnalytics.call_id.in_(ids)).delete(synchronize_session=False)
+        db.query(CallRecording).filter(CallRecording.call_id.in_(ids)).delete(synchronize_session=False)
+        db.query(Call).filter(Call.id.in_(ids), Call.started_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return len(ids)
+
+    def _write(self, records: Sequence[dict]) -> None:
+        """Write archive records (CALL_FIELDS plus "recordings"), ordered by id"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = _archive_schema()
+        by_month = {}
+        for record in records:
+            by_month.setdefault(record["started_at"].strftime("%Y-%m"), []).append(record)
+
+        filesystem = self._fs()
+        for month, month_records in by_month.items():
+            table = pa.Table.from_pylist(month_records, schema=schema)
+            directory = f"{self._root}/month={month}"
+            filesystem.create_dir(directory, recursive=True)
+            path = f"{directory}/calls-{month_records[0]['id']:012d}-{month_records[-1]['id']:012d}.parquet"
+            pq.write_table(table, path, filesystem=filesystem, compression="zstd")
+
+    # Query-through
+
+    def _s3_settings(self) -> List[str]:
+        """httpfs SET statements for the archive's bucket.
+
+        SET takes no bound parameters, so values are inlined as SQL string
+        literals.
+        """
+        def literal(value: Any) -> str:
+            return "'" + str(value).replace("'", "''") + "'"
+
+        statements = [f"SET s3_region = {literal(settings.AWS_REGION)}"]
+        if settings.AWS_ACCESS_KEY_ID:
+            statements.append(f"SET s3_access_key_id = {literal(settings.AWS_ACCESS_KEY_ID)}")
+            statements.append(f"SET s3_secret_access_key = {literal(settings.AWS_SECRET_ACCESS_KEY or '')}")
+        if settings.CALL_ARCHIVE_S3_ENDPOINT:
+            endpoint = settings.CALL_ARCHIVE_S3_ENDPOINT
+            statements.append(f"SET s3_endpoint = {literal(endpoint.split('://')[-1])}")
+            statements.append("SET s3_url_style = 'path'")
+            statements.append(f"SET s3_use_ssl = {'true' if endpoint.startswith('https') else 'false'}")
+        return statements
+
+    def _connect(self):
+        import duckdb
+        conn = duckdb.connect()
+        if self.is_s3:
+            conn.execute("INSTALL httpfs")
+            conn.execute("LOAD httpfs")
+            for statement in self._s3_settings():
+                conn.execute(statement)
+        return conn
+
+    def _where(
+        self,
+        agent_id: Optional[int],
+        status: Optional[str],
+        date_from: Optional[date],
+        date_to: Optional[date],
+    ) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if agent_id is not None:
+            clauses.append("agent_id = ?")
+            params.append(agent_id)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if date_from:
+            clauses.append("started_at >= ?")
+            params.append(_as_datetime(date_from))
+        if date_to:
+            clauses.append("started_at <= ?")
+            params.append(_as_datetime(date_to))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _source(self) -> str:
+        return f"read_parquet('{self.uri}/month=*/*.parquet', hive_partitioning = true, union_by_name = true)"
+
+    def query_calls(
+        self,
+        columns: Sequence[str],
+        agent_id: Optional[int] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> List[tuple]:
+        """Archived calls, newest first, as tuples in the order of `columns`"""
+        where, params = self._where(agent_id, status, date_from, date_to)
+        select = ", ".join(f'"{column}"' for column in columns)
+        conn = self._connect()
+        try:
+            return conn.execute(
+                f"SELECT {select} FROM {self._source()}{where} "
+                f"ORDER BY started_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def stats(
+        self,
+        agent_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> Tuple[int, int, int]:
+        """(total calls, completed calls, total duration) over archived calls"""
+        where, params = self._where(agent_id, None, date_from, date_to)
+        conn = self._connect()
+        try:
+            total, answered, duration = conn.execute(
+                f"SELECT count(*), count(*) FILTER (WHERE status = 'completed'), "
+                f"coalesce(sum(duration), 0) FROM {self._source()}{where}",
+                params,
+            ).fetchone()
+        finally:
+            conn.close()
+        return int(total), int(answered or 0), int(duration)
+
+
+call_archive = CallArchive(settings.CALL_ARCHIVE_URI)
@@ -0,0 +1,306 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import uuid4
+import asyncio
+import json
+import logging
+import sys
+import time
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import WebSocket
+
+from app.core.config import settings
+from app.core.metrics import (
+    CALL_BOARD_ACTIVE_CALLS,
+    CALL_BOARD_DELTA_LATENCY,
+    CALL_BOARD_DROPPED_SUBSCRIBERS,
+    CALL_BOARD_MEMORY_BYTES,
+    CALL_BOARD_SUBSCRIBERS,
+    WEBSOCKET_MESSAGES,
+    WEBSOCKET_SEND_ERRORS,
+    gauge_function,
+)
+from app.db.session import SessionLocal
+from app.models.call import Call
+
+logger = logging.getLogger(__name__)
+
+# Every API process applies the same stream of events to its own board, so
+# producers (webhooks, origination, workers) publish here instead of
+# touching a local registry
+CALL_BOARD_CHANNEL = "buttdialer:call-board"
+
+ACTIVE_STATUSES = frozenset(("queued", "initiated", "ringing", "in-progress", "answered"))
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    # Call timestamps are naive UTC
+    return value.replace(tzinfo=timezone.utc).timestamp() if value else None
+
+
+class ActiveCall:
+    """One call on the board; __slots__ keeps it to a fixed-size record"""
+
+    __slots__ = (
+        "id", "agent_id", "campaign_id", "contact_id", "direction",
+        "to_number", "status", "started_at", "answered_at",
+    )
+
+    def __init__(self, id, agent_id, campaign_id, contact_id, direction,
+                 to_number, status, started_at, answered_at):
+        self.id = id
+        self.agent_id = agent_id
+        self.campaign_id = campaign_id
+        self.contact_id = contact_id
+        self.direction = direction
+        self.to_number = to_number
+        self.status = status
+        self.started_at = started_at
+        self.answered_at = answered_at
+
+    def update(self, event: dict) -> None:
+        for name in self.__slots__:
+            if name in event:
+                setattr(self, name, event[name])
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def call_event(call: Call) -> dict:
+    """Board event for the current state of a call row"""
+    return {
+        "id": call.id,
+        "agent_id": call.agent_id,
+        "campaign_id": call.campaign_id,
+        "contact_id": call.contact_id,
+        "direction": call.direction,
+        "to_number": call.to_number,
+        "status": call.status,
+        "started_at": _epoch(call.started_at),
+        "answered_at": _epoch(call.answered_at),
+    }
+
+
+_publisher: Optional[redis.Redis] = None
+
+def publish_board_event(event: dict) -> None:
+    """Publish a call_event() to every API process's board"""
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.REDIS_URL)
+    event["ts"] = time.time()
+    try:
+        _publisher.publish(CALL_BOARD_CHANNEL, json.dumps(event))
+    except Exception as e:
+        logger.error(f"Error publishing call board update: {e}")
+
+
+def publish_board_update(call: Call) -> None:
+    """Publish a call's new state to every API process's board"""
+    publish_board_event(call_event(call))
+
+
+class BoardSubscriber:
+    __slots__ = ("websocket", "agent_id", "queue", "task")
+
+    def __init__(self, websocket: WebSocket, agent_id: Optional[int], max_queue: int):
+        self.websocket = websocket
+        self.agent_id = agent_id  # None sees every call
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.task: Optional[asyncio.Task] = None
+
+
+class ActiveCallBoard:
+    """In-memory registry of active calls streamed as snapshot + deltas.
+
+    Subscribers get a board_snapshot and then board_delta messages carrying
+    a sequence number. Each subscriber has its own bounded send queue; one
+    that falls behind is disconnected (close code 1013) and gets a fresh
+    snapshot when it reconnects, so a slow dashboard never stalls the rest.
+    """
+
+    def __init__(self, max_queue: int = 256, ended_memory: int = 10000):
+        self.calls: Dict[int, ActiveCall] = {}
+        self.seq = 0
+        self.subscribers: Dict[str, BoardSubscriber] = {}
+        self.max_queue = max_queue
+        # Recently ended calls, so a late out-of-order webhook can't revive them
+        self._ended: "OrderedDict[int, None]" = OrderedDict()
+        self._ended_memory = ended_memory
+        self._task: Optional[asyncio.Task] = None
+
+    # State
+
+    def apply(self, event: dict) -> Optional[dict]:
+        """Apply a published event; returns the delta to fan out, if any"""
+        call_id = event["id"]
+        if event["status"] in ACTIVE_STATUSES:
+            if call_id in self._ended:
+                return None
+            record = self.calls.get(call_id)
+            if record is None:
+                record = ActiveCall(**{name: event.get(name) for name in ActiveCall.__slots__})
+                self.calls[call_id] = record
+            else:
+                record.update(event)
+            delta = {"op": "upsert", "call": record.as_dict()}
+        else:
+            self._ended[call_id] = None
+            if len(self._ended) > self._ended_memory:
+                self._ended.popitem(last=False)
+            record = self.calls.pop(call_id, None)
+            if record is None:
+                return None
+            delta = {
+                "op": "remove",
+                "call": {"id": call_id, "agent_id": record.agent_id, "status": event["status"]},
+            }
+
+        self.seq += 1
+        return {"type": "board_delta", "seq": self.seq, **delta}
+
+    def snapshot(self, agent_id: Optional[int] = None) -> dict:
+        return {
+            "type": "board_snapshot",
+            "seq": self.seq,
+            "calls": [
+                record.as_dict() for record in self.calls.values()
+                if agent_id is None or record.agent_id == agent_id
+            ],
+        }
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the records (shallow sizes of slots and values)"""
+        total = sys.getsizeof(self.calls)
+        for record in self.calls.values():
+            total += sys.getsizeof(record)
+            total += sum(sys.getsizeof(getattr(record, name)) for name in ActiveCall.__slots__)
+        return total
+
+    def _load(self) -> List[ActiveCall]:
+        since = datetime.utcnow() - timedelta(hours=settings.CALL_BOARD_MAX_AGE_HOURS)
+        db = SessionLocal()
+        try:
+            rows = db.query(*(getattr(Call, name) for name in ActiveCall.__slots__)).filter(
+                Call.status.in_(ACTIVE_STATUSES),
+                Call.started_at >= since
+            ).all()
+        finally:
+            db.close()
+        return [
+            ActiveCall(row.id, row.agent_id, row.campaign_id, row.contact_id, row.direction,
+                       row.to_number, row.status, _epoch(row.started_at), _epoch(row.answered_at))
+            for row in rows
+        ]
+
+    async def rebuild(self) -> None:
+        """Replace the board with the active calls in the database"""
+        records = await asyncio.to_thread(self._load)
+        self.calls = {record.id: record for record in records}
+        self.seq += 1
+        logger.info(f"Call board rebuilt with {len(records)} active calls")
+        # Deltas may have been missed while disconnected; resync everyone
+        for client_id, subscriber in list(self.subscribers.items()):
+            self._enqueue(client_id, subscriber, json.dumps(self.snapshot(subscriber.agent_id)), None)
+
+    # Subscribers
+
+    def subscribe(self, websocket: WebSocket, agent_id: Optional[int] = None) -> str:
+        """Register an accepted WebSocket; its first message is a snapshot"""
+        client_id = uuid4().hex
+        subscriber = BoardSubscriber(websocket, agent_id, self.max_queue)
+        self.subscribers[client_id] = subscriber
+        subscriber.queue.put_nowait((json.dumps(self.snapshot(agent_id)), None))
+        subscriber.task = asyncio.create_task(self._writer(client_id, subscriber))
+        return client_id
+
+    def unsubscribe(self, client_id: str) -> None:
+        subscriber = self.subscribers.pop(client_id, None)
+        if subscriber is not None and subscriber.task is not None:
+            subscriber.task.cancel()
+
+    def _dispatch(self, delta: dict, published_at: Optional[float]) -> None:
+        agent_id = delta["call"]["agent_id"]
+        text = json.dumps(delta)
+        for client_id, subscriber in list(self.subscribers.items()):
+            if subscriber.agent_id is None or subscriber.agent_id == agent_id:
+                self._enqueue(client_id, subscriber, text, published_at)
+
+    def _enqueue(self, client_id: str, subscriber: BoardSubscriber, text: str,
+                 published_at: Optional[float]) -> None:
+        try:
+            subscriber.queue.put_nowait((text, published_at))
+        except asyncio.QueueFull:
+            logger.warning(f"Call board subscriber {client_id} fell behind, disconnecting")
+            CALL_BOARD_DROPPED_SUBSCRIBERS.inc()
+            self.unsubscribe(client_id)
+            asyncio.create_task(self._close(subscriber.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
+    async def _writer(self, client_id: str, subscriber: BoardSubscriber) -> None:
+        try:
+            while True:
+                text, published_at = await subscriber.queue.get()
+                await subscriber.websocket.send_text(text)
+                WEBSOCKET_MESSAGES.inc()
+                if published_at is not None:
+                    CALL_BOARD_DELTA_LATENCY.observe(max(time.time() - published_at, 0.0))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending call board update to {client_id}: {e}")
+            WEBSOCKET_SEND_ERRORS.inc()
+            self.subscribers.pop(client_id, None)
+
+    # Event stream
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for client_id in list(self.subscribers):
+            self.unsubscribe(client_id)
+
+    async def _run(self) -> None:
+        while True:
+            client = aioredis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Subscribe before loading so no update falls between the two;
+                # updates buffered meanwhile are applied on top of the load
+                await pubsub.subscribe(CALL_BOARD_CHANNEL)
+                await self.rebuild()
+                async for message in pubsub.listen():
+                    event = json.loads(message["data"])
+                    delta = self.apply(event)
+                    if delta is not None:
+                        self._dispatch(delta, event.get("ts"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Call board stream error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+                await client.close()
+
+
+call_board = ActiveCallBoard(max_queue=settings.CALL_BOARD_MAX_QUEUE)
+gauge_function(CALL_BOARD_ACTIVE_CALLS, lambda: len(call_board.calls))
+gauge_function(CALL_BOARD_SUBSCRIBERS, lambda: len(call_board.subscribers))
+gauge_function(CALL_BOARD_MEMORY_BYTES, call_board.memory_bytes)
@@ -0,0 +1,258 @@
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import logging
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import CALL_EVENT_BATCH_ROWS, CALL_EVENT_LAG
+from app.db.session import SessionLocal, engine
+from app.models.call import CallEvent
+
+logger = logging.getLogger(__name__)
+
+# Stored as the index into this tuple (a smallint); only append to it
+EVENTS = (
+    "queued", "initiated", "ringing", "in-progress", "answered",
+    "completed", "busy", "no-answer", "failed", "canceled",
+)
+EVENT_CODES = {name: code for code, name in enumerate(EVENTS)}
+ANSWERED = {"answered", "in-progress"}
+FINAL = {"completed", "busy", "no-answer", "failed", "canceled"}
+# pg advisory lock serializing partition DDL
+PARTITION_LOCK = 0xca11
+
+
+class Event(NamedTuple):
+    event: str
+    sequence: Optional[int]
+    occurred_at: datetime
+    received_at: datetime
+    recorded_at: Optional[datetime]
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Twilio's RFC 2822 callback Timestamp as naive UTC"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def ordered(events: List[Event]) -> List[Event]:
+    """Events in the order they happened; callbacks can arrive out of order"""
+    return sorted(events, key=lambda e: (e.occurred_at, e.sequence if e.sequence is not None else -1, e.received_at))
+
+
+def summarize(events: List[Event]) -> Dict[str, Optional[object]]:
+    """Call status, answered_at, ended_at and duration derived from its events.
+
+    A final status sticks: a late ringing callback can't reopen an ended call.
+    """
+    summary = {"status": None, "answered_at": None, "ended_at": None, "duration": None}
+    for event in ordered(events):
+        if summary["ended_at"] is not None:
+            break
+        summary["status"] = event.event
+        if event.event in ANSWERED and summary["answered_at"] is None:
+            summary["answered_at"] = event.occurred_at
+        elif event.event in FINAL:
+            summary["ended_at"] = event.occurred_at
+    if summary["answered_at"] and summary["ended_at"]:
+        summary["duration"] = int((summary["ended_at"] - summary["answered_at"]).total_seconds())
+    return summary
+
+
+def timings(events: List[Event], started_at: Optional[datetime]) -> Dict[str, Optional[float]]:
+    """Ring time (first ringing to answer) and answer latency (call placed to answer)"""
+    events = ordered(events)
+    first = {}
+    for event in events:
+        kind = "answered" if event.event in ANSWERED else event.event
+        first.setdefault(kind, event.occurred_at)
+    answered = first.get("answered")
+    placed = started_at or (events[0].occurred_at if events else None)
+
+    def seconds(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+        return max((end - start).total_seconds(), 0.0) if start and end else None
+
+    return {
+        "ring_seconds": seconds(first.get("ringing"), answered),
+        "answer_latency_seconds": seconds(placed, answered),
+        "talk_seconds": seconds(answered, next((e.occurred_at for e in events if e.event in FINAL), None)),
+    }
+
+
+def load_events(db: Session, call_id: int, since: Optional[datetime] = None) -> List[Event]:
+    """A call's events; `since` (e.g. the call's start) lets Postgres skip older partitions"""
+    query = db.query(
+        CallEvent.event, CallEvent.sequence, CallEvent.occurred_at, CallEvent.received_at, CallEvent.recorded_at
+    ).filter(CallEvent.call_id == call_id)
+    if since is not None:
+        query = query.filter(CallEvent.received_at >= since - timedelta(hours=1))
+    return [
+        Event(EVENTS[row.event], row.sequence, row.occurred_at, row.received_at, row.recorded_at)
+        for row in query
+    ]
+
+
+# Partitions: one per calendar month of received_at
+
+def _month(day: date, offset: int = 0) -> date:
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"call_events_{month:%Y_%m}"
+
+
+def ensure_partitions(months_ahead: int = None) -> List[str]:
+    """Create this month's partition and the next months_ahead; returns their names.
+    
+    Run by the daily maintenance task (the migration creates the first
+    months), not by app workers: it needs DDL rights, and concurrent
+    CREATE ... PARTITION OF the same table can fail even with IF NOT
+    EXISTS, hence the lock.
+    """
+    months_ahead = settings.CALL_EVENT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    this_month = _month(datetime.utcnow().date())
+    names = []
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:lock)"), {"lock": PARTITION_LOCK})
+        for offset in range(months_ahead + 1):
+            start, end = _month(this_month, offset), _month(this_month, offset + 1)
+            names.append(partition_name(start))
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {names[-1]} PARTITION OF call_events "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+    return names
+
+
+def drop_partitions_before(cutoff: date) -> List[str]:
+    """Drop the partitions holding only events received before cutoff"""
+    dropped = []
+    with engine.begin() as connection:
+        partitions = connection.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'call_events'"
+        )).scalars().all()
+        for name in sorted(partitions):
+            try:
+                month = datetime.strptime(name, "call_events_%Y_%m").date()
+            except ValueError:
+                continue
+            if _month(month, 1) <= cutoff:
+                connection.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+    return dropped
+
+
+class CallEventLog:
+    """Append-only writer for call_events with group commit.
+
+    Callers wait until their event is committed, but events arriving while
+    a write is in flight are queued and go out together in the next
+    multi-row INSERT. An idle log writes an event at once, and a busy one
+    batches up to batch_size rows per statement. Without a running writer
+    (Celery workers, scripts) events are written one at a time.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._flush()
+
+    async def append(
+        self,
+        call_id: int,
+        event: str,
+        sequence: Optional[int] = None,
+        occurred_at: Optional[datetime] = None
+    ) -> bool:
+        """Record an event; returns False for statuses the log doesn't know"""
+        code = EVENT_CODES.get(event)
+        if code is None:
+            logger.warning(f"Ignoring unknown call event {event!r} for call {call_id}")
+            return False
+        received_at = datetime.utcnow()
+        row = {
+            "call_id": call_id,
+            "event": code,
+            "sequence": sequence,
+            "occurred_at": occurred_at or received_at,
+            "received_at": received_at,
+        }
+        if occurred_at is not None:
+            CALL_EVENT_LAG.labels("delivery").observe(max((received_at - occurred_at).total_seconds(), 0.0))
+
+        if self._task is None:
+            await asyncio.to_thread(self._insert, [row])
+            return True
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        self._wakeup.set()
+        await future
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Call event flush failed: {e}")
+
+    async def _flush(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            try:
+                await asyncio.to_thread(self._insert, [row for row, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    @staticmethod
+    def _insert(rows: List[dict]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(insert(CallEvent), rows)
+            db.commit()
+        finally:
+            db.close()
+        committed = datetime.utcnow()
+        CALL_EVENT_BATCH_ROWS.observe(len(rows))
+        for row in rows:
+            CALL_EVENT_LAG.labels("write").observe((committed - row["received_at"]).total_seconds())
+
+
+call_event_log = CallEventLog(batch_size=settings.CALL_EVENT_BATCH_SIZE)
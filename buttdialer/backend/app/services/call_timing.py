@@ -0,0 +1,254 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import threading
+import zlib
+
+import numpy as np
+from sqlalchemy import case, insert, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.call import Call, CallTimingGrid
+from app.models.campaign import Campaign, CampaignCall
+from app.models.contact import Contact
+from app.services.audio_store import audio_store
+
+logger = logging.getLogger(__name__)
+
+HOURS = 7 * 24
+# Outcome axis of the grids, in stored order; only append to it
+OUTCOMES = ("human", "machine", "no-answer", "busy", "failed")
+CONNECTED = OUTCOMES.index("human")
+ALL = "*"  # grid of every call, the prior of the area-code grids
+
+
+def area_code(number: Optional[str]) -> Optional[str]:
+    """NANP area code of a phone number, None for other numbers"""
+    digits = "".join(c for c in number or "" if c.isdigit())
+    if len(digits) == 11 and digits[0] == "1":
+        digits = digits[1:]
+    return digits[:3] if len(digits) == 10 else None
+
+
+def hour_of_week(stamps) -> np.ndarray:
+    """UTC hour of week, Monday 00:00 = 0, of datetimes or datetime64s.
+
+    Grids are kept in UTC: within one area code that is a fixed local hour,
+    give or take daylight saving time.
+    """
+    hours = np.asarray(stamps, dtype="datetime64[h]").astype(np.int64)
+    # 1970-01-01 was a Thursday
+    return ((hours // 24 + 3) % 7) * 24 + hours % 24
+
+
+def outcome_column():
+    """SQL for a call's index in OUTCOMES, NULL while it is still in progress"""
+    return case(
+        (Call.answered_by == "machine", OUTCOMES.index("machine")),
+        (Call.disposition == "voicemail", OUTCOMES.index("machine")),
+        (Call.answered_at.isnot(None), CONNECTED),
+        (Call.status.in_(("no-answer", "canceled")), OUTCOMES.index("no-answer")),
+        (Call.status == "busy", OUTCOMES.index("busy")),
+        (Call.status == "failed", OUTCOMES.index("failed")),
+        else_=None,
+    )
+
+
+class GridBuilder:
+    """Accumulates (area code, hour of week, outcome) counts a batch of calls at a time"""
+
+    def __init__(self):
+        self.areas: Dict[Optional[str], int] = {None: 0}  # row 0: calls with no area code
+        self.counts = np.zeros((1, HOURS, len(OUTCOMES)), dtype=np.int64)
+
+    def add(self, started_at: Sequence[datetime], numbers: Sequence[str], outcomes: Sequence[int]) -> None:
+        # Numbers repeat across attempts, so parse each one once
+        unique, inverse = np.unique(np.asarray(numbers, dtype=object).astype(str), return_inverse=True)
+        rows = np.array([self.areas.setdefault(area_code(n), len(self.areas)) for n in unique], dtype=np.int64)
+        cells = (rows[inverse] * HOURS + hour_of_week(started_at)) * len(OUTCOMES) + np.asarray(outcomes)
+        added = np.bincount(cells, minlength=len(self.areas) * HOURS * len(OUTCOMES))
+        if len(self.areas) > self.counts.shape[0]:
+            grown = np.zeros((len(self.areas), HOURS, len(OUTCOMES)), dtype=np.int64)
+            grown[:self.counts.shape[0]] = self.counts
+            self.counts = grown
+        self.counts += added.reshape(self.counts.shape)
+
+    def grids(self) -> Dict[str, np.ndarray]:
+        grids = {ALL: self.counts.sum(axis=0)}
+        for area, row in self.areas.items():
+            if area is not None:
+                grids[area] = self.counts[row]
+        return grids
+
+
+def encode(counts: np.ndarray) -> bytes:
+    return zlib.compress(np.minimum(counts, 2 ** 32 - 1).astype("<u4").tobytes())
+
+
+def decode(data: bytes) -> np.ndarray:
+    counts = np.frombuffer(zlib.decompress(data), dtype="<u4").reshape(HOURS, -1)
+    # Grids built before an outcome was added have no column for it
+    return np.pad(counts, ((0, 0), (0, len(OUTCOMES) - counts.shape[1])))
+
+
+def rates(counts: np.ndarray, prior: np.ndarray, strength: float) -> np.ndarray:
+    """Outcome probabilities per hour of week from counts of shape (..., HOURS, outcomes).
+
+    Counts are first spread over the neighbouring hours, then shrunk
+    towards `prior` as if `strength` calls had gone its way, so hours and
+    area codes with few calls fall back to the broader pattern.
+    """
+    counts = counts.astype(np.float64)
+    smoothed = 0.5 * counts + 0.25 * (np.roll(counts, 1, axis=-2) + np.roll(counts, -1, axis=-2))
+    return (smoothed + strength * prior) / (smoothed.sum(axis=-1, keepdims=True) + strength)
+
+
+class TimingModel:
+    """Connect probabilities by area code and hour of week, from the stored grids"""
+
+    def __init__(self, grids: Dict[str, np.ndarray], built_at: Optional[datetime], strength: float):
+        self.built_at = built_at
+        overall = grids.get(ALL, np.zeros((HOURS, len(OUTCOMES)), dtype=np.int64))
+        totals = overall.sum(axis=0)
+        mix = totals / totals.sum() if totals.sum() else np.full(len(OUTCOMES), 1 / len(OUTCOMES))
+        self.prior = rates(overall, mix, strength)
+        # Row 0 is the overall grid, used for numbers without a grid of their own
+        self.areas = {area: row for row, area in enumerate([ALL] + sorted(a for a in grids if a != ALL))}
+        counts = np.stack([grids.get(area, overall) for area in self.areas])
+        self.calls = counts.sum(axis=(1, 2))
+        self.probabilities = rates(counts, self.prior, strength)
+        self.probabilities[0] = self.prior
+
+    def rows(self, numbers: Iterable[str]) -> np.ndarray:
+        return np.array([self.areas.get(area_code(n), 0) for n in numbers], dtype=np.int64)
+
+    def connect_probability(self, numbers: Sequence[str], at: datetime) -> np.ndarray:
+        """Chance that each number is answered by a person when called at `at`"""
+        return self.probabilities[self.rows(numbers), hour_of_week(at), CONNECTED]
+
+    def best_hours(self, numbers: Sequence[str]) -> np.ndarray:
+        """Each number's hour of week with the highest connect probability"""
+        return self.probabilities[self.rows(numbers), :, CONNECTED].argmax(axis=1)
+
+    def grid(self, area: Optional[str]) -> Tuple[int, np.ndarray]:
+        """Calls seen and (HOURS, outcomes) probabilities for an area code"""
+        row = self.areas.get(area or ALL, 0)
+        return int(self.calls[row]), self.probabilities[row]
+
+
+class CallTiming:
+    """Best-time-to-call model built from outbound call history.
+
+    A daily job counts outbound call outcomes by the callee's area code and
+    UTC hour of week over the last CALL_TIMING_LOOKBACK_DAYS and replaces the
+    stored grids. The model is loaded from them and reloaded at most every
+    MODEL_TTL_SECONDS.
+    """
+
+    MODEL_TTL_SECONDS = 300
+
+    def __init__(self, lookback_days: int, strength: float):
+        self.lookback_days = lookback_days
+        self.strength = strength
+        self._model: Optional[TimingModel] = None
+        self._loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def rebuild(self, db: Session, batch_size: int = 50000) -> int:
+        """Recount the grids from call history; returns the number of calls counted"""
+        since = datetime.utcnow() - timedelta(days=self.lookback_days)
+        outcome = outcome_column()
+        rows = iter(
+            db.query(Call.started_at, Call.to_number, outcome).filter(
+                Call.direction == "outbound",
+                Call.started_at >= since,
+                outcome.isnot(None)
+            ).yield_per(batch_size)
+        )
+
+        builder = GridBuilder()
+        counted = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            started_at, numbers, outcomes = zip(*batch)
+            builder.add(started_at, numbers, outcomes)
+            counted += len(batch)
+
+        built_at = datetime.utcnow()
+        grids = [
+            {"area_code": area, "calls": int(counts.sum()), "counts": encode(counts), "built_at": built_at}
+            for area, counts in builder.grids().items()
+        ]
+        # Swap the whole set in one transaction
+        db.query(CallTimingGrid).delete(synchronize_session=False)
+        db.execute(insert(CallTimingGrid), grids)
+        db.commit()
+        self._loaded_at = float("-inf")
+        logger.info(f"Call timing grids rebuilt from {counted} calls, {len(grids) - 1} area codes")
+        return counted
+
+    def model(self, db: Session) -> TimingModel:
+        with self._lock:
+            if self._model is None or monotonic() - self._loaded_at >= self.MODEL_TTL_SECONDS:
+                rows = db.query(CallTimingGrid.area_code, CallTimingGrid.counts, CallTimingGrid.built_at).all()
+                self._model = TimingModel(
+                    {row.area_code: decode(row.counts) for row in rows},
+                    max((row.built_at for row in rows if row.built_at), default=None),
+                    self.strength,
+                )
+                self._loaded_at = monotonic()
+            return self._model
+
+    def rank_campaign_calls(
+        self,
+        db: Session,
+        campaign: Campaign,
+        at: Optional[datetime] = None,
+        limit: int = 100
+    ) -> List[dict]:
+        """A campaign's callable leads, most likely to connect at `at` first"""
+        at = at or datetime.utcnow()
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        leads = db.query(
+            CampaignCall.id, CampaignCall.contact_id, CampaignCall.attempts, CampaignCall.audio_digest,
+            Contact.phone_number
+        ).join(Contact, Contact.id == CampaignCall.contact_id).filter(
+            CampaignCall.campaign_id == campaign.id,
+            CampaignCall.status.in_(("pending", "scheduled")),
+            or_(CampaignCall.attempts.is_(None), CampaignCall.attempts < campaign.attempt_limit),
+            or_(CampaignCall.scheduled_at.is_(None), CampaignCall.scheduled_at <= at),
+            Contact.is_dnc.isnot(True)
+        ).all()
+        if not leads:
+            return []
+
+        model = self.model(db)
+        numbers = [lead.phone_number for lead in leads]
+        scores = model.connect_probability(numbers, at)
+        best = model.best_hours(numbers)
+        # Stable, so equally likely leads keep campaign order
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [
+            {
+                "campaign_call_id": leads[i].id,
+                "contact_id": leads[i].contact_id,
+                "phone_number": leads[i].phone_number,
+                "attempts": leads[i].attempts or 0,
+                "connect_probability": float(scores[i]),
+                "best_hour_of_week": int(best[i]),
+                "audio_url": audio_store.signed_url(leads[i].audio_digest, "wav") if leads[i].audio_digest else None,
+            }
+            for i in order
+        ]
+
+
+call_timing = CallTiming(
+    lookback_days=settings.CALL_TIMING_LOOKBACK_DAYS,
+    strength=settings.CALL_TIMING_PRIOR_CALLS,
+)
@@ -0,0 +1,175 @@
+from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+import logging
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.call import Call
+from app.models.campaign import Campaign, CampaignCall
+from app.models.contact import DNCList
+from app.services.contact_dedup import resolve_contact_id
+from app.services.delay_queue import delay_queue, RetryPolicy
+from app.services.twilio_service import twilio_service
+
+logger = logging.getLogger(__name__)
+
+DIAL_JOB = "dial"
+
+# Twilio terminal statuses that count as a failed attempt
+RETRYABLE_STATUSES = {'failed', 'busy', 'no-answer', 'canceled'}
+
+retry_policy = RetryPolicy(
+    base_delay=settings.RETRY_BACKOFF_BASE_SECONDS,
+    max_delay=settings.RETRY_BACKOFF_MAX_SECONDS
+)
+
+def campaign_call_job_id(campaign_call_id: int) -> str:
+    # One pending dial per campaign lead; re-scheduling replaces it
+    return f"{DIAL_JOB}:campaign-call:{campaign_call_id}"
+
+def _job_id(campaign_call_id: Optional[int], call_id: int) -> str:
+    if campaign_call_id:
+        return campaign_call_job_id(campaign_call_id)
+    return f"{DIAL_JOB}:call:{call_id}"
+
+async def schedule_callback(call: Call, callback_at: datetime) -> str:
+    """Schedule a callback requested on a call (disposition 'callback')"""
+    db = SessionLocal()
+    campaign_call = None
+    if call.campaign_id and call.contact_id:
+        campaign_call = db.query(CampaignCall).filter(
+            CampaignCall.campaign_id == call.campaign_id,
+            CampaignCall.contact_id == call.contact_id
+        ).first()
+        if campaign_call:
+            campaign_call.status = 'scheduled'
+            campaign_call.scheduled_at = callback_at
+            db.commit()
+
+    payload = {
+        'agent_id': call.agent_id,
+        'to_number': call.to_number,
+        'contact_id': call.contact_id,
+        'campaign_id': call.campaign_id,
+        'campaign_call_id': campaign_call.id if campaign_call else None,
+        'callback': True
+    }
+    db.close()
+
+    return await delay_queue.schedule(
+        DIAL_JOB, payload, callback_at,
+        job_id=_job_id(payload['campaign_call_id'], call.id)
+    )
+
+async def record_call_outcome(call_sid: str, status: str) -> None:
+    """Count a campaign attempt once a call ends and schedule a retry if allowed"""
+    if status != 'completed' and status not in RETRYABLE_STATUSES:
+        return
+
+    db = SessionLocal()
+    call = db.query(Call).filter(Call.twilio_call_sid == call_sid).first()
+
+    if call and call.campaign_id and call.contact_id:
+        campaign_call = db.query(CampaignCall).filter(
+            CampaignCall.campaign_id == call.campaign_id,
+            CampaignCall.contact_id == call.contact_id
+        ).first()
+
+        if campaign_call:
+            await _record_attempt(db, campaign_call, call.agent_id, succeeded=status == 'completed')
+
+    db.close()
+
+async def _record_attempt(
+    db,
+    campaign_call: CampaignCall,
+    agent_id: int,
+    succeeded: bool
+) -> None:
+    campaign_call.attempts = (campaign_call.attempts or 0) + 1
+    campaign_call.last_attempt_at = datetime.utcnow()
+    campaign_call.scheduled_at = None
+
+    if succeeded:
+        campaign_call.status = 'completed'
+        db.commit()
+        return
+
+    if campaign_call.attempts >= campaign_call.campaign.attempt_limit:
+        campaign_call.status = 'failed'
+        db.commit()
+        return
+
+    run_at = datetime.utcnow() + timedelta(seconds=retry_policy.next_delay(campaign_call.attempts))
+    campaign_call.status = 'scheduled'
+    campaign_call.scheduled_at = run_at
+    db.commit()
+
+    payload = {
+        'agent_id': agent_id,
+        'to_number': campaign_call.contact.phone_number,
+        'contact_id': campaign_call.contact_id,
+        'campaign_id': campaign_call.campaign_id,
+        'campaign_call_id': campaign_call.id,
+        'callback': False
+    }
+    await delay_queue.schedule(DIAL_JOB, payload, run_at, job_id=_job_id(campaign_call.id, 0))
+
+@delay_queue.register(DIAL_JOB)
+async def dial(payload: Dict[str, Any]) -> None:
+    """Place a scheduled callback or campaign retry"""
+    db = SessionLocal()
+    try:
+        campaign_call = None
+        if payload.get('campaign_call_id'):
+            campaign_call = db.query(CampaignCall).filter(
+                CampaignCall.id == payload['campaign_call_id']
+            ).first()
+            # Anything else means this dial already ran (a reclaimed or duplicate job) or was superseded
+            if not campaign_call or campaign_call.status != 'scheduled':
+                return
+
+            campaign = db.query(Campaign).filter(Campaign.id == campaign_call.campaign_id).first()
+            if campaign.status in ('paused', 'completed'):
+                logger.info(f"Skipping dial for campaign {campaign.id} ({campaign.status})")
+                return
+
+            # Explicit callbacks were requested by the contact and are not retries
+            if not payload.get('callback') and (campaign_call.attempts or 0) >= campaign.attempt_limit:
+                campaign_call.status = 'failed'
+                db.commit()
+                return
+
+            campaign_call.status = 'pending'
+            campaign_call.scheduled_at = None
+            db.commit()
+
+        dnc_number = db.query(DNCList).filter(DNCList.phone_number == payload['to_number']).first()
+        if dnc_number:
+            logger.info(f"Skipping scheduled dial to DNC number {payload['to_number']}")
+            if campaign_call:
+                campaign_call.status = 'failed'
+                db.commit()
+            return
+
+        try:
+            result = await twilio_service.make_outbound_call(
+                to_number=payload['to_number'],
+                agent_id=payload['agent_id'],
+                campaign_id=payload.get('campaign_id'),
+                # The contact may have been merged into another since scheduling
+                contact_id=campaign_call.contact_id if campaign_call else resolve_contact_id(db, payload.get('contact_id'))
+            )
+        except Exception:
+            # Let the delay queue's retry of this job dial again
+            if campaign_call:
+                db.rollback()
+                campaign_call.status = 'scheduled'
+                db.commit()
+            raise
+
+        # No status webhook will arrive for a call Twilio never accepted
+        if not result['success'] and campaign_call:
+            await _record_attempt(db, campaign_call, payload['agent_id'], succeeded=False)
+    finally:
+        db.close()
@@ -0,0 +1,258 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+import re
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.call import Call
+from app.models.campaign import CampaignCall
+from app.models.contact import Contact, ContactMerge
+
+logger = logging.getLogger(__name__)
+
+MERGE_FIELDS = ("first_name", "last_name", "email", "company")
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Digits only, without the NANP country code"""
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits if len(digits) >= 7 else None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email if "@" in email else None
+
+
+def blocking_keys(phone: Optional[str], email: Optional[str], hubspot_id: Optional[str]) -> Iterator[str]:
+    """Keys under which two contacts are the same person"""
+    phone = normalize_phone(phone)
+    if phone:
+        yield f"p:{phone}"
+    email = normalize_email(email)
+    if email:
+        yield f"e:{email}"
+    if hubspot_id and hubspot_id.strip():
+        yield f"h:{hubspot_id.strip()}"
+
+
+class UnionFind:
+    """Disjoint sets over contact ids; ids never unioned are not stored"""
+    
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+        self.size: Dict[int, int] = {}
+    
+    def find(self, item: int) -> int:
+        parent = self.parent.setdefault(item, item)
+        while parent != item:
+            # Path halving keeps trees flat without recursion
+            grandparent = self.parent.setdefault(parent, parent)
+            self.parent[item] = grandparent
+            item, parent = grandparent, self.parent.setdefault(grandparent, grandparent)
+        return item
+    
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size.get(root_a, 1) < self.size.get(root_b, 1):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] = self.size.get(root_a, 1) + self.size.pop(root_b, 1)
+    
+    def groups(self) -> List[List[int]]:
+        members: Dict[int, List[int]] = defaultdict(list)
+        for item in self.parent:
+            members[self.find(item)].append(item)
+        return [sorted(group) for group in members.values() if len(group) > 1]
+
+
+def cluster_contacts(rows: Iterable[Sequence]) -> List[List[int]]:
+    """Duplicate clusters from (id, phone, email, hubspot_id) rows.
+    
+    Each blocking key remembers the first contact that produced it and every
+    later contact with the same key is unioned with it: one pass, linear in
+    the number of contacts, with no pairwise comparison.
+    """
+    owners: Dict[str, int] = {}
+    sets = UnionFind()
+    for contact_id, phone, email, hubspot_id in rows:
+        for key in blocking_keys(phone, email, hubspot_id):
+            owner = owners.setdefault(key, contact_id)
+            if owner != contact_id:
+                sets.union(owner, contact_id)
+    return sets.groups()
+
+
+def _choose_survivor(contacts: List[Contact]) -> Contact:
+    # The HubSpot-linked record wins, then the oldest
+    return min(contacts, key=lambda c: (c.hubspot_contact_id is None, c.id))
+
+
+def _merge_cluster(
+    db: Session,
+    contacts: List[Contact],
+    reason: str,
+    folded: List[Tuple[int, Optional[int]]]
+) -> int:
+    """Merge contacts onto a survivor; returns the number merged.
+    
+    Appends (deleted campaign call id, kept id or None) to `folded` for each
+    campaign row folded into another while it had a dial scheduled, so its
+    delay-queue job can be moved once the merge is committed.
+    """
+    survivor = _choose_survivor(contacts)
+    losers = [c for c in contacts if c.id != survivor.id]
+    loser_ids = [c.id for c in losers]
+    
+    # Fill gaps on the survivor; unique hubspot ids must leave the loser first
+    hubspot_id = survivor.hubspot_contact_id
+    for loser in losers:
+        for field in MERGE_FIELDS:
+            if not getattr(survivor, field) and getattr(loser, field):
+                setattr(survivor, field, getattr(loser, field))
+        if hubspot_id is None and loser.hubspot_contact_id:
+            hubspot_id = loser.hubspot_contact_id
+        loser.hubspot_contact_id = None
+        if isinstance(loser.tags, list) and loser.tags:
+            survivor.tags = list(dict.fromkeys((survivor.tags or []) + loser.tags))
+        if isinstance(loser.custom_fields, dict) and loser.custom_fields:
+            survivor.custom_fields = {**loser.custom_fields, **(survivor.custom_fields or {})}
+        survivor.is_dnc = bool(survivor.is_dnc or loser.is_dnc)
+    db.flush()
+    survivor.hubspot_contact_id = hubspot_id
+    
+    # One campaign row per (campaign, contact): fold attempts into the kept row
+    kept: Dict[int, CampaignCall] = {}
+    rows = db.query(CampaignCall).filter(
+        CampaignCall.contact_id.in_([survivor.id] + loser_ids)
+    ).order_by(CampaignCall.contact_id != survivor.id, CampaignCall.id).all()
+    for row in rows:
+        target = kept.get(row.campaign_id)
+        if target is None:
+            row.contact_id = survivor.id
+            kept[row.campaign_id] = row
+            continue
+        target.attempts = (target.attempts or 0) + (row.attempts or 0)
+        if row.status == 'completed':
+            target.status = 'completed'
+        if row.last_attempt_at and (not target.last_attempt_at or row.last_attempt_at > target.last_attempt_at):
+            target.last_attempt_at = row.last_attempt_at
+        if row.status == 'scheduled':
+            # Keep the dial (e.g. a callback the contact asked for), at the earlier time
+            if target.status == 'completed':
+                folded.append((row.id, None))
+            else:
+                if target.status != 'scheduled' or (
+                    row.scheduled_at and (not target.scheduled_at or row.scheduled_at < target.scheduled_at)
+                ):
+                    target.scheduled_at = row.scheduled_at
+                target.status = 'scheduled'
+                folded.append((row.id, target.id))
+        db.delete(row)
+    db.flush()
+    
+    db.query(Call).filter(Call.contact_id.in_(loser_ids)).update(
+        {Call.contact_id: survivor.id}, synchronize_session=False
+    )
+    db.add_all([
+        ContactMerge(merged_contact_id=loser.id, survivor_id=survivor.id,
+                     merged_phone_number=loser.phone_number, reason=reason)
+        for loser in losers
+    ])
+    db.flush()
+    db.query(Contact).filter(Contact.id.in_(loser_ids)).delete(synchronize_session=False)
+    return len(losers)
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def merge_duplicates(dry_run: bool = False, batch_size: int = None) -> Dict[str, int]:
+    """Find duplicate contact clusters and merge each onto a survivor.
+    
+    Clusters are merged in batches of batch_size, one short transaction
+    each, so a failing batch is rolled back without undoing earlier ones.
+    """
+    batch_size = batch_size or settings.CONTACT_MERGE_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        scanned = 0
+        
+        def rows():
+            nonlocal scanned
+            for row in db.query(
+                Contact.id, Contact.phone_number, Contact.email, Contact.hubspot_contact_id
+            ).yield_per(10000):
+                scanned += 1
+                yield row
+        
+        clusters = cluster_contacts(rows())
+        db.commit()
+        summary = {"scanned": scanned, "clusters": len(clusters), "merged": 0, "failed_batches": 0}
+        logger.info(f"Contact dedup: {len(clusters)} duplicate clusters in {scanned} contacts")
+        if dry_run:
+            return summary
+        
+        for batch in _chunks(clusters, batch_size):
+            ids = [contact_id for cluster in batch for contact_id in cluster]
+            folded: List[Tuple[int, Optional[int]]] = []
+            try:
+                contacts = {
+                    c.id: c for c in db.query(Contact).filter(Contact.id.in_(ids)).with_for_update()
+                }
+                for cluster in batch:
+                    members = [contacts[i] for i in cluster if i in contacts]
+                    if len(members) > 1:
+                        summary["merged"] += _merge_cluster(db, members, reason="blocking-key", folded=folded)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                summary["failed_batches"] += 1
+                logger.error(f"Contact merge batch failed ({len(batch)} clusters): {e}")
+                continue
+            _move_dials(folded)
+        
+        logger.info(f"Contact dedup finished: {summary}")
+        return summary
+    finally:
+        db.close()
+
+
+def _move_dials(folded: List[Tuple[int, Optional[int]]]) -> None:
+    """Re-key the scheduled dials of folded campaign rows onto the kept rows"""
+    # Imported here: callback_scheduler imports this module
+    from app.services.callback_scheduler import campaign_call_job_id
+    from app.services.delay_queue import delay_queue
+    for deleted_id, kept_id in folded:
+        try:
+            if kept_id is None:
+                delay_queue.cancel_sync(campaign_call_job_id(deleted_id))
+            else:
+                delay_queue.move_sync(
+                    campaign_call_job_id(deleted_id), campaign_call_job_id(kept_id), {"campaign_call_id": kept_id}
+                )
+        except Exception as e:
+            logger.error(f"Could not move scheduled dial of campaign call {deleted_id} to {kept_id}: {e}")
+
+
+def resolve_contact_id(db: Session, contact_id: Optional[int]) -> Optional[int]:
+    """Follow merges so stale references (e.g. queued dials) reach the survivor"""
+    for _ in range(10):
+        if contact_id is None:
+            return None
+        merge = db.query(ContactMerge.survivor_id).filter(
+            ContactMerge.merged_contact_id == contact_id
+        ).first()
+        if merge is None:
+            return contact_id
+        contact_id = merge.survivor_id
+    return contact_id
@@ -0,0 +1,410 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+from uuid import uuid4
+
+import redis.asyncio as redis
+from redis import Redis as SyncRedis
+
+from app.core.config import settings
+from app.core.metrics import DELAY_QUEUE_DROPPED, DELAY_QUEUE_RETRIES
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Atomically move a due job from the pending index into the processing set.
+# Only one worker can win the ZREM, so each job fires exactly once; a job that
+# was moved to a later time since it was armed is left for the loader.
+CLAIM_SCRIPT = """
+local due = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if due and tonumber(due) <= tonumber(ARGV[3]) then
+  redis.call('ZREM', KEYS[1], ARGV[1])
+  redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+  return redis.call('HGET', KEYS[3], ARGV[1])
+end
+return false
+"""
+
+# Return jobs whose processing lease expired (worker crashed) to the index.
+RECLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(ids) do
+  redis.call('ZREM', KEYS[1], id)
+  redis.call('ZADD', KEYS[2], ARGV[1], id)
+end
+return #ids
+"""
+
+# Finish a job, keeping its body if the handler re-scheduled the same job_id.
+ACK_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+  redis.call('HDEL', KEYS[3], ARGV[1])
+end
+return 1
+"""
+
+# Finish a failed attempt by putting the job back in the index with its new
+# body, unless the handler already re-scheduled the same job_id.
+RETRY_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+  redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+  redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+end
+return 1
+"""
+
+# Re-key a pending job (ARGV[1] -> ARGV[2]) with payload fields from ARGV[3].
+# If a job is already pending under the new id, the earlier of the two is
+# kept. A job that is not pending (running, done or cancelled) is left alone.
+MOVE_SCRIPT = """
+local due = redis.call('ZSCORE', KEYS[1], ARGV[1])
+local body = redis.call('HGET', KEYS[2], ARGV[1])
+if not due or not body then
+  return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+local existing = redis.call('ZSCORE', KEYS[1], ARGV[2])
+if existing and tonumber(existing) <= tonumber(due) then
+  return 1
+end
+local job = cjson.decode(body)
+job['id'] = ARGV[2]
+for key, value in pairs(cjson.decode(ARGV[3])) do
+  job['payload'][key] = value
+end
+redis.call('HSET', KEYS[2], ARGV[2], cjson.encode(job))
+redis.call('ZADD', KEYS[1], due, ARGV[2])
+return 1
+"""
+
+
+def to_epoch(value: Union[datetime, float]) -> float:
+    """Convert a datetime (naive values are UTC, as stored in the DB) to epoch seconds"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter, capped at max_delay"""
+
+    def __init__(
+        self,
+        base_delay: float,
+        max_delay: float,
+        multiplier: float = 2.0,
+        jitter: float = 0.1
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def next_delay(self, attempts: int) -> float:
+        """Seconds to wait before the next attempt, given attempts already made"""
+        delay = self.base_delay * (self.multiplier ** max(attempts - 1, 0))
+        delay = min(delay, self.max_delay)
+        if self.jitter:
+            delay += delay * random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+
+
+class TimingWheel:
+    """Hashed timing wheel holding the jobs due within one revolution.
+
+    Slot k fires at cursor_time + k * tick; a job lands in the first slot at
+    or after its due time, so it fires at most one tick late.
+    """
+
+    def __init__(self, tick: float, size: int):
+        self.tick = tick
+        self.slots: List[Set[str]] = [set() for _ in range(size)]
+        self.cursor = 0
+        self.cursor_time = time.time()
+        self.index: Dict[str, int] = {}
+
+    @property
+    def horizon(self) -> float:
+        return self.tick * len(self.slots)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self.index
+
+    def add(self, job_id: str, run_at: float) -> bool:
+        """Place a job in the wheel; returns False if it is beyond the horizon"""
+        if job_id in self.index:
+            return True
+        ticks = max(0, math.ceil((run_at - self.cursor_time) / self.tick))
+        if ticks >= len(self.slots):
+            return False
+        slot = (self.cursor + ticks) % len(self.slots)
+        self.slots[slot].add(job_id)
+        self.index[job_id] = slot
+        return True
+
+    def discard(self, job_id: str) -> None:
+        slot = self.index.pop(job_id, None)
+        if slot is not None:
+            self.slots[slot].discard(job_id)
+
+    def advance(self, now: float) -> List[str]:
+        """Pop every job whose slot time has passed"""
+        due: List[str] = []
+        while self.cursor_time <= now:
+            slot = self.slots[self.cursor]
+            if slot:
+                due.extend(slot)
+                for job_id in slot:
+                    del self.index[job_id]
+                slot.clear()
+            self.cursor = (self.cursor + 1) % len(self.slots)
+            self.cursor_time += self.tick
+        return due
+
+
+class DelayQueue:
+    """Durable delay queue: Redis sorted set index plus an in-process timing wheel.
+
+    Redis holds every pending job (score = due epoch seconds), so jobs survive
+    restarts. Each worker only loads the slice due within the wheel horizon,
+    which keeps hundreds of thousands of far-future timers out of memory and
+    avoids ever scanning the whole index. A job whose handler raises is
+    retried with backoff and dropped after DELAY_QUEUE_MAX_ATTEMPTS runs.
+    """
+
+    INDEX_KEY = "buttdialer:delay:index"
+    PROCESSING_KEY = "buttdialer:delay:processing"
+    JOBS_KEY = "buttdialer:delay:jobs"
+    LEASE_SECONDS = 300
+
+    def __init__(self):
+        tick = settings.DELAY_QUEUE_TICK_MS / 1000
+        size = math.ceil(settings.DELAY_QUEUE_HORIZON_SECONDS / tick)
+        self.wheel = TimingWheel(tick, size)
+        self.batch_size = settings.DELAY_QUEUE_LOAD_BATCH
+        self.max_attempts = settings.DELAY_QUEUE_MAX_ATTEMPTS
+        self.retry_policy = RetryPolicy(
+            base_delay=settings.DELAY_QUEUE_RETRY_BASE_SECONDS,
+            max_delay=settings.DELAY_QUEUE_RETRY_MAX_SECONDS
+        )
+        self.handlers: Dict[str, JobHandler] = {}
+        self._redis: Optional[redis.Redis] = None
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Set[asyncio.Task] = set()
+        self._loaded_until = 0.0
+
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._redis
+
+    def register(self, job_type: str) -> Callable[[JobHandler], JobHandler]:
+        """Decorator registering the coroutine that runs jobs of job_type"""
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[job_type] = handler
+            return handler
+        return decorator
+
+    async def schedule(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        run_at: Union[datetime, float],
+        job_id: Optional[str] = None
+    ) -> str:
+        """Persist a job and arm it; re-scheduling an existing job_id moves it"""
+        job_id = job_id or f"{job_type}:{uuid4().hex}"
+        due = to_epoch(run_at)
+        job = json.dumps({"id": job_id, "type": job_type, "payload": payload, "run_at": due})
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.JOBS_KEY, job_id, job)
+            pipe.zadd(self.INDEX_KEY, {job_id: due})
+            await pipe.execute()
+
+        self.wheel.discard(job_id)
+        if due <= self._loaded_until:
+            self.wheel.add(job_id, due)
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        """Remove a pending job"""
+        self.wheel.discard(job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.INDEX_KEY, job_id)
+            pipe.hdel(self.JOBS_KEY, job_id)
+            removed, _ = await pipe.execute()
+        return bool(removed)
+
+    def move_sync(self, job_id: str, new_job_id: str, payload: Dict[str, Any]) -> bool:
+        """Re-key a pending job from a process without the queue's event loop (Celery workers).
+        
+        Blocking. Loaders pick the moved job up from the index; a wheel still
+        holding the old id fails to claim it.
+        """
+        client = SyncRedis.from_url(settings.REDIS_URL, socket_timeout=5)
+        try:
+            return bool(client.eval(
+                MOVE_SCRIPT, 2, self.INDEX_KEY, self.JOBS_KEY, job_id, new_job_id, json.dumps(payload)
+            ))
+        finally:
+            client.close()
+
+    def cancel_sync(self, job_id: str) -> None:
+        """Blocking cancel, for Celery workers"""
+        client = SyncRedis.from_url(settings.REDIS_URL, socket_timeout=5)
+        try:
+            with client.pipeline(transaction=True) as pipe:
+                pipe.zrem(self.INDEX_KEY, job_id)
+                pipe.hdel(self.JOBS_KEY, job_id)
+                pipe.execute()
+        finally:
+            client.close()
+
+    async def stats(self) -> Dict[str, int]:
+        return {
+            "pending": await self.redis.zcard(self.INDEX_KEY),
+            "processing": await self.redis.zcard(self.PROCESSING_KEY),
+            "armed": len(self.wheel)
+        }
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        await self._reclaim()
+        await self._load()
+        self._tasks = [
+            asyncio.create_task(self._run_wheel()),
+            asyncio.create_task(self._run_loader())
+        ]
+        logger.info("Delay queue started")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _run_wheel(self) -> None:
+        while True:
+            for job_id in self.wheel.advance(time.time()):
+                task = asyncio.create_task(self._fire(job_id))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+            await asyncio.sleep(max(self.wheel.cursor_time - time.time(), 0))
+
+    async def _run_loader(self) -> None:
+        interval = self.wheel.horizon / 4
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._reclaim()
+                await self._load()
+            except Exception as e:
+                logger.error(f"Error loading delay queue: {str(e)}")
+
+    async def _load(self) -> None:
+        """Arm every job due before the end of the wheel horizon"""
+        until = time.time() + self.wheel.horizon - self.wheel.tick
+        start = 0
+        while True:
+            rows = await self.redis.zrangebyscore(
+                self.INDEX_KEY, "-inf", until,
+                start=start, num=self.batch_size, withscores=True
+            )
+            for job_id, due in rows:
+                self.wheel.add(job_id, due)
+            if len(rows) < self.batch_size:
+                break
+            start += self.batch_size
+        self._loaded_until = until
+
+    async def _reclaim(self) -> None:
+        reclaimed = await self.redis.eval(
+            RECLAIM_SCRIPT, 2, self.PROCESSING_KEY, self.INDEX_KEY,
+            time.time(), self.batch_size
+        )
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} delayed jobs with expired leases")
+
+    async def _fire(self, job_id: str) -> None:
+        try:
+            raw = await self.redis.eval(
+                CLAIM_SCRIPT, 3, self.INDEX_KEY, self.PROCESSING_KEY, self.JOBS_KEY,
+                job_id, time.time() + self.LEASE_SECONDS, time.time() + self.wheel.tick
+            )
+        except Exception as e:
+            logger.error(f"Error claiming delayed job {job_id}: {str(e)}")
+            return
+
+        if not raw:
+            # Claimed by another worker or cancelled
+            return
+
+        job = json.loads(raw)
+        handler = self.handlers.get(job["type"])
+        if handler is None:
+            logger.error(f"No handler registered for delayed job type {job['type']}")
+            DELAY_QUEUE_DROPPED.labels(job["type"], "no_handler").inc()
+        else:
+            try:
+                await handler(job["payload"])
+            except Exception as e:
+                attempts = job.get("attempts", 0) + 1
+                if attempts < self.max_attempts:
+                    await self._retry(job, attempts, e)
+                    return
+                logger.error(f"Dropping delayed job {job_id} after {attempts} attempts: {str(e)}")
+                DELAY_QUEUE_DROPPED.labels(job["type"], "failed").inc()
+
+        try:
+            await self.redis.eval(
+                ACK_SCRIPT, 3, self.PROCESSING_KEY, self.INDEX_KEY, self.JOBS_KEY, job_id
+            )
+        except Exception as e:
+            # The lease expires and the job is reclaimed; handlers must tolerate running twice
+            logger.error(f"Error acking delayed job {job_id}: {str(e)}")
+
+    async def _retry(self, job: Dict[str, Any], attempts: int, error: Exception) -> None:
+        """Put a failed job back in the index to run again after a backoff"""
+        due = time.time() + self.retry_policy.next_delay(attempts)
+        job = {**job, "run_at": due, "attempts": attempts}
+        logger.warning(
+            f"Delayed job {job['id']} failed (attempt {attempts}/{self.max_attempts}), "
+            f"retrying in {due - time.time():.0f}s: {str(error)}"
+        )
+        try:
+            await self.redis.eval(
+                RETRY_SCRIPT, 3, self.PROCESSING_KEY, self.INDEX_KEY, self.JOBS_KEY,
+                job["id"], json.dumps(job), due
+            )
+        except Exception as e:
+            # The lease expires and the job is reclaimed and run again instead
+            logger.error(f"Error re-scheduling delayed job {job['id']}: {str(e)}")
+            return
+        DELAY_QUEUE_RETRIES.labels(job["type"]).inc()
+        if due <= self._loaded_until:
+            self.wheel.add(job["id"], due)
+
+# Singleton instance
+delay_queue = DelayQueue()
@@ -0,0 +1,111 @@
+from time import perf_counter
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.metrics import DIAL_RACE_CANCEL_SECONDS, DIAL_RACE_CANCELS
+from app.services.twilio_service import twilio_service
+
+logger = logging.getLogger(__name__)
+
+ANSWERED = ("answered", "in-progress")
+
+
+class DialRace:
+    """First-answer-wins for the legs of a parallel dial.
+
+    Each leg is registered under its group in Redis as it is created. The
+    first status callback reporting a leg answered wins the group with a
+    SET NX, and the other legs are hung up concurrently. A leg registered
+    after the group was won (the dial was still placing it) is hung up at
+    once: registration adds the leg before reading the winner and the
+    winner is set before reading the legs, so one side always sees the
+    other.
+
+    With AMD_ENABLED an answer may be a voicemail, so the group is settled
+    by the first leg answering-machine detection decides is a person
+    (on_human), and the other legs keep ringing until then.
+    """
+
+    KEY_PREFIX = "buttdialer:dial-group:"
+    LEG_PREFIX = "buttdialer:dial-leg:"
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._redis: Optional[redis.Redis] = None
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+        return self._redis
+
+    async def add_leg(self, group: str, call_sid: str) -> bool:
+        """Register a placed leg; False if the group was already answered (the leg is hung up)"""
+        legs_key = f"{self.KEY_PREFIX}{group}:legs"
+        try:
+            async with self._client().pipeline(transaction=True) as pipe:
+                pipe.sadd(legs_key, call_sid)
+                pipe.expire(legs_key, self.ttl_seconds)
+                pipe.set(f"{self.LEG_PREFIX}{call_sid}", group, ex=self.ttl_seconds)
+                pipe.get(f"{self.KEY_PREFIX}{group}:winner")
+                *_, winner = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Dial race unavailable, leg {call_sid} of {group} won't be cancelled: {e}")
+            return True
+
+        if winner is not None and winner.decode() != call_sid:
+            await self._cancel([call_sid], perf_counter())
+            return False
+        return True
+
+    async def on_status(self, call_sid: str, status: str) -> Optional[str]:
+        """Settle the leg's group on its first answer; returns the group if this leg won it"""
+        if status not in ANSWERED or settings.AMD_ENABLED:
+            return None
+        group, _ = await self._settle(call_sid)
+        return group
+
+    async def on_human(self, call_sid: str) -> bool:
+        """Settle the leg's group on AMD finding a person; False if another leg already won it"""
+        group, won = await self._settle(call_sid)
+        return group is None or won
+
+    async def _settle(self, call_sid: str) -> Tuple[Optional[str], bool]:
+        """(group, whether this leg won it); group is None for a leg outside any
+        group or when Redis is unavailable"""
+        started = perf_counter()
+        client = self._client()
+        try:
+            group = await client.get(f"{self.LEG_PREFIX}{call_sid}")
+            if group is None:
+                return None, False
+            group = group.decode()
+            won = await client.set(f"{self.KEY_PREFIX}{group}:winner", call_sid, nx=True, ex=self.ttl_seconds)
+            if not won:
+                winner = await client.get(f"{self.KEY_PREFIX}{group}:winner")
+                return group, winner is not None and winner.decode() == call_sid
+            legs = await client.smembers(f"{self.KEY_PREFIX}{group}:legs")
+        except Exception as e:
+            logger.warning(f"Dial race unavailable for {call_sid}: {e}")
+            return None, False
+
+        losers = [leg.decode() for leg in legs if leg.decode() != call_sid]
+        logger.info(f"Dial group {group} answered by {call_sid}, cancelling {len(losers)} legs")
+        await self._cancel(losers, started)
+        return group, True
+
+    async def _cancel(self, call_sids: List[str], started: float) -> None:
+        if not call_sids:
+            return
+        results = await asyncio.gather(
+            *(asyncio.to_thread(twilio_service.end_call, sid) for sid in call_sids)
+        )
+        DIAL_RACE_CANCEL_SECONDS.observe(perf_counter() - started)
+        for ended in results:
+            DIAL_RACE_CANCELS.labels("cancelled" if ended else "failed").inc()
+
+
+dial_race = DialRace(ttl_seconds=settings.DIAL_RACE_TTL_SECONDS)
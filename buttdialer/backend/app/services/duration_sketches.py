@@ -0,0 +1,143 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.sketch import QuantileSketch
+from app.models.call import Call, CallDurationSketch
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+# Advisory lock class for (class, day ordinal) transaction locks: live merges
+# hold a day shared, a backfill holds its days exclusively
+SKETCH_DAY_LOCK = 0x5ce7
+
+
+def call_samples(call: Call) -> Dict[str, float]:
+    """Talk and ring time (seconds) of an ended call.
+    
+    Only answered calls are sampled: ring time is the time to answer, talk
+    time the billed duration.
+    """
+    if not call.answered_at:
+        return {}
+    samples = {"talk": float(call.duration or 0)}
+    if call.started_at:
+        samples["ring"] = max((call.answered_at - call.started_at).total_seconds(), 0.0)
+    return samples
+
+
+def _add(db: Session, day: date, agent_id: int, campaign_id: int, metric: str, sketch: QuantileSketch) -> None:
+    key = {"day": day, "agent_id": agent_id, "campaign_id": campaign_id, "metric": metric}
+    # Create the row if needed, then merge under a row lock so concurrent
+    # webhooks for the same agent and day don't lose samples
+    db.execute(
+        insert(CallDurationSketch)
+        .values(**key, count=0, sketch=QuantileSketch().to_bytes(), updated_at=datetime.utcnow())
+        .on_conflict_do_nothing(constraint="_sketch_key_uc")
+    )
+    row = db.query(CallDurationSketch).filter_by(**key).with_for_update().one()
+    merged = QuantileSketch.from_bytes(row.sketch)
+    merged.merge(sketch)
+    row.sketch = merged.to_bytes()
+    row.count = merged.count
+
+
+def record_call(db: Session, call: Call) -> None:
+    """Add an ended call to its day's sketches, in the caller's transaction"""
+    samples = call_samples(call)
+    if not samples:
+        return
+    day = call.started_at.date() if call.started_at else datetime.utcnow().date()
+    # Waits while a backfill is rebuilding this day
+    db.execute(
+        text("SELECT pg_advisory_xact_lock_shared(:lock, :day)"),
+        {"lock": SKETCH_DAY_LOCK, "day": day.toordinal()}
+    )
+    for metric, value in samples.items():
+        sketch = QuantileSketch()
+        sketch.add(value)
+        _add(db, day, call.agent_id, call.campaign_id or 0, metric, sketch)
+
+
+def backfill(db: Session, date_from: date, date_to: date) -> int:
+    """Rebuild the sketches of [date_from, date_to] from the calls table.
+    
+    Calls already moved to the archive are no longer in the table, so only
+    rebuild days that have not been archived. The days are locked against
+    record_call first: calls ending meanwhile wait and are merged into the
+    rebuilt rows, and calls committed before the lock are read below.
+    """
+    db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(:lock, day) "
+            "FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS day ORDER BY day"
+        ),
+        {"lock": SKETCH_DAY_LOCK, "first": date_from.toordinal(), "last": date_to.toordinal()}
+    )
+    sketches: Dict[Tuple[date, int, int, str], QuantileSketch] = defaultdict(QuantileSketch)
+    calls = db.query(
+        Call.agent_id, Call.campaign_id, Call.started_at, Call.answered_at, Call.duration
+    ).filter(
+        Call.answered_at.isnot(None),
+        Call.started_at >= datetime.combine(date_from, datetime.min.time()),
+        Call.started_at < datetime.combine(date_to, datetime.max.time())
+    ).yield_per(5000)
+    
+    sampled = 0
+    for call in calls:
+        for metric, value in call_samples(call).items():
+            sketches[(call.started_at.date(), call.agent_id, call.campaign_id or 0, metric)].add(value)
+        sampled += 1
+    
+    db.query(CallDurationSketch).filter(
+        CallDurationSketch.day >= date_from,
+        CallDurationSketch.day <= date_to
+    ).delete(synchronize_session=False)
+    db.add_all([
+        CallDurationSketch(
+            day=day, agent_id=agent_id, campaign_id=campaign_id, metric=metric,
+            count=sketch.count, sketch=sketch.to_bytes()
+        )
+        for (day, agent_id, campaign_id, metric), sketch in sketches.items()
+    ])
+    db.commit()
+    logger.info(f"Rebuilt {len(sketches)} duration sketches from {sampled} calls")
+    return sampled
+
+
+def percentiles(
+    db: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    agent_id: Optional[int] = None,
+    campaign_id: Optional[int] = None,
+) -> Dict[str, dict]:
+    """Merge the matching daily sketches into p50/p90/p99 per metric"""
+    query = db.query(CallDurationSketch.metric, CallDurationSketch.sketch)
+    if date_from:
+        query = query.filter(CallDurationSketch.day >= date_from)
+    if date_to:
+        query = query.filter(CallDurationSketch.day <= date_to)
+    if agent_id is not None:
+        query = query.filter(CallDurationSketch.agent_id == agent_id)
+    if campaign_id is not None:
+        query = query.filter(CallDurationSketch.campaign_id == campaign_id)
+    
+    merged = {"talk": QuantileSketch(), "ring": QuantileSketch()}
+    for metric, data in query:
+        merged[metric].merge(QuantileSketch.from_bytes(data))
+    
+    return {
+        f"{metric}_time": {
+            "count": sketch.count,
+            **{name: sketch.quantile(q) for name, q in QUANTILES.items()}
+        }
+        for metric, sketch in merged.items()
+    }
@@ -1,30 +1,40 @@
 import httpx
 import logging
-from typing import Optional, Dict, Any
+from time import perf_counter
+from typing import Optional, Dict, Any, AsyncIterator
 import base64
 from app.core.config import settings
+from app.core.metrics import (
+    PROVIDER_ERRORS,
+    PROVIDER_REQUEST_DURATION,
+    TTS_TIME_TO_FIRST_BYTE,
+    track_provider,
+)
 
 logger = logging.getLogger(__name__)
 
 class ElevenLabsService:
     def __init__(self):
         self.api_key = settings.ELEVENLABS_API_KEY
-        self.base_url = "https://api.elevenlabs.io/v1"
+        self.base_url = settings.ELEVENLABS_API_BASE_URL
         self.headers = {
             "Accept": "audio/mpeg",
             "Content-Type": "application/json",
             "xi-api-key": self.api_key
         }
         
+    @track_provider("elevenlabs", "text_to_speech")
     async def text_to_speech(
         self, 
         text: str, 
         voice_id: str = "21m00Tcm4TlvDq8ikWAM",  # Rachel voice (default)
-        model_id: str = "eleven_monolingual_v1"
+        model_id: str = "eleven_monolingual_v1",
+        output_format: Optional[str] = None
     ) -> Optional[bytes]:
-        """Convert text to speech using ElevenLabs API"""
+        """Convert text to speech using ElevenLabs API (MP3 unless output_format, e.g. pcm_16000)"""
         try:
             url = f"{self.base_url}/text-to-speech/{voice_id}"
+            params = {"output_format": output_format} if output_format else None
             
             payload = {
                 "text": text,
@@ -35,15 +45,19 @@ class ElevenLabsService:
                 }
             }
             
+            started = perf_counter()
             async with httpx.AsyncClient() as client:
                 response = await client.post(
                     url,
                     json=payload,
+                    params=params,
                     headers=self.headers,
                     timeout=30.0
                 )
                 
                 if response.status_code == 200:
+                    # Nothing is playable until the whole body has arrived
+                    TTS_TIME_TO_FIRST_BYTE.labels("buffered").observe(perf_counter() - started)
                     return response.content
                 else:
                     logger.error(f"ElevenLabs API error: {response.status_code} - {response.text}")
@@ -53,6 +67,62 @@ class ElevenLabsService:
             logger.error(f"Error in text_to_speech: {str(e)}")
             return None
     
+    async def text_to_speech_stream(
+        self,
+        text: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        model_id: str = "eleven_monolingual_v1",
+        output_format: Optional[str] = None,
+        optimize_streaming_latency: int = 3
+    ) -> AsyncIterator[bytes]:
+        """Yield MP3 chunks from the streaming endpoint as they are generated.
+        
+        Yields nothing if the request fails before any audio; a failure after
+        that is raised so callers don't mistake a cut-off stream for a whole
+        one. Not wrapped in track_provider, which only times coroutines.
+        """
+        url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
+        params = {"optimize_streaming_latency": optimize_streaming_latency}
+        if output_format:
+            params["output_format"] = output_format
+        payload = {
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.75
+            }
+        }
+        
+        duration = PROVIDER_REQUEST_DURATION.labels("elevenlabs", "text_to_speech_stream")
+        errors = PROVIDER_ERRORS.labels("elevenlabs", "text_to_speech_stream")
+        started = perf_counter()
+        first = True
+        try:
+            # No overall timeout: long messages keep streaming; stalls still time out
+            timeout = httpx.Timeout(10.0, read=10.0)
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                async with client.stream("POST", url, json=payload, params=params, headers=self.headers) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        logger.error(f"ElevenLabs stream error: {response.status_code} - {body[:200]!r}")
+                        errors.inc()
+                        return
+                    
+                    async for chunk in response.aiter_bytes():
+                        if first:
+                            TTS_TIME_TO_FIRST_BYTE.labels("streaming").observe(perf_counter() - started)
+                            first = False
+                        yield chunk
+        except Exception as e:
+            logger.error(f"Error in text_to_speech_stream: {str(e)}")
+            errors.inc()
+            if not first:
+                raise
+        finally:
+            duration.observe(perf_counter() - started)
+    
+    @track_provider("elevenlabs", "get_voices")
     async def get_voices(self) -> Optional[Dict[str, Any]]:
         """Get available voices from ElevenLabs"""
         try:
@@ -75,6 +145,7 @@ class ElevenLabsService:
             logger.error(f"Error getting voices: {str(e)}")
             return None
     
+    @track_provider("elevenlabs", "get_user_info")
     async def get_user_info(self) -> Optional[Dict[str, Any]]:
         """Get user subscription info including character usage"""
         try:
@@ -97,13 +168,15 @@ class ElevenLabsService:
             logger.error(f"Error getting user info: {str(e)}")
             return None
     
+    @track_provider("elevenlabs", "generate_campaign_message")
     async def generate_campaign_message(
         self,
         template: str,
         contact_name: str,
         voice_id: str = "21m00Tcm4TlvDq8ikWAM"
     ) -> Optional[bytes]:
-        """Generate personalized campaign message"""
+        """Generate one personalized campaign message (a full synthesis; whole
+        campaigns are rendered from cached segments by tts_renderer.render_campaign)"""
         # Replace placeholders in template
         message = template.replace("{name}", contact_name)
         
@@ -3,18 +3,20 @@ import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from app.core.config import settings
+from app.core.metrics import track_provider
 
 logger = logging.getLogger(__name__)
 
 class HubSpotService:
     def __init__(self):
         self.api_key = settings.HUBSPOT_API_KEY
-        self.base_url = "https://api.hubapi.com"
+        self.base_url = settings.HUBSPOT_API_BASE_URL
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
     
+    @track_provider("hubspot", "create_or_update_contact")
     async def create_or_update_contact(
         self,
         email: Optional[str] = None,
@@ -103,6 +105,7 @@ class HubSpotService:
             logger.error(f"Error getting contact by email: {str(e)}")
             return None
     
+    @track_provider("hubspot", "search_contacts")
     async def search_contacts(self, query: str) -> Optional[Dict[str, Any]]:
         """Search contacts"""
         try:
@@ -131,6 +134,7 @@ class HubSpotService:
             logger.error(f"Error searching contacts: {str(e)}")
             return None
     
+    @track_provider("hubspot", "log_call_activity")
     async def log_call_activity(
         self,
         contact_id: str,
@@ -188,6 +192,7 @@ class HubSpotService:
             logger.error(f"Error logging call activity: {str(e)}")
             return None
     
+    @track_provider("hubspot", "sync_contacts_to_database")
     async def sync_contacts_to_database(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Sync contacts from HubSpot to local database"""
         try:
@@ -215,6 +220,7 @@ class HubSpotService:
             logger.error(f"Error syncing contacts: {str(e)}")
             return []
     
+    @track_provider("hubspot", "create_deal")
     async def create_deal(
         self,
         deal_name: str,
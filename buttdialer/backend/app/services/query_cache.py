@@ -0,0 +1,289 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import uuid4
+import asyncio
+import json
+import logging
+import zlib
+
+import redis
+import redis.asyncio as aioredis
+from fastapi.responses import Response
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import QUERY_CACHE_INVALIDATIONS, QUERY_CACHE_LOOKUPS
+from app.db.session import SessionLocal
+from app.models.campaign import Campaign
+from app.models.contact import Contact
+from app.models.team import Team, TeamMember
+
+logger = logging.getLogger(__name__)
+
+INVALIDATIONS_CHANNEL = "buttdialer:query-cache:invalidations"
+
+# Cached namespaces written through these models, and the attribute naming
+# the row an entry depends on. A row write bumps "<namespace>:<value>" and
+# "<namespace>:list"; a bulk UPDATE/DELETE bumps the whole namespace.
+WATCHED = {
+    Team: ("teams", "id"),
+    TeamMember: ("teams", "team_id"),
+    Campaign: ("campaigns", "id"),
+    Contact: ("contacts", "id"),
+}
+
+
+class QueryCache:
+    """Read-through cache of serialized JSON responses for polled read endpoints.
+
+    Entries live in an in-process LRU (at most local_ttl seconds) in front of
+    Redis (per-namespace TTL), keyed by namespace, principal scope and query.
+    Each entry depends on tags. A committed write to a watched model gives
+    its tags new generations in Redis and publishes them: Redis entries
+    carry the generations they were loaded under and are ignored once any
+    has moved, and every API process drops local entries on the message.
+    The local tier is only used while this process is subscribed.
+
+    In the API, commits hand their tags to the event loop, which publishes
+    them with the async client; processes without a started cache (Celery
+    workers) publish synchronously from the commit.
+    """
+
+    KEY_PREFIX = "buttdialer:query-cache:"
+    LOCAL_BUCKETS = 4096
+
+    def __init__(self, ttls: dict, local_ttl: float, capacity: int, enabled: bool = True):
+        self.ttls = ttls
+        self.local_ttl = local_ttl
+        self.capacity = capacity
+        self.enabled = enabled
+        # Local invalidation counters, hashed into buckets so they stay bounded
+        self._versions = [0] * self.LOCAL_BUCKETS
+        self._local: "OrderedDict[str, Tuple[float, tuple, bytes]]" = OrderedDict()
+        self._listening = False
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._publishing: Set[asyncio.Task] = set()
+        self._redis: Optional[aioredis.Redis] = None
+        self._publisher: Optional[redis.Redis] = None
+
+    def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+        return self._redis
+
+    def _sync_client(self) -> redis.Redis:
+        if self._publisher is None:
+            self._publisher = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+        return self._publisher
+
+    def _bucket(self, tag: str) -> int:
+        return zlib.crc32(tag.encode()) % self.LOCAL_BUCKETS
+
+    def _local_versions(self, tags: Sequence[str]) -> tuple:
+        return tuple(self._versions[self._bucket(tag)] for tag in tags)
+
+    def _remember(self, key: str, versions: tuple, body: bytes) -> None:
+        self._local[key] = (monotonic() + self.local_ttl, versions, body)
+        self._local.move_to_end(key)
+        if len(self._local) > self.capacity:
+            self._local.popitem(last=False)
+
+    async def response(
+        self,
+        namespace: str,
+        key: str,
+        tags: Iterable[str],
+        load: Callable[[], Response],
+        scope: str = "*"
+    ) -> Response:
+        """The cached body for (namespace, scope, key), else load() and cache its body.
+
+        load() runs the query and returns a JSON response; exceptions (e.g.
+        a 404) propagate and nothing is cached.
+        """
+        if not self.enabled:
+            return load()
+        tags = (namespace, *tags)
+        cache_key = f"{namespace}:{scope}:{key}"
+        # Before any lookup, so an invalidation during the load is not missed
+        versions = self._local_versions(tags)
+
+        entry = self._local.get(cache_key)
+        if entry is not None and self._listening and entry[0] > monotonic() and entry[1] == versions:
+            self._local.move_to_end(cache_key)
+            QUERY_CACHE_LOOKUPS.labels(namespace, "local").inc()
+            return Response(entry[2], media_type="application/json")
+
+        header = None
+        try:
+            async with self._client().pipeline(transaction=False) as pipe:
+                pipe.mget([f"{self.KEY_PREFIX}gen:{tag}" for tag in tags])
+                pipe.get(self.KEY_PREFIX + cache_key)
+                generations, stored = await pipe.execute()
+            header = ",".join((g or b"0").decode() for g in generations).encode()
+            if stored is not None:
+                stored_header, _, body = stored.partition(b"\n")
+                if stored_header == header:
+                    if self._listening:
+                        self._remember(cache_key, versions, body)
+                    QUERY_CACHE_LOOKUPS.labels(namespace, "redis").inc()
+                    return Response(body, media_type="application/json")
+        except Exception as e:
+            logger.warning(f"Query cache unavailable for {cache_key}: {e}")
+
+        QUERY_CACHE_LOOKUPS.labels(namespace, "miss" if header is not None else "error").inc()
+        body = load().body
+        if header is None:
+            # Without the generations there is no telling when to drop it
+            return Response(body, media_type="application/json")
+        try:
+            await self._client().set(
+                self.KEY_PREFIX + cache_key, header + b"\n" + body, ex=self.ttls.get(namespace, 60)
+            )
+        except Exception as e:
+            logger.warning(f"Could not cache {cache_key}: {e}")
+        if self._listening:
+            self._remember(cache_key, versions, body)
+        return Response(body, media_type="application/json")
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        """Bump tags after a committed write (called from ORM events; doesn't block the loop)"""
+        tags = sorted(set(tags))
+        if not tags or self._loop is None:
+            if tags:
+                self._invalidate_sync(tags)
+            return
+        # This process stops serving the old entries right away
+        self._bump(tags)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            task = self._loop.create_task(self._publish(tags))
+            self._publishing.add(task)
+            task.add_done_callback(self._publishing.discard)
+        else:
+            # Committed from a worker thread (a sync endpoint or asyncio.to_thread)
+            asyncio.run_coroutine_threadsafe(self._publish(tags), self._loop)
+
+    def _generation_writes(self, pipe, tags: List[str]) -> None:
+        # A fresh random generation rather than a counter, so a tag whose key
+        # expired can't come back to a value an old entry was stored under
+        generation = uuid4().hex[:16]
+        expiry = max(self.ttls.values(), default=60) + 60
+        for tag in tags:
+            pipe.set(f"{self.KEY_PREFIX}gen:{tag}", generation, ex=expiry)
+        pipe.publish(INVALIDATIONS_CHANNEL, json.dumps(tags))
+
+    async def _publish(self, tags: List[str]) -> None:
+        try:
+            async with self._client().pipeline(transaction=False) as pipe:
+                self._generation_writes(pipe, tags)
+                await pipe.execute()
+        except Exception as e:
+            # Redis entries then expire by TTL; local ones are not trusted while unsubscribed
+            logger.warning(f"Could not invalidate query cache tags {tags[:5]}: {e}")
+        # Again after the Redis write: an entry this process fetched from Redis
+        # meanwhile was remembered under the bumped counters
+        self._bump(tags)
+        for tag in tags:
+            QUERY_CACHE_INVALIDATIONS.labels(tag.split(":", 1)[0]).inc()
+
+    def _invalidate_sync(self, tags: List[str]) -> None:
+        try:
+            with self._sync_client().pipeline(transaction=False) as pipe:
+                self._generation_writes(pipe, tags)
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not invalidate query cache tags {tags[:5]}: {e}")
+        for tag in tags:
+            QUERY_CACHE_INVALIDATIONS.labels(tag.split(":", 1)[0]).inc()
+
+    def _bump(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._versions[self._bucket(tag)] += 1
+
+    # Invalidation stream
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._publishing:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+        self._loop = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._listening = False
+        self._local.clear()
+
+    async def _run(self) -> None:
+        while True:
+            client = aioredis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATIONS_CHANNEL)
+                # Messages may have been missed while unsubscribed
+                self._local.clear()
+                self._listening = True
+                async for message in pubsub.listen():
+                    self._bump(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Query cache invalidation stream error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                self._listening = False
+                await pubsub.close()
+                await client.close()
+
+
+query_cache = QueryCache(
+    ttls=settings.QUERY_CACHE_TTL_SECONDS,
+    local_ttl=settings.QUERY_CACHE_LOCAL_TTL_SECONDS,
+    capacity=settings.QUERY_CACHE_LRU_SIZE,
+    enabled=settings.QUERY_CACHE_ENABLED,
+)
+
+
+def _pending(session) -> set:
+    return session.info.setdefault("query_cache_tags", set())
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_row_writes(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        watched = WATCHED.get(type(instance))
+        if watched is not None:
+            namespace, attribute = watched
+            _pending(session).update((f"{namespace}:list", f"{namespace}:{getattr(instance, attribute)}"))
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    for mapper in orm_execute_state.all_mappers:
+        watched = WATCHED.get(mapper.class_)
+        if watched is not None:
+            _pending(orm_execute_state.session).add(watched[0])
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed(session):
+    tags = session.info.pop("query_cache_tags", None)
+    if tags:
+        query_cache.invalidate(tags)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_uncommitted(session):
+    session.info.pop("query_cache_tags", None)
@@ -0,0 +1,77 @@
+from time import perf_counter
+from typing import Optional
+import asyncio
+import hashlib
+import logging
+
+import redis.asyncio as redis
+
+from app.core.audio import telephony_wav
+from app.core.config import settings
+from app.core.metrics import AUDIO_TRANSCODE_DURATION
+from app.services.audio_store import audio_store
+from app.services.elevenlabs_service import elevenlabs_service
+
+logger = logging.getLogger(__name__)
+
+
+def transcode(pcm: bytes, rate: int) -> bytes:
+    started = perf_counter()
+    wav = telephony_wav(pcm, rate)
+    AUDIO_TRANSCODE_DURATION.observe(perf_counter() - started)
+    return wav
+
+
+class TelephonyPrompts:
+    """TTS prompts stored ready to play: 8 kHz mu-law WAV, made once per voice and text.
+
+    ElevenLabs is asked for raw PCM (TTS_SOURCE_FORMAT) rather than MP3, so
+    there is nothing to decode; the PCM is resampled and mu-law encoded
+    here and Twilio plays the stored file without transcoding it at answer
+    time.
+    """
+
+    ASSET_PREFIX = "buttdialer:tts-prompt:"
+    ASSET_TTL_SECONDS = 30 * 24 * 60 * 60
+
+    def __init__(self, source_format: str):
+        self.source_format = source_format
+        self.source_rate = int(source_format.split("_")[1])
+        self._redis: Optional[redis.Redis] = None
+        self._rendering = {}
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+        return self._redis
+
+    def _key(self, text: str, voice_id: str) -> str:
+        return hashlib.sha256(f"{voice_id}\n{self.source_format}\n{text}".encode()).hexdigest()
+
+    async def get(self, text: str, voice_id: str) -> Optional[str]:
+        """Audio store digest of the prompt's WAV, synthesizing it on first use"""
+        key = self._key(text, voice_id)
+        digest = await self._client().get(self.ASSET_PREFIX + key)
+        if digest is not None:
+            return digest.decode()
+
+        # Concurrent requests for the same prompt in this process share one render
+        task = self._rendering.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(key, text, voice_id))
+            self._rendering[key] = task
+            task.add_done_callback(lambda _: self._rendering.pop(key, None))
+        return await task
+
+    async def _render(self, key: str, text: str, voice_id: str) -> Optional[str]:
+        pcm = await elevenlabs_service.text_to_speech(text, voice_id, output_format=self.source_format)
+        if pcm is None:
+            return None
+        wav = await asyncio.to_thread(transcode, pcm, self.source_rate)
+        digest = await asyncio.to_thread(audio_store.put, wav, "wav")
+        await self._client().set(self.ASSET_PREFIX + key, digest, ex=self.ASSET_TTL_SECONDS)
+        logger.info(f"Stored telephony prompt {digest[:12]} ({len(wav)} bytes)")
+        return digest
+
+
+telephony_prompts = TelephonyPrompts(settings.TTS_SOURCE_FORMAT)
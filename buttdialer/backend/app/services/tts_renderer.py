@@ -0,0 +1,215 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import re
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.audio import telephony_wav
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.campaign import Campaign, CampaignCall
+from app.models.contact import Contact
+from app.services.audio_store import audio_store
+from app.services.elevenlabs_service import elevenlabs_service
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+# Segments are fetched as raw 16-bit mono PCM so they can be joined sample
+# for sample; MP3 frames would need re-encoding to splice cleanly
+OUTPUT_FORMAT = "pcm_16000"
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+@dataclass(frozen=True)
+class Segment:
+    text: str
+    variable: Optional[str] = None  # placeholder name; None for static text
+
+
+def contact_values(contact) -> Dict[str, str]:
+    """Placeholder values for a contact: its custom fields, {name}/{first_name}, {last_name} and {company}"""
+    values = {key: str(value) for key, value in (contact.custom_fields or {}).items() if value is not None}
+    values.update({
+        "name": contact.first_name or "",
+        "first_name": contact.first_name or "",
+        "last_name": contact.last_name or "",
+        "company": contact.company or "",
+    })
+    return values
+
+
+def split_template(template: str) -> List[Segment]:
+    """Split "Hi {name}, this is Acme" into static and variable segments"""
+    segments = []
+    position = 0
+    for match in PLACEHOLDER.finditer(template):
+        static = template[position:match.start()].strip()
+        if static:
+            segments.append(Segment(static))
+        segments.append(Segment(match.group(0), variable=match.group(1)))
+        position = match.end()
+    tail = template[position:].strip()
+    if tail:
+        segments.append(Segment(tail))
+    return segments
+
+
+class SegmentRenderer:
+    """Renders a personalized template by splicing cached segment audio.
+
+    Static segments are synthesized once per template and variable segments
+    once per distinct value (e.g. each first name), with at most
+    `concurrency` ElevenLabs requests in flight; concurrent requests for the
+    same text share one synthesis.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        concurrency: int = None,
+        gap_ms: int = None
+    ):
+        self.segments = split_template(template)
+        self.voice_id = voice_id
+        self._semaphore = asyncio.Semaphore(concurrency or settings.TTS_RENDER_CONCURRENCY)
+        gap_ms = settings.TTS_SEGMENT_GAP_MS if gap_ms is None else gap_ms
+        # Short silence at each splice hides the prosody break between segments
+        self._gap = bytes(int(SAMPLE_RATE * gap_ms / 1000) * SAMPLE_WIDTH)
+        self._audio: Dict[str, asyncio.Task] = {}
+        self.syntheses = 0
+        self.synthesized_chars = 0
+        self.contacts_served = 0
+
+    def _texts(self, values: Dict[str, str]) -> List[str]:
+        texts = []
+        for segment in self.segments:
+            text = segment.text if segment.variable is None else (values.get(segment.variable) or "").strip()
+            if text:
+                texts.append(text)
+        return texts
+
+    async def _synthesize(self, text: str) -> Optional[bytes]:
+        async with self._semaphore:
+            self.syntheses += 1
+            self.synthesized_chars += len(text)
+            pcm = await elevenlabs_service.text_to_speech(text, self.voice_id, output_format=OUTPUT_FORMAT)
+        if pcm is None:
+            # Let a later contact retry this text instead of caching the failure
+            self._audio.pop(text, None)
+        return pcm
+
+    def _segment_audio(self, text: str) -> "asyncio.Task[Optional[bytes]]":
+        task = self._audio.get(text)
+        if task is None:
+            task = asyncio.ensure_future(self._synthesize(text))
+            self._audio[text] = task
+        return task
+
+    async def render(self, values: Dict[str, str]) -> Optional[bytes]:
+        """8 kHz mu-law WAV for one contact, or None if a segment could not be synthesized"""
+        parts = await asyncio.gather(*(self._segment_audio(text) for text in self._texts(values)))
+        if not parts or any(part is None for part in parts):
+            return None
+        self.contacts_served += 1
+        return telephony_wav(self._gap.join(parts), SAMPLE_RATE)
+
+    async def render_many(
+        self,
+        contacts: Iterable[Tuple[int, Dict[str, str]]],
+        sink: Callable[[int, bytes], Awaitable[None]]
+    ) -> Dict[str, float]:
+        """Render (contact_id, values) pairs and hand each WAV to sink.
+
+        Contacts are rendered in windows so memory stays bounded however
+        large the campaign; the semaphore bounds provider concurrency.
+        """
+        window: List[Tuple[int, Dict[str, str]]] = []
+        failed = 0
+
+        async def flush():
+            nonlocal failed
+            results = await asyncio.gather(*(self.render(values) for _, values in window))
+            for (contact_id, _), audio in zip(window, results):
+                if audio is None:
+                    failed += 1
+                    logger.error(f"TTS render failed for contact {contact_id}")
+                else:
+                    await sink(contact_id, audio)
+            window.clear()
+
+        for contact in contacts:
+            window.append(contact)
+            if len(window) >= 256:
+                await flush()
+        if window:
+            await flush()
+
+        stats = self.stats()
+        stats["failed"] = failed
+        logger.info(f"Rendered campaign audio: {stats}")
+        return stats
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "contacts_served": self.contacts_served,
+            "unique_syntheses": self.syntheses,
+            "synthesized_chars": self.synthesized_chars,
+            "syntheses_per_contact": self.syntheses / self.contacts_served if self.contacts_served else 0.0,
+        }
+
+
+def render_campaign(db: Session, campaign_id: int, batch_size: int = 500) -> Dict[str, float]:
+    """Render a campaign's tts_message for each pending lead into the audio store.
+
+    Each campaign call gets the digest of its contact's WAV, replacing any
+    rendered from an earlier version of the message. Leads are streamed and
+    digests committed every batch_size leads, so a failed run keeps what it
+    rendered. Blocking: runs its own event loop, so call it from a worker,
+    not from a request handler.
+    """
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if not campaign or not campaign.tts_message:
+        return {}
+    template, voice_id = campaign.tts_message, campaign.tts_voice_id or "21m00Tcm4TlvDq8ikWAM"
+    leads = db.query(
+        CampaignCall.id, Contact.first_name, Contact.last_name, Contact.company, Contact.custom_fields
+    ).join(Contact, Contact.id == CampaignCall.contact_id).filter(
+        CampaignCall.campaign_id == campaign.id,
+        CampaignCall.status.in_(("pending", "scheduled")),
+        Contact.is_dnc.isnot(True)
+    ).yield_per(batch_size)
+    # Commits on the read session would close the streaming cursor
+    writer = SessionLocal()
+    digests: Dict[int, str] = {}
+
+    def flush() -> None:
+        writer.execute(
+            update(CampaignCall),
+            [{"id": campaign_call_id, "audio_digest": digest} for campaign_call_id, digest in digests.items()]
+        )
+        writer.commit()
+        digests.clear()
+
+    async def store(campaign_call_id: int, wav: bytes) -> None:
+        digests[campaign_call_id] = await asyncio.to_thread(audio_store.put, wav, "wav")
+        if len(digests) >= batch_size:
+            flush()
+
+    async def render() -> Dict[str, float]:
+        renderer = SegmentRenderer(template, voice_id)
+        return await renderer.render_many(((lead.id, contact_values(lead)) for lead in leads), store)
+
+    try:
+        stats = asyncio.run(render())
+        if digests:
+            flush()
+    finally:
+        writer.close()
+    return stats
@@ -0,0 +1,119 @@
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.metrics import TTS_STREAMS
+from app.services.audio_store import audio_store
+from app.services.elevenlabs_service import elevenlabs_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+
+
+class TTSStreamer:
+    """Relays ElevenLabs streaming audio to Twilio <Play> fetches.
+
+    A stream is registered under an unguessable token (kept in Redis so any
+    API process can serve the fetch). The first fetch relays chunks as
+    ElevenLabs generates them, with chunked transfer, while teeing them into
+    the audio store; once a stream has completed, later fetches of the same
+    voice and text are served from the stored asset.
+    """
+
+    KEY_PREFIX = "buttdialer:tts-stream:"
+    ASSET_PREFIX = "buttdialer:tts-asset:"
+    ASSET_TTL_SECONDS = 30 * 24 * 60 * 60
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._redis: Optional[redis.Redis] = None
+        self._storing = set()
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+        return self._redis
+
+    async def create(self, text: str, voice_id: str = DEFAULT_VOICE_ID) -> str:
+        token = uuid4().hex
+        request = json.dumps({"text": text, "voice_id": voice_id})
+        await self._client().set(self.KEY_PREFIX + token, request, ex=self.ttl_seconds)
+        return token
+
+    async def resolve(self, token: str) -> Optional[dict]:
+        request = await self._client().get(self.KEY_PREFIX + token)
+        return json.loads(request) if request else None
+
+    @staticmethod
+    def _asset_key(request: dict) -> str:
+        return hashlib.sha256(f"{request['voice_id']}\n{request['text']}".encode()).hexdigest()
+
+    async def stored(self, request: dict) -> Optional[str]:
+        """Audio store digest of a completed stream of this text, if there is one"""
+        digest = await self._client().get(self.ASSET_PREFIX + self._asset_key(request))
+        if digest is None:
+            return None
+        TTS_STREAMS.labels("stored").inc()
+        return digest.decode()
+
+    async def start(self, request: dict) -> Optional[AsyncIterator[bytes]]:
+        """Start synthesis and wait for the first chunk.
+
+        Returns None if ElevenLabs fails before any audio, so the route can
+        answer with an error instead of a 200 with an empty body.
+        """
+        chunks = elevenlabs_service.text_to_speech_stream(request["text"], request["voice_id"])
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            TTS_STREAMS.labels("failed").inc()
+            return None
+        TTS_STREAMS.labels("relayed").inc()
+        return self._relay(request, first, chunks)
+
+    async def _relay(self, request: dict, first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        # Written to a staging file and only stored once complete, so a
+        # cut-off stream never becomes an asset
+        partial = audio_store.staging_file()
+        digest = hashlib.sha256()
+        out = open(partial, "wb")
+        complete = False
+        try:
+            # Small appends to the page cache; not worth a thread hop per chunk
+            digest.update(first)
+            out.write(first)
+            yield first
+            async for chunk in chunks:
+                digest.update(chunk)
+                out.write(chunk)
+                yield chunk
+            complete = True
+        finally:
+            out.close()
+            if complete:
+                # Stored in the background so an S3 upload doesn't hold the response open
+                task = asyncio.create_task(self._store(request, partial, digest.hexdigest()))
+                self._storing.add(task)
+                task.add_done_callback(self._storing.discard)
+            else:
+                logger.warning("TTS stream ended early, not stored")
+                os.remove(partial)
+
+    async def _store(self, request: dict, partial: str, digest: str) -> None:
+        try:
+            await asyncio.to_thread(audio_store.put_file, partial, "mp3", digest)
+            await self._client().set(self.ASSET_PREFIX + self._asset_key(request), digest,
+                                     ex=self.ASSET_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Error storing streamed TTS audio: {e}")
+
+
+tts_streamer = TTSStreamer(settings.TTS_STREAM_TTL_SECONDS)
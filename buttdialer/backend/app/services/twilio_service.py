@@ -1,22 +1,58 @@
 from typing import List, Optional, Dict, Any
-from twilio.rest import Client
 from twilio.jwt.access_token import AccessToken
 from twilio.jwt.access_token.grants import VoiceGrant
-from twilio.twiml.voice_response import VoiceResponse, Dial, Gather
+from twilio.twiml.voice_response import VoiceResponse, Dial, Gather, Start
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from uuid import uuid4
+import hashlib
+import hmac
 import logging
+import re
+import time
 
 from app.core.config import settings
+from app.core.metrics import CALL_ANSWER_LATENCY, CALL_RING_SECONDS, track_provider
 from app.models.call import Call, CallRecording
 from app.db.session import SessionLocal
+from app.services import call_events, duration_sketches
+from app.services.call_events import call_event_log
+from app.services.call_board import call_event, publish_board_event, publish_board_update
 
 logger = logging.getLogger(__name__)
 
+def _build_client():
+    """Create the Twilio REST client (imports twilio.rest and requests on first use)"""
+    from twilio.rest import Client
+    from twilio.http.http_client import TwilioHttpClient
+    
+    http_client = None
+    if settings.TWILIO_API_BASE_URL:
+        base_url = settings.TWILIO_API_BASE_URL.rstrip('/')
+        
+        class RedirectingHttpClient(TwilioHttpClient):
+            """Send Twilio REST traffic to another host, e.g. the load-test simulator"""
+            
+            def request(self, method, url, *args, **kwargs):
+                url = re.sub(r"^https://[^/]+\.twilio\.com", base_url, url)
+                return super().request(method, url, *args, **kwargs)
+        
+        http_client = RedirectingHttpClient()
+    
+    return Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+
 class TwilioService:
     def __init__(self):
-        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        self._client = None
         self.phone_number = settings.TWILIO_PHONE_NUMBER
+    
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = _build_client()
+        return self._client
         
+    @track_provider("twilio", "generate_access_token")
     def generate_access_token(self, identity: str) -> str:
         """Generate access token for WebRTC client"""
         token = AccessToken(
@@ -34,18 +70,37 @@ class TwilioService:
         
         return token.to_jwt()
     
+    @track_provider("twilio", "create_twilio_call")
+    def create_twilio_call(self, to_number: str):
+        """Ask Twilio to place a call with our webhooks attached (blocking REST call)"""
+        # With AMD the answered call first streams audio to the detector
+        answer_path = "outbound-answer" if settings.AMD_ENABLED else "voice-webhook"
+        return self.client.calls.create(
+            to=to_number,
+            from_=self.phone_number,
+            url=f"{settings.TWILIO_WEBHOOK_BASE_URL}/api/v1/calls/{answer_path}",
+            status_callback=f"{settings.TWILIO_WEBHOOK_BASE_URL}/api/v1/calls/status-webhook",
+            status_callback_event=['initiated', 'ringing', 'answered', 'completed'],
+            status_callback_method='POST',
+            method='POST',
+            timeout=30,
+            record=True,
+            recording_channels='dual',
+            recording_status_callback=f"{settings.TWILIO_WEBHOOK_BASE_URL}/api/v1/calls/recording-webhook",
+            recording_status_callback_method='POST'
+        )
+    
+    @track_provider("twilio", "make_outbound_call")
     async def make_outbound_call(
         self, 
         to_number: str, 
         agent_id: int, 
         campaign_id: Optional[int] = None,
-        contact_id: Optional[int] = None
+        contact_id: Optional[int] = None,
+        dial_group: Optional[str] = None
     ) -> Dict[str, Any]:
         """Initiate outbound call"""
         try:
-            callback_url = f"{settings.TWILIO_WEBHOOK_BASE_URL}/api/v1/calls/voice-webhook"
-            status_callback = f"{settings.TWILIO_WEBHOOK_BASE_URL}/api/v1/calls/status-webhook"
-            
             # Create call record in database
             db = SessionLocal()
             call_record = Call(
@@ -55,30 +110,20 @@ class TwilioService:
                 direction='outbound',
                 from_number=self.phone_number,
                 to_number=to_number,
-                status='initiated'
+                status='initiated',
+                dial_group=dial_group
             )
             db.add(call_record)
             db.commit()
             db.refresh(call_record)
             
             # Initiate Twilio call
-            twilio_call = self.client.calls.create(
-                to=to_number,
-                from_=self.phone_number,
-                url=callback_url,
-                status_callback=status_callback,
-                status_callback_event=['initiated', 'ringing', 'answered', 'completed'],
-                status_callback_method='POST',
-                method='POST',
-                timeout=30,
-                record=True,
-                recording_status_callback=f"{settings.TWILIO_WEBHOOK_BASE_URL}/api/v1/calls/recording-webhook",
-                recording_status_callback_method='POST'
-            )
+            twilio_call = self.create_twilio_call(to_number)
             
             # Update call record with Twilio SID
             call_record.twilio_call_sid = twilio_call.sid
             db.commit()
+            publish_board_update(call_record)
             
             result = {
                 'success': True,
@@ -97,17 +142,25 @@ class TwilioService:
                 'error': str(e)
             }
     
+    @track_provider("twilio", "make_parallel_calls")
     async def make_parallel_calls(
         self, 
         phone_numbers: List[str], 
         agent_id: int, 
         campaign_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Make multiple parallel calls (2-3 max for MVP)"""
+        """Make multiple parallel calls (2-3 max for MVP); the first to answer wins"""
+        from app.services.dial_race import dial_race
+        
+        dial_group = uuid4().hex
         results = []
         # Limit to 3 parallel calls
         for number in phone_numbers[:3]:
-            result = await self.make_outbound_call(number, agent_id, campaign_id)
+            result = await self.make_outbound_call(number, agent_id, campaign_id, dial_group=dial_group)
+            if result['success']:
+                result['dial_group'] = dial_group
+                # Legs placed after another already answered are hung up here
+                await dial_race.add_leg(dial_group, result['call_sid'])
             results.append(result)
         return results
     
@@ -137,7 +190,7 @@ class TwilioService:
                 dial = Dial(
                     action='/api/v1/calls/dial-complete',
                     timeout=30,
-                    record='record-from-answer'
+                    record='record-from-answer-dual'
                 )
                 # Connect to available agent via WebRTC client
                 dial.client('agent-client')
@@ -161,30 +214,97 @@ class TwilioService:
         
         return str(response)
     
-    async def update_call_status(self, call_sid: str, status: str) -> None:
-        """Update call status in database"""
-        db = SessionLocal()
-        call = db.query(Call).filter(Call.twilio_call_sid == call_sid).first()
+    # Media streams are opened by Twilio without credentials, so the TwiML
+    # that starts one carries a signature over the CallSid for the socket to check
+
+    @staticmethod
+    def stream_signature(call_sid: str, expires: int) -> str:
+        message = f"media-stream:{call_sid}:{expires}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+    def verify_stream(self, call_sid: Optional[str], parameters: Dict[str, str]) -> bool:
+        """Whether a stream's start message carries a live signature for its CallSid"""
+        try:
+            expires = int(parameters.get("expires", ""))
+        except ValueError:
+            return False
+        if not call_sid or expires < time.time():
+            return False
+        return hmac.compare_digest(self.stream_signature(call_sid, expires), parameters.get("signature", ""))
+    
+    def generate_amd_response(self, call_sid: str) -> str:
+        """Answered outbound call: stream audio to answering-machine detection.
         
-        if call:
-            call.status = status
+        The detector replaces this TwiML once it decides; if it never does,
+        the call falls through to the voice webhook after the analysis window.
+        """
+        response = VoiceResponse()
+        stream_url = re.sub(r"^http", "ws", settings.TWILIO_WEBHOOK_BASE_URL) + "/api/v1/calls/media-stream"
+        # Twilio connects within a second or two of fetching the TwiML
+        expires = int(time.time()) + settings.AMD_TOTAL_ANALYSIS_MS // 1000 + 60
+        start = Start()
+        stream = start.stream(url=stream_url, track='inbound_track')
+        stream.parameter(name='expires', value=str(expires))
+        stream.parameter(name='signature', value=self.stream_signature(call_sid, expires))
+        response.append(start)
+        response.pause(length=settings.AMD_TOTAL_ANALYSIS_MS // 1000 + 2)
+        response.redirect('/api/v1/calls/voice-webhook')
+        return str(response)
+    
+    async def update_call_status(
+        self,
+        call_sid: str,
+        status: str,
+        sequence: Optional[int] = None,
+        occurred_at: Optional[datetime] = None
+    ) -> None:
+        """Append a status callback to the call's event log and re-derive the call's summary"""
+        db = SessionLocal()
+        try:
+            call_id = db.query(Call.id).filter(Call.twilio_call_sid == call_sid).scalar()
+            # Release the connection while the event waits for its batch
+            db.commit()
+            if call_id is None or not await call_event_log.append(call_id, status, sequence, occurred_at):
+                return
             
-            if status == 'answered':
-                call.answered_at = datetime.utcnow()
-            elif status in ['completed', 'failed', 'busy', 'no-answer']:
-                call.ended_at = datetime.utcnow()
-                if call.answered_at and call.ended_at:
-                    duration = (call.ended_at - call.answered_at).total_seconds()
-                    call.duration = int(duration)
+            # One callback at a time per call, across processes: events committed
+            # by a concurrent callback are visible once the lock is ours, so the
+            # compare-and-update below can't double-count or regress the row
+            call = db.query(Call).filter(Call.id == call_id).with_for_update().first()
+            events = call_events.load_events(db, call_id, since=call.started_at)
+            summary = call_events.summarize(events)
+            changes = {
+                field: value for field, value in summary.items()
+                if value is not None and getattr(call, field) != value
+            }
+            # Duplicates and stale out-of-order callbacks leave the row alone
+            if not changes:
+                return
+            
+            newly_answered = call.answered_at is None and 'answered_at' in changes
+            newly_ended = call.ended_at is None and 'ended_at' in changes
+            for field, value in changes.items():
+                setattr(call, field, value)
+            if newly_answered:
+                timings = call_events.timings(events, call.started_at)
+                if timings['ring_seconds'] is not None:
+                    CALL_RING_SECONDS.observe(timings['ring_seconds'])
+                CALL_ANSWER_LATENCY.observe(timings['answer_latency_seconds'])
+            if newly_ended:
+                duration_sketches.record_call(db, call)
             
+            # Captured before commit expires the row, saving a reload
+            event = call_event(call)
             db.commit()
-        
-        db.close()
+            publish_board_event(event)
+        finally:
+            db.close()
     
-    async def save_recording(self, call_sid: str, recording_sid: str, recording_url: str) -> None:
-        """Save call recording information"""
+    async def save_recording(self, call_sid: str, recording_sid: str, recording_url: str) -> Optional[int]:
+        """Save call recording information; returns the new recording's id"""
         db = SessionLocal()
         call = db.query(Call).filter(Call.twilio_call_sid == call_sid).first()
+        recording_id = None
         
         if call:
             recording = CallRecording(
@@ -193,10 +313,18 @@ class TwilioService:
                 recording_url=recording_url
             )
             db.add(recording)
-            db.commit()
+            try:
+                db.commit()
+                recording_id = recording.id
+            except IntegrityError:
+                # Retried callback that got past webhook dedup
+                db.rollback()
+                logger.info(f"Recording {recording_sid} already saved")
         
         db.close()
+        return recording_id
     
+    @track_provider("twilio", "end_call")
     def end_call(self, call_sid: str) -> bool:
         """End an active call"""
         try:
@@ -206,5 +334,31 @@ class TwilioService:
             logger.error(f"Error ending call: {str(e)}")
             return False
 
+    @track_provider("twilio", "connect_agent")
+    def connect_agent(self, call_sid: str, agent_id: int) -> bool:
+        """Bridge a live call to the agent's softphone"""
+        try:
+            response = VoiceResponse()
+            dial = Dial()
+            dial.client(f"agent-{agent_id}")
+            response.append(dial)
+            self.client.calls(call_sid).update(twiml=str(response))
+            return True
+        except Exception as e:
+            logger.error(f"Error connecting agent: {str(e)}")
+            return False
+    
+    @track_provider("twilio", "play_on_call")
+    def play_on_call(self, call_sid: str, url: str) -> bool:
+        """Replace a live call's TwiML with <Play> of an audio URL"""
+        try:
+            response = VoiceResponse()
+            response.play(url)
+            self.client.calls(call_sid).update(twiml=str(response))
+            return True
+        except Exception as e:
+            logger.error(f"Error playing audio on call: {str(e)}")
+            return False
+
 # Singleton instance
 twilio_service = TwilioService()
\ No newline at end of file
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional
+import logging
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.metrics import WEBHOOK_DEDUP_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDedup:
+    """Remembers processed provider callbacks so retries are acknowledged
+    without re-running their side effects.
+    
+    An in-process LRU answers repeats seen by this worker without any I/O;
+    a Redis SET NX (shared by all workers, expiring after ttl) settles who
+    processes a callback first. If Redis is unreachable the callback is
+    processed, relying on the handlers' own idempotency.
+    """
+    
+    KEY_PREFIX = "buttdialer:webhook:"
+    
+    def __init__(self, capacity: int, ttl_seconds: int):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._redis: Optional[redis.Redis] = None
+    
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+        return self._redis
+    
+    def _remember(self, key: str) -> None:
+        self._seen[key] = monotonic() + self.ttl_seconds
+        self._seen.move_to_end(key)
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+    
+    async def claim(self, event: str, key: str) -> bool:
+        """True if this callback is new and should be processed"""
+        key = f"{event}:{key}"
+        expires = self._seen.get(key)
+        if expires is not None and expires > monotonic():
+            self._seen.move_to_end(key)
+            WEBHOOK_DEDUP_LOOKUPS.labels(event, "duplicate_memory").inc()
+            return False
+        
+        try:
+            first = await self._client().set(self.KEY_PREFIX + key, 1, nx=True, ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Webhook dedup unavailable, processing {key}: {e}")
+            WEBHOOK_DEDUP_LOOKUPS.labels(event, "error").inc()
+            return True
+        
+        self._remember(key)
+        if not first:
+            WEBHOOK_DEDUP_LOOKUPS.labels(event, "duplicate_redis").inc()
+            return False
+        WEBHOOK_DEDUP_LOOKUPS.labels(event, "new").inc()
+        return True
+    
+    async def release(self, event: str, key: str) -> None:
+        """Forget a claimed callback whose processing failed, so a retry runs it"""
+        key = f"{event}:{key}"
+        self._seen.pop(key, None)
+        try:
+            await self._client().delete(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Could not release webhook {key}: {e}")
+
+
+webhook_dedup = WebhookDedup(
+    capacity=settings.WEBHOOK_DEDUP_LRU_SIZE,
+    ttl_seconds=settings.WEBHOOK_DEDUP_TTL_SECONDS,
+)
@@ -1,14 +1,46 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from fastapi import WebSocket
+import asyncio
 import json
 import logging
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.metrics import (
+    WEBSOCKET_CONNECTIONS,
+    WEBSOCKET_MESSAGES,
+    WEBSOCKET_QUEUED_MESSAGES,
+    WEBSOCKET_SEND_ERRORS,
+    gauge_function,
+)
 
 logger = logging.getLogger(__name__)
 
+# Worker processes cannot reach sockets held by the API, so they publish
+# updates here and every API process relays them to its own connections.
+CALL_UPDATES_CHANNEL = "buttdialer:call-updates"
+
+_publisher: Optional[redis.Redis] = None
+
+def publish_call_update(call_data: dict, agent_id: int) -> None:
+    """Publish a call update from outside the API process (e.g. a Celery worker)"""
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.REDIS_URL)
+    try:
+        _publisher.publish(
+            CALL_UPDATES_CHANNEL,
+            json.dumps({"agent_id": agent_id, "data": call_data}, default=str)
+        )
+    except Exception as e:
+        logger.error(f"Error publishing call update: {e}")
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.user_connections: Dict[int, List[str]] = {}
+        self._relay_task: Optional[asyncio.Task] = None
         
     async def connect(self, websocket: WebSocket, client_id: str, user_id: int):
         await websocket.accept()
@@ -25,7 +57,8 @@ class ConnectionManager:
             del self.active_connections[client_id]
             
         if user_id in self.user_connections:
-            self.user_connections[user_id].remove(client_id)
+            if client_id in self.user_connections[user_id]:
+                self.user_connections[user_id].remove(client_id)
             if not self.user_connections[user_id]:
                 del self.user_connections[user_id]
                 
@@ -34,18 +67,31 @@ class ConnectionManager:
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
         
+    async def _send(self, client_id: str, text: str) -> bool:
+        websocket = self.active_connections.get(client_id)
+        try:
+            if websocket is None:
+                return True
+            await websocket.send_text(text)
+            WEBSOCKET_MESSAGES.inc()
+            return True
+        except Exception as e:
+            logger.error(f"Error sending message to {client_id}: {e}")
+            WEBSOCKET_SEND_ERRORS.inc()
+            return False
+        finally:
+            WEBSOCKET_QUEUED_MESSAGES.dec()
+        
     async def send_user_message(self, message: dict, user_id: int):
         if user_id in self.user_connections:
             disconnected_clients = []
+            client_ids = list(self.user_connections[user_id])
+            text = json.dumps(message)
+            WEBSOCKET_QUEUED_MESSAGES.inc(len(client_ids))
             
-            for client_id in self.user_connections[user_id]:
-                if client_id in self.active_connections:
-                    websocket = self.active_connections[client_id]
-                    try:
-                        await websocket.send_text(json.dumps(message))
-                    except Exception as e:
-                        logger.error(f"Error sending message to {client_id}: {e}")
-                        disconnected_clients.append(client_id)
+            for client_id in client_ids:
+                if not await self._send(client_id, text):
+                    disconnected_clients.append(client_id)
                         
             # Clean up disconnected clients
             for client_id in disconnected_clients:
@@ -53,14 +99,13 @@ class ConnectionManager:
                 
     async def broadcast(self, message: dict, exclude_client: str = None):
         disconnected_clients = []
+        client_ids = [c for c in self.active_connections if c != exclude_client]
+        text = json.dumps(message)
+        WEBSOCKET_QUEUED_MESSAGES.inc(len(client_ids))
         
-        for client_id, websocket in self.active_connections.items():
-            if client_id != exclude_client:
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {client_id}: {e}")
-                    disconnected_clients.append(client_id)
+        for client_id in client_ids:
+            if not await self._send(client_id, text):
+                disconnected_clients.append(client_id)
                     
         # Clean up disconnected clients
         for client_id in disconnected_clients:
@@ -93,5 +138,35 @@ class ConnectionManager:
             # Send to all connected users
             await self.broadcast(message)
 
+    async def start_relay(self):
+        """Relay call updates published by workers to local connections"""
+        if self._relay_task is None:
+            self._relay_task = asyncio.create_task(self._relay())
+    
+    async def stop_relay(self):
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            await asyncio.gather(self._relay_task, return_exceptions=True)
+            self._relay_task = None
+    
+    async def _relay(self):
+        while True:
+            client = aioredis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(CALL_UPDATES_CHANNEL)
+                async for message in pubsub.listen():
+                    update = json.loads(message["data"])
+                    await self.send_call_update(update["data"], update["agent_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Call update relay error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+                await client.close()
+
 # Global connection manager
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
+gauge_function(WEBSOCKET_CONNECTIONS, lambda: len(manager.active_connections))
\ No newline at end of file
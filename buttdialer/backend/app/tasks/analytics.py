@@ -0,0 +1,12 @@
+from app.core.celery_app import celery_app
+from app.services.call_analytics import analyze_pending
+
+@celery_app.task(name="maintenance.analyze_recordings")
+def analyze_recordings(limit: int = None) -> dict:
+    """Compute talk/silence/overtalk analytics for newly stored recordings.
+    
+    The task starts its own process pool, which prefork pool children may
+    not do, so it is routed to the analytics queue, whose worker runs with
+    `-P solo`.
+    """
+    return analyze_pending(limit=limit)
@@ -0,0 +1,17 @@
+from datetime import datetime, timedelta
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.services.call_archive import call_archive
+from app.services.call_events import drop_partitions_before, ensure_partitions
+
+@celery_app.task(name="maintenance.archive_old_calls")
+def archive_old_calls() -> int:
+    """Move calls older than CALL_RETENTION_DAYS to the Parquet archive"""
+    return call_archive.archive_older_than(settings.CALL_RETENTION_DAYS)
+
+@celery_app.task(name="maintenance.maintain_call_event_partitions")
+def maintain_call_event_partitions() -> dict:
+    """Create upcoming call_events partitions and drop those past CALL_EVENT_RETENTION_DAYS"""
+    cutoff = datetime.utcnow().date() - timedelta(days=settings.CALL_EVENT_RETENTION_DAYS)
+    return {"ensured": ensure_partitions(), "dropped": drop_partitions_before(cutoff)}
@@ -0,0 +1,69 @@
+from sqlalchemy.exc import IntegrityError
+import logging
+
+from app.core.celery_app import celery_app
+from app.db.session import SessionLocal
+from app.models.call import Call
+from app.models.contact import Contact
+from app.services.call_board import publish_board_update
+from app.services.twilio_service import twilio_service
+from app.services.websocket_manager import publish_call_update
+
+logger = logging.getLogger(__name__)
+
+def _get_or_create_contact(db, phone_number: str) -> Contact:
+    contact = db.query(Contact).filter(Contact.phone_number == phone_number).first()
+    if contact:
+        return contact
+    
+    contact = Contact(phone_number=phone_number)
+    db.add(contact)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker created it concurrently
+        db.rollback()
+        contact = db.query(Contact).filter(Contact.phone_number == phone_number).first()
+    return contact
+
+def _call_update(call: Call, error: str = None) -> dict:
+    data = {
+        "id": call.id,
+        "twilio_call_sid": call.twilio_call_sid,
+        "contact_id": call.contact_id,
+        "to_number": call.to_number,
+        "status": call.status
+    }
+    if error:
+        data["error"] = error
+    return data
+
+@celery_app.task(name="calls.originate")
+def originate_call(call_id: int) -> None:
+    """Place a call queued by POST /calls/outbound/async"""
+    db = SessionLocal()
+    try:
+        call = db.query(Call).filter(Call.id == call_id).first()
+        if not call or call.status != 'queued':
+            return
+        
+        contact = _get_or_create_contact(db, call.to_number)
+        call.contact_id = contact.id
+        
+        try:
+            twilio_call = twilio_service.create_twilio_call(call.to_number)
+        except Exception as e:
+            logger.error(f"Error originating call {call_id}: {str(e)}")
+            call.status = 'failed'
+            db.commit()
+            publish_board_update(call)
+            publish_call_update(_call_update(call, error=str(e)), call.agent_id)
+            return
+        
+        call.twilio_call_sid = twilio_call.sid
+        call.status = 'initiated'
+        db.commit()
+        publish_board_update(call)
+        publish_call_update(_call_update(call), call.agent_id)
+    finally:
+        db.close()
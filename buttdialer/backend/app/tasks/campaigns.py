@@ -0,0 +1,12 @@
+from app.core.celery_app import celery_app
+from app.db.session import SessionLocal
+from app.services.tts_renderer import render_campaign
+
+@celery_app.task(name="maintenance.render_campaign_audio")
+def render_campaign_audio(campaign_id: int) -> dict:
+    """Render the campaign's personalized TTS message for its pending leads"""
+    db = SessionLocal()
+    try:
+        return render_campaign(db, campaign_id)
+    finally:
+        db.close()
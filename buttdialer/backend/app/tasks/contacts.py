@@ -0,0 +1,7 @@
+from app.core.celery_app import celery_app
+from app.services.contact_dedup import merge_duplicates
+
+@celery_app.task(name="maintenance.merge_duplicate_contacts")
+def merge_duplicate_contacts(dry_run: bool = False) -> dict:
+    """Find duplicate contacts by phone, email and HubSpot id and merge them"""
+    return merge_duplicates(dry_run=dry_run)
@@ -0,0 +1,7 @@
+from app.core.celery_app import celery_app
+from app.services.analytics_export import analytics_export
+
+@celery_app.task(name="maintenance.export_analytics")
+def export_analytics() -> dict:
+    """Append calls, recordings, campaign calls and contacts changed since the last run to the Parquet export"""
+    return analytics_export.export_all()
@@ -0,0 +1,34 @@
+import logging
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.call import CallRecording
+from app.services.audio_store import audio_store
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task(name="calls.store_recording", bind=True, max_retries=5, default_retry_delay=30)
+def store_recording(self, recording_id: int) -> None:
+    """Copy a Twilio recording into the audio store as WAV"""
+    db = SessionLocal()
+    try:
+        recording = db.query(CallRecording).filter(CallRecording.id == recording_id).first()
+        if not recording or recording.audio_digest or not recording.recording_url:
+            return
+        
+        try:
+            digest = audio_store.fetch(
+                f"{recording.recording_url}.wav",
+                "wav",
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+            )
+        except Exception as e:
+            # Twilio can 404 briefly right after the recording callback
+            logger.warning(f"Error fetching recording {recording.recording_sid}: {e}")
+            raise self.retry(exc=e)
+        
+        recording.audio_digest = digest
+        db.commit()
+    finally:
+        db.close()
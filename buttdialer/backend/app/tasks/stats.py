@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+
+from app.core.celery_app import celery_app
+from app.db.session import SessionLocal
+from app.services import duration_sketches
+from app.services.call_timing import call_timing
+
+@celery_app.task(name="maintenance.backfill_call_sketches")
+def backfill_call_sketches(days: int = 30) -> int:
+    """Rebuild talk/ring time sketches for the last `days` days"""
+    today = datetime.utcnow().date()
+    db = SessionLocal()
+    try:
+        return duration_sketches.backfill(db, today - timedelta(days=days), today)
+    finally:
+        db.close()
+
+@celery_app.task(name="maintenance.build_call_timing")
+def build_call_timing() -> int:
+    """Recount the best-time-to-call grids from recent outbound calls"""
+    db = SessionLocal()
+    try:
+        return call_timing.rebuild(db)
+    finally:
+        db.close()
@@ -0,0 +1,111 @@
+"""
+Concurrent fetches of one stored prompt from the audio route.
+
+    cd buttdialer/backend
+    python -m benchmarks.audio_server --concurrency 300 --requests 3000 --size-kb 480
+
+Stores a synthetic --size-kb MP3 in a temporary audio store and serves it
+from uvicorn two ways: the /audio route (RangedFileResponse: shared mmap,
+or sendfile where the server supports it) and Starlette's FileResponse,
+which reads the file into Python bytes per request. Fires --requests GETs
+with --concurrency in flight at each and reports requests/s, MB/s, p50/p99
+latency and the API process's peak RSS. Also checks Range and If-None-Match.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+PORT = 9110
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def serve(directory: str):
+    os.environ["AUDIO_STORE_URI"] = directory
+    from fastapi import FastAPI
+    from starlette.responses import FileResponse
+
+    from app.api.v1.endpoints import audio
+    from app.services.audio_store import audio_store
+    from benchmarks.simulators import serve_in_thread
+
+    app = FastAPI()
+    app.include_router(audio.router, prefix="/audio")
+
+    @app.get("/plain/{digest}.mp3")
+    async def plain(digest: str):
+        return FileResponse(audio_store.cached_path(digest, "mp3"), media_type="audio/mpeg")
+
+    serve_in_thread(app, PORT)
+    return audio_store
+
+
+async def fetch_all(urls: List[str], concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        async def one(url: str) -> float:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                return time.perf_counter() - started
+
+        return await asyncio.gather(*(one(url) for url in urls))
+
+
+async def check_headers(url: str, size: int) -> None:
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url, headers={"Range": "bytes=100-199"})
+        assert response.status_code == 206 and len(response.content) == 100, response.status_code
+        assert response.headers["content-range"] == f"bytes 100-199/{size}"
+        etag = response.headers["etag"]
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304, response.status_code
+        response = await client.get(url, headers={"Range": f"bytes={size}-"})
+        assert response.status_code == 416, response.status_code
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--size-kb", type=int, default=480)
+    args = parser.parse_args()
+
+    store = serve(tempfile.mkdtemp(prefix="audio-store-"))
+    data = os.urandom(args.size_kb * 1024)
+    digest = store.put(data, "mp3")
+    base = f"http://127.0.0.1:{PORT}"
+    signed = store.signed_url(digest, "mp3").split("/audio/", 1)[1]
+    routes = {
+        "ranged": f"{base}/audio/{signed}",
+        "file": f"{base}/plain/{digest}.mp3",
+    }
+
+    asyncio.run(check_headers(routes["ranged"], len(data)))
+    for label, url in routes.items():
+        started = time.perf_counter()
+        latencies = asyncio.run(fetch_all([url] * args.requests, args.concurrency))
+        elapsed = time.perf_counter() - started
+        megabytes = len(data) * args.requests / 1e6
+        print(
+            f"{label:>7}: {args.requests / elapsed:7.0f} req/s {megabytes / elapsed:7.0f} MB/s | "
+            f"p50 {statistics.median(latencies) * 1000:6.1f}ms p99 {percentile(latencies, 0.99) * 1000:6.1f}ms | "
+            f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Call archive read-through: write, query and stats over local or S3 storage.
+
+    cd buttdialer/backend
+    python -m benchmarks.call_archive --uri /tmp/call-archive --calls 200000
+    CALL_ARCHIVE_S3_ENDPOINT=http://localhost:9000 python -m benchmarks.call_archive --uri s3://archive/calls
+
+Writes --calls synthetic calls over 12 months as archive Parquet files the
+way maintenance.archive_old_calls does, then reads them back through the same
+DuckDB connection the history and stats endpoints use. With an s3:// URI
+this goes through httpfs and the S3 settings from .env (AWS_* and
+CALL_ARCHIVE_S3_ENDPOINT for MinIO), so a misconfigured bucket fails here
+rather than as a 500 from /calls/. Exits non-zero if the archive returns
+other counts than were written.
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.call_archive import CALL_FIELDS, CallArchive
+
+Row = namedtuple("Row", CALL_FIELDS + ["recordings"])
+STATUSES = np.array(["completed", "no-answer", "busy", "failed"])
+START = datetime(2025, 1, 1)
+
+
+def synthetic_calls(rng, count: int, agents: int) -> list:
+    offsets = np.sort(rng.integers(0, 365 * 24 * 3600, count))
+    statuses = STATUSES[rng.choice(len(STATUSES), count, p=[0.6, 0.25, 0.1, 0.05])]
+    durations = np.where(statuses == "completed", rng.integers(5, 900, count), 0)
+    agent_ids = rng.integers(1, agents + 1, count)
+    rows = []
+    for i in range(count):
+        started = START + timedelta(seconds=int(offsets[i]))
+        rows.append(Row(
+            id=i + 1, twilio_call_sid=f"CA{i:032x}", agent_id=int(agent_ids[i]), contact_id=i + 1,
+            campaign_id=None, direction="outbound", from_number="+15005550006",
+            to_number=f"+1415{i % 10000000:07d}", status=str(statuses[i]), duration=int(durations[i]),
+            started_at=started, answered_at=started if statuses[i] == "completed" else None,
+            ended_at=started + timedelta(seconds=int(durations[i])), notes=None, disposition=None,
+            answered_by=None, dial_group=None,
+            # Some completed calls have two recordings; each call must still count once
+            recordings=[
+                {"recording_sid": f"RE{i:030x}{n}", "recording_url": None, "s3_url": None,
+                 "duration": int(durations[i]), "audio_digest": None}
+                for n in range(int(statuses[i] == "completed") + i % 2)
+            ],
+        ))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--uri", required=True, help="local path or s3://bucket/prefix, written to")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = synthetic_calls(rng, args.calls, args.agents)
+    archive = CallArchive(args.uri)
+
+    started = time.perf_counter()
+    for i in range(0, len(rows), args.batch_size):
+        archive._write([row._asdict() for row in rows[i:i + args.batch_size]])
+    elapsed = time.perf_counter() - started
+    print(f"wrote {len(rows)} calls in {elapsed:.2f} s ({len(rows) / elapsed:,.0f} calls/s) to {args.uri}")
+
+    failures = []
+    agent = 1
+    expected = [r for r in rows if r.agent_id == agent]
+
+    started = time.perf_counter()
+    page = archive.query_calls(["id", "started_at"], agent_id=agent, limit=50)
+    print(f"query_calls page of {len(page)} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    newest = sorted(expected, key=lambda r: (r.started_at, r.id), reverse=True)[:50]
+    if [row[0] for row in page] != [r.id for r in newest]:
+        failures.append("query_calls returned other calls than were written")
+
+    started = time.perf_counter()
+    total, answered, duration = archive.stats(agent_id=agent)
+    print(f"stats in {(time.perf_counter() - started) * 1000:.0f} ms: {total} calls, {answered} completed")
+    want = (len(expected), sum(r.status == "completed" for r in expected), sum(r.duration for r in expected))
+    if (total, answered, duration) != want:
+        failures.append(f"stats {(total, answered, duration)} != written {want}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
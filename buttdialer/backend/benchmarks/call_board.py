@@ -0,0 +1,120 @@
+"""
+Memory per active call and delta fan-out latency of the live call board.
+
+    cd buttdialer/backend
+    python -m benchmarks.call_board --calls 5000 --subscribers 50 --events 20000
+
+Runs the board in-process (no Redis or Postgres): loads --calls active
+calls and measures their footprint with tracemalloc, then applies
+--events status changes fanned out to --subscribers fake WebSockets and
+reports dispatch throughput and apply-to-send latency percentiles.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.services.call_board import ActiveCallBoard
+
+STATUSES = ("initiated", "ringing", "in-progress")
+
+
+class FakeWebSocket:
+    """Records how long each delta took from apply() to send_text()"""
+
+    def __init__(self, applied_at: Dict[int, float], latencies: List[float]):
+        self.applied_at = applied_at
+        self.latencies = latencies
+
+    async def send_text(self, text: str) -> None:
+        message = json.loads(text)
+        if message["type"] == "board_delta":
+            self.latencies.append(time.perf_counter() - self.applied_at[message["seq"]])
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+def event(call_id: int, status: str) -> dict:
+    return {
+        "id": call_id,
+        "agent_id": call_id % 40,
+        "campaign_id": call_id % 7,
+        "contact_id": call_id,
+        "direction": "outbound",
+        "to_number": f"+1555{call_id:07d}",
+        "status": status,
+        "started_at": time.time(),
+        "answered_at": None,
+    }
+
+
+def measure_memory(calls: int) -> None:
+    board = ActiveCallBoard()
+    events = [event(call_id, "initiated") for call_id in range(calls)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for e in events:
+        board.apply(e)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # Excludes the events themselves, which existed before the snapshot
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"{calls} active calls: {allocated / calls:.0f} bytes/call (tracemalloc), "
+          f"{board.memory_bytes() / calls:.0f} bytes/call (call_board_memory_bytes)")
+
+
+def percentile(values: List[float], p: float) -> float:
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+async def measure_fanout(calls: int, subscribers: int, events: int) -> None:
+    board = ActiveCallBoard(max_queue=events + 1)
+    for call_id in range(calls):
+        board.apply(event(call_id, "initiated"))
+
+    applied_at: Dict[int, float] = {}
+    latencies: List[float] = []
+    for _ in range(subscribers):
+        board.subscribe(FakeWebSocket(applied_at, latencies))
+
+    start = time.perf_counter()
+    for i in range(events):
+        delta = board.apply(event(random.randrange(calls), random.choice(STATUSES)))
+        applied_at[delta["seq"]] = time.perf_counter()
+        board._dispatch(delta, None)
+        if i % 100 == 0:
+            # Let writers run, as the Redis listener would between messages
+            await asyncio.sleep(0)
+    dispatch_seconds = time.perf_counter() - start
+
+    while len(latencies) < events * subscribers:
+        await asyncio.sleep(0.001)
+    latencies.sort()
+
+    print(f"\n{events} deltas x {subscribers} subscribers")
+    print(f"apply + dispatch: {events / dispatch_seconds:,.0f} deltas/sec")
+    for label, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"apply-to-send {label}: {percentile(latencies, p) * 1000:.2f} ms")
+
+    for client_id in list(board.subscribers):
+        board.unsubscribe(client_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the live call board")
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--subscribers", type=int, default=50)
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    measure_memory(args.calls)
+    asyncio.run(measure_fanout(args.calls, args.subscribers, args.events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Status-callback write cost: in-place call updates versus the event log.
+
+    cd buttdialer/backend
+    python -m benchmarks.call_events --database-url postgresql://... --calls 5000 --concurrency 64
+
+Replays --calls calls' worth of status callbacks (initiated, ringing,
+in-progress, completed) from --concurrency concurrent writers against
+scratch tables in the target database, three ways:
+
+  update   one UPDATE of an indexed calls-like row per callback (the old path)
+  insert   one INSERT into a monthly-partitioned event table per callback
+  batched  the same INSERTs grouped: writers queue events while a write is
+           in flight and the next multi-row INSERT carries all of them
+
+and reports callbacks/s, p50/p99 write latency, and table plus index size
+afterwards. The scratch tables are dropped at the end.
+"""
+
+import argparse
+import os
+import queue
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+EVENTS = ("initiated", "ringing", "in-progress", "completed")
+
+SCHEMA = """
+DROP TABLE IF EXISTS bench_calls, bench_call_events;
+CREATE TABLE bench_calls (
+    id integer PRIMARY KEY, status varchar(20), answered_at timestamp, ended_at timestamp,
+    started_at timestamp DEFAULT now()
+);
+CREATE INDEX ON bench_calls (started_at);
+CREATE INDEX ON bench_calls (status);
+CREATE TABLE bench_call_events (
+    id bigint GENERATED ALWAYS AS IDENTITY, received_at timestamp NOT NULL, call_id integer NOT NULL,
+    event smallint NOT NULL, sequence integer, occurred_at timestamp NOT NULL,
+    recorded_at timestamp DEFAULT (clock_timestamp() AT TIME ZONE 'utc'),
+    PRIMARY KEY (id, received_at)
+) PARTITION BY RANGE (received_at);
+CREATE INDEX ON bench_call_events (call_id, received_at);
+CREATE INDEX ON bench_call_events USING brin (received_at);
+"""
+
+
+def work(calls: int) -> List[tuple]:
+    """Callbacks in the interleaved order concurrent calls produce them"""
+    return [(call_id, step) for step in range(len(EVENTS)) for call_id in range(calls)]
+
+
+def write_update(cursor, call_id: int, step: int) -> None:
+    event = EVENTS[step]
+    cursor.execute(
+        "UPDATE bench_calls SET status = %s, "
+        "answered_at = CASE WHEN %s THEN now() ELSE answered_at END, "
+        "ended_at = CASE WHEN %s THEN now() ELSE ended_at END WHERE id = %s",
+        (event, event == "in-progress", event == "completed", call_id),
+    )
+
+
+def event_row(call_id: int, step: int) -> tuple:
+    now = datetime.utcnow()
+    return now, call_id, step + 1, step + 1, now
+
+
+def write_insert(cursor, call_id: int, step: int) -> None:
+    cursor.execute(
+        "INSERT INTO bench_call_events (received_at, call_id, event, sequence, occurred_at) "
+        "VALUES (%s, %s, %s, %s, %s)", event_row(call_id, step)
+    )
+
+
+def run_direct(url: str, mode: str, items: List[tuple], concurrency: int) -> List[float]:
+    tasks: "queue.Queue" = queue.Queue()
+    for item in items:
+        tasks.put(item)
+    latencies: List[float] = []
+    write = write_update if mode == "update" else write_insert
+
+    def worker() -> None:
+        conn = psycopg2.connect(url)
+        cursor = conn.cursor()
+        while True:
+            try:
+                call_id, step = tasks.get_nowait()
+            except queue.Empty:
+                break
+            started = time.perf_counter()
+            write(cursor, call_id, step)
+            conn.commit()
+            latencies.append(time.perf_counter() - started)
+        conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def run_batched(url: str, items: List[tuple], concurrency: int) -> List[float]:
+    """Writers hand events to one committer and wait, like CallEventLog"""
+    pending: List[tuple] = []
+    lock = threading.Condition()
+    latencies: List[float] = []
+    done = threading.Event()
+
+    def committer() -> None:
+        conn = psycopg2.connect(url)
+        cursor = conn.cursor()
+        while True:
+            with lock:
+                while not pending and not done.is_set():
+                    lock.wait()
+                if not pending:
+                    break
+                batch = pending[:500]
+                del pending[:500]
+            execute_values(
+                cursor,
+                "INSERT INTO bench_call_events (received_at, call_id, event, sequence, occurred_at) VALUES %s",
+                [row for row, _ in batch], page_size=500,
+            )
+            conn.commit()
+            for _, committed in batch:
+                committed.set()
+        conn.close()
+
+    tasks: "queue.Queue" = queue.Queue()
+    for item in items:
+        tasks.put(item)
+
+    def worker() -> None:
+        while True:
+            try:
+                call_id, step = tasks.get_nowait()
+            except queue.Empty:
+                break
+            started = time.perf_counter()
+            committed = threading.Event()
+            with lock:
+                pending.append((event_row(call_id, step), committed))
+                lock.notify()
+            committed.wait()
+            latencies.append(time.perf_counter() - started)
+
+    writer = threading.Thread(target=committer)
+    writer.start()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with lock:
+        done.set()
+        lock.notify()
+    writer.join()
+    return latencies
+
+
+def reset(url: str, calls: int) -> None:
+    conn = psycopg2.connect(url)
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA)
+    month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    following = (month + timedelta(days=32)).replace(day=1)
+    cursor.execute(
+        f"CREATE TABLE bench_call_events_{month:%Y_%m} PARTITION OF bench_call_events "
+        f"FOR VALUES FROM ('{month}') TO ('{following}')"
+    )
+    cursor.execute("INSERT INTO bench_calls (id, status) SELECT g, 'queued' FROM generate_series(0, %s) g", (calls,))
+    conn.commit()
+    conn.close()
+
+
+def size(url: str, table: str) -> str:
+    conn = psycopg2.connect(url)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT pg_size_pretty(sum(pg_total_relation_size(relid))) FROM pg_partition_tree(%s)", (table,)
+    )
+    value = cursor.fetchone()[0]
+    conn.close()
+    return value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    items = work(args.calls)
+    try:
+        for mode in ("update", "insert", "batched"):
+            reset(args.database_url, args.calls)
+            started = time.perf_counter()
+            if mode == "batched":
+                latencies = run_batched(args.database_url, items, args.concurrency)
+            else:
+                latencies = run_direct(args.database_url, mode, items, args.concurrency)
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            table = "bench_calls" if mode == "update" else "bench_call_events"
+            print(
+                f"{mode:>8}: {len(items) / elapsed:8.0f} callbacks/s  "
+                f"p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms  {table} {size(args.database_url, table)}"
+            )
+    finally:
+        conn = psycopg2.connect(args.database_url)
+        conn.cursor().execute("DROP TABLE IF EXISTS bench_calls, bench_call_events")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+End-to-end load test against the API with simulated providers.
+
+Drives the call endpoints, Twilio webhooks, stats and WebSocket fan-out at
+fixed open-loop rates, then reports p50/p95/p99 latency, throughput and
+Postgres connection usage.
+
+    cd buttdialer/backend
+    python -m benchmarks.loadtest --spawn --duration 60 \\
+        --rate outbound=5 --rate parallel=2 --rate status_webhook=50 \\
+        --rate recording_webhook=10 --rate stats=20 --rate outbound_async=5 \\
+        --ws-clients 50
+
+With --spawn the harness starts the simulators, the API (uvicorn) and a
+Celery worker pointed at them; otherwise it targets --api-url and expects
+those to be running already (see benchmarks.simulators).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+import psycopg2
+import websockets
+
+from benchmarks.simulators import (
+    add_fault_arguments,
+    faults_from_args,
+    flow_from_args,
+    simulator_env,
+    start_simulators,
+)
+
+SCENARIOS = ("outbound", "outbound_async", "parallel", "status_webhook", "recording_webhook", "stats", "poll", "login")
+
+DEFAULT_RATES = {
+    "outbound": 5.0,
+    "parallel": 1.0,
+    "status_webhook": 50.0,
+    "recording_webhook": 10.0,
+    "stats": 10.0,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        self.latencies[name].append(seconds * 1000)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        result = {}
+        for name, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            result[name] = {
+                "count": len(ordered),
+                "errors": self.errors[name],
+                "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(ordered, 50),
+                "p95_ms": percentile(ordered, 95),
+                "p99_ms": percentile(ordered, 99),
+            }
+        return result
+
+
+class DBConnectionSampler:
+    """Samples pg_stat_activity for the target database"""
+
+    QUERY = """
+        SELECT coalesce(state, 'unknown'), count(*)
+        FROM pg_stat_activity
+        WHERE datname = current_database() AND pid <> pg_backend_pid()
+        GROUP BY 1
+    """
+
+    def __init__(self, database_url: str, interval: float = 0.25):
+        self.database_url = database_url
+        self.interval = interval
+        self.samples: List[Dict[str, int]] = []
+
+    async def run(self, stop: asyncio.Event) -> None:
+        conn = psycopg2.connect(self.database_url)
+        conn.autocommit = True
+        try:
+            while not stop.is_set():
+                with conn.cursor() as cur:
+                    cur.execute(self.QUERY)
+                    self.samples.append(dict(cur.fetchall()))
+                try:
+                    await asyncio.wait_for(stop.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            conn.close()
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {}
+        totals = [sum(s.values()) for s in self.samples]
+        active = [s.get("active", 0) for s in self.samples]
+        return {
+            "samples": len(self.samples),
+            "max_connections": max(totals),
+            "avg_connections": sum(totals) / len(totals),
+            "max_active": max(active),
+            "avg_active": sum(active) / len(active),
+        }
+
+
+class LoadTest:
+    def __init__(self, api_url: str, recorder: Recorder):
+        self.api_url = api_url.rstrip("/")
+        self.recorder = recorder
+        self.client = httpx.AsyncClient(base_url=f"{self.api_url}/api/v1", timeout=30.0)
+        self.token: Optional[str] = None
+        self.credentials: Dict[str, str] = {}
+        self.call_sids: List[str] = []
+        self.queued_at: Dict[int, float] = {}
+        self.fanout_latencies: List[float] = []
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def register(self) -> None:
+        user = {
+            "email": f"loadtest-{uuid4().hex[:8]}@example.com",
+            "password": uuid4().hex,
+            "first_name": "Load",
+            "last_name": "Test",
+            "role": "admin",
+        }
+        response = await self.client.post("/auth/register", json=user)
+        response.raise_for_status()
+        self.token = response.json()["access_token"]
+        self.credentials = {"email": user["email"], "password": user["password"]}
+
+    async def login(self) -> None:
+        await self.timed("login", self.client.post("/auth/login", json=self.credentials))
+
+    async def timed(self, name: str, request) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.recorder.record(name, time.perf_counter() - start, False)
+            return None
+        self.recorder.record(name, time.perf_counter() - start, response.status_code < 400)
+        return response
+
+    @staticmethod
+    def phone_number() -> str:
+        return f"+1555{random.randint(0, 9999999):07d}"
+
+    async def outbound(self) -> None:
+        response = await self.timed("outbound", self.client.post(
+            "/calls/outbound", json={"to_number": self.phone_number()}, headers=self.headers
+        ))
+        if response is not None and response.status_code == 200:
+            sid = response.json().get("twilio_call_sid")
+            if sid:
+                self.call_sids.append(sid)
+
+    async def outbound_async(self) -> None:
+        start = time.perf_counter()
+        response = await self.timed("outbound_async", self.client.post(
+            "/calls/outbound/async", json={"to_number": self.phone_number()}, headers=self.headers
+        ))
+        if response is not None and response.status_code == 202:
+            self.queued_at[response.json()["call_id"]] = start
+
+    async def parallel(self) -> None:
+        numbers = [self.phone_number() for _ in range(3)]
+        response = await self.timed("parallel", self.client.post(
+            "/calls/parallel", json=numbers, headers=self.headers
+        ))
+        if response is not None and response.status_code == 200:
+            self.call_sids.extend(c["twilio_call_sid"] for c in response.json() if c.get("twilio_call_sid"))
+
+    def known_sid(self) -> str:
+        return random.choice(self.call_sids) if self.call_sids else f"CA{uuid4().hex}"
+
+    async def status_webhook(self) -> None:
+        await self.timed("status_webhook", self.client.post("/calls/status-webhook", data={
+            "CallSid": self.known_sid(),
+            "CallStatus": random.choice(["ringing", "in-progress", "completed"]),
+        }))
+
+    async def recording_webhook(self) -> None:
+        sid = f"RE{uuid4().hex}"
+        await self.timed("recording_webhook", self.client.post("/calls/recording-webhook", data={
+            "CallSid": self.known_sid(),
+            "RecordingSid": sid,
+            "RecordingUrl": f"http://127.0.0.1/recordings/{sid}",
+        }))
+
+    async def stats(self) -> None:
+        await self.timed("stats", self.client.get("/calls/stats", headers=self.headers))
+
+    async def poll(self) -> None:
+        """The team and campaign lists the frontend polls (served from the query cache)"""
+        path = random.choice(["/teams/", "/campaigns/"])
+        await self.timed("poll", self.client.get(path, headers=self.headers))
+
+    async def websocket_client(self, stop: asyncio.Event) -> None:
+        """Hold a /calls/ws connection and measure queue-to-delivery latency"""
+        ws_url = self.api_url.replace("http", "ws", 1) + f"/api/v1/calls/ws?token={self.token}"
+        async with websockets.connect(ws_url) as ws:
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                message = json.loads(raw)
+                queued = self.queued_at.get(message.get("data", {}).get("id"))
+                if queued is not None:
+                    self.fanout_latencies.append((time.perf_counter() - queued) * 1000)
+
+    async def drive(self, name: str, rate: float, duration: float) -> None:
+        """Open-loop: fire at fixed intervals regardless of response times"""
+        scenario: Callable = getattr(self, name)
+        tasks = []
+        start = time.perf_counter()
+        for i in range(int(rate * duration)):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(scenario()))
+        await asyncio.gather(*tasks)
+
+
+def wait_for_health(api_url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{api_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"API at {api_url} did not become healthy")
+
+
+def spawn_stack(args) -> List[subprocess.Popen]:
+    start_simulators(faults_from_args(args), flow_from_args(args))
+    env = {
+        **os.environ,
+        **simulator_env(),
+        "TWILIO_WEBHOOK_BASE_URL": args.api_url,
+    }
+    port = args.api_url.rsplit(":", 1)[-1]
+    processes = [subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", port, "--workers", str(args.api_workers), "--log-level", "warning"],
+        env=env,
+    )]
+    if "outbound_async" in args.rates:
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "celery", "-A", "app.core.celery_app", "worker",
+             "-Q", "calls", "--loglevel=warning", f"--concurrency={args.celery_concurrency}"],
+            env=env,
+        ))
+    wait_for_health(args.api_url)
+    return processes
+
+
+def parse_rates(values: List[str]) -> Dict[str, float]:
+    if not values:
+        return dict(DEFAULT_RATES)
+    rates = {}
+    for value in values:
+        name, rate = value.split("=", 1)
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario: {name}")
+        rates[name] = float(rate)
+    return rates
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{'scenario':<20}{'count':>8}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in report["scenarios"].items():
+        print(f"{name:<20}{row['count']:>8}{row['errors']:>8}{row['throughput_rps']:>9.1f}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    fanout = report.get("websocket_fanout")
+    if fanout:
+        print(f"\nWebSocket fan-out ({fanout['clients']} clients, {fanout['deliveries']} deliveries): "
+              f"p50 {fanout['p50_ms']:.1f} ms, p95 {fanout['p95_ms']:.1f} ms, p99 {fanout['p99_ms']:.1f} ms")
+    db = report.get("db_connections")
+    if db:
+        print(f"\nDB connections: max {db['max_connections']} (avg {db['avg_connections']:.1f}), "
+              f"active max {db['max_active']} (avg {db['avg_active']:.1f})")
+
+
+async def run(args) -> Dict:
+    recorder = Recorder()
+    test = LoadTest(args.api_url, recorder)
+    await test.register()
+
+    stop = asyncio.Event()
+    background = []
+    sampler = None
+    if args.database_url:
+        sampler = DBConnectionSampler(args.database_url)
+        background.append(asyncio.create_task(sampler.run(stop)))
+    for _ in range(args.ws_clients):
+        background.append(asyncio.create_task(test.websocket_client(stop)))
+
+    # Seed call SIDs so webhook scenarios hit real rows
+    await asyncio.gather(*(test.outbound() for _ in range(args.warmup_calls)))
+    recorder.latencies.clear()
+    recorder.errors.clear()
+    recorder.started = time.perf_counter()
+
+    await asyncio.gather(*(test.drive(name, rate, args.duration) for name, rate in args.rates.items()))
+    recorder.finished = time.perf_counter()
+
+    # Give in-flight async originations a moment to reach the sockets
+    if args.ws_clients and test.queued_at:
+        await asyncio.sleep(2.0)
+    stop.set()
+    await asyncio.gather(*background, return_exceptions=True)
+    await test.client.aclose()
+
+    report = {"scenarios": recorder.summary()}
+    if args.ws_clients:
+        ordered = sorted(test.fanout_latencies)
+        report["websocket_fanout"] = {
+            "clients": args.ws_clients,
+            "deliveries": len(ordered),
+            "p50_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "p99_ms": percentile(ordered, 99),
+        }
+    if sampler:
+        report["db_connections"] = sampler.summary()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Buttdialer end-to-end load test")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8010")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--rate", action="append", dest="rate_args", metavar="SCENARIO=RPS")
+    parser.add_argument("--ws-clients", type=int, default=0)
+    parser.add_argument("--warmup-calls", type=int, default=20)
+    parser.add_argument("--spawn", action="store_true", help="start simulators, API and worker")
+    parser.add_argument("--api-workers", type=int, default=1)
+    parser.add_argument("--celery-concurrency", type=int, default=8)
+    parser.add_argument("--json", help="also write the report to this file")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+    args.rates = parse_rates(args.rate_args)
+
+    processes = spawn_stack(args) if args.spawn else []
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
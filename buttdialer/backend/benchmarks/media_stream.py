@@ -0,0 +1,153 @@
+"""
+Replay audio as a Twilio Media Stream to test answering-machine detection.
+
+    cd buttdialer/backend
+    python -m benchmarks.media_stream --synthetic machine --url ws://localhost:8000/api/v1/calls/media-stream
+    python -m benchmarks.media_stream --wav greeting.wav --local
+    python -m benchmarks.media_stream --local --streams 2000
+
+Audio comes from --wav (PCM16 or mu-law, any rate; resampled to 8 kHz) or
+--synthetic human|machine (noise bursts shaped like "Hello?" and a
+voicemail greeting). It is sent the way Twilio sends it: connected and
+start events, then 20 ms base64 mu-law media messages, paced in real time
+(--speed 0 sends as fast as possible). The start event carries the stream
+signature /outbound-answer would have put in the TwiML, made with the
+SECRET_KEY from .env, so it must match the API's.
+
+Against --url the API closes the socket once it has decided, and the time
+to that close is reported (the decision itself is in the API log and on
+the call). With --local the detector runs in-process instead: each source
+is replayed --streams times, reporting the decision, audio analysed and
+per-message processing time.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import statistics
+import time
+from typing import List, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from app.core.audio import TELEPHONY_RATE, mulaw_encode, read_wav, resample
+
+MESSAGE_BYTES = 160  # 20 ms of 8 kHz mu-law, as Twilio sends it
+
+
+def synthetic(kind: str, seed: int = 0) -> np.ndarray:
+    """(duration ms, voiced) bursts of noise at a speech-like level"""
+    rng = np.random.default_rng(seed)
+    if kind == "human":
+        pattern = [(400, False), (550, True), (2500, False)]
+    else:
+        pattern = [(250, False)] + [(280, True), (140, False)] * 14 + [(1000, False)]
+    parts = [
+        rng.standard_normal(TELEPHONY_RATE * ms // 1000) * (0.1 if voiced else 0.001)
+        for ms, voiced in pattern
+    ]
+    return np.concatenate(parts).astype(np.float32)
+
+
+def load(args) -> np.ndarray:
+    if args.wav:
+        samples, rate = read_wav(args.wav)
+        mono = samples.mean(axis=1) / 32768.0
+        return resample(mono, rate, TELEPHONY_RATE)
+    return synthetic(args.synthetic)
+
+
+def messages(audio: np.ndarray, call_sid: str) -> List[str]:
+    from app.services.twilio_service import twilio_service
+    stream_sid = f"MZ{uuid4().hex}"
+    payload = mulaw_encode(audio)
+    expires = int(time.time()) + 3600
+    out = [
+        json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}),
+        json.dumps({"event": "start", "sequenceNumber": "1", "streamSid": stream_sid, "start": {
+            "streamSid": stream_sid, "callSid": call_sid, "tracks": ["inbound"],
+            "customParameters": {
+                "expires": str(expires), "signature": twilio_service.stream_signature(call_sid, expires),
+            },
+            "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": TELEPHONY_RATE, "channels": 1},
+        }}),
+    ]
+    for chunk, offset in enumerate(range(0, len(payload), MESSAGE_BYTES)):
+        out.append(json.dumps({"event": "media", "sequenceNumber": str(chunk + 2), "streamSid": stream_sid, "media": {
+            "track": "inbound", "chunk": str(chunk + 1), "timestamp": str(chunk * 20),
+            "payload": base64.b64encode(payload[offset:offset + MESSAGE_BYTES]).decode(),
+        }}))
+    out.append(json.dumps({"event": "stop", "streamSid": stream_sid, "stop": {"callSid": call_sid}}))
+    return out
+
+
+async def replay(url: str, stream: List[str], speed: float) -> Optional[float]:
+    """Send a stream; seconds of audio sent before the API closed the socket"""
+    import websockets
+
+    async with websockets.connect(url) as ws:
+        sent_media = 0
+        for message in stream:
+            try:
+                await ws.send(message)
+            except websockets.ConnectionClosed:
+                return sent_media * 0.02
+            if '"event": "media"' in message:
+                sent_media += 1
+                if speed:
+                    await asyncio.sleep(0.02 / speed)
+        return None
+
+
+def run_local(stream: List[str], repeat: int) -> None:
+    from app.services.answering_machine import AMDConfig, MediaStreamSession
+
+    parsed = [json.loads(message) for message in stream]
+    timings, decision, audio_seconds = [], None, 0.0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        session = MediaStreamSession(AMDConfig())
+        for message in parsed:
+            tick = time.perf_counter()
+            decision = session.handle(message)
+            timings.append(time.perf_counter() - tick)
+            if decision is not None:
+                break
+        audio_seconds = session.detector.audio_seconds
+    elapsed = time.perf_counter() - started
+    print(
+        f"decision {decision} after {audio_seconds:.2f}s of audio | "
+        f"{len(timings) / repeat:.0f} messages/stream, p50 {statistics.median(timings) * 1e6:.0f}us "
+        f"max {max(timings) * 1e6:.0f}us | {repeat / elapsed:.0f} streams/s on one core"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--wav")
+    source.add_argument("--synthetic", choices=["human", "machine"], default="machine")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/api/v1/calls/media-stream")
+    parser.add_argument("--call-sid", default=None, help="callSid to report (a call known to the API)")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--local", action="store_true")
+    parser.add_argument("--streams", type=int, default=200)
+    args = parser.parse_args()
+
+    stream = messages(load(args), args.call_sid or f"CA{uuid4().hex}")
+    if args.local:
+        run_local(stream, args.streams)
+        return
+
+    started = time.perf_counter()
+    decided_after = asyncio.run(replay(args.url, stream, args.speed))
+    if decided_after is None:
+        print("stream ended without a decision")
+    else:
+        print(f"decided after {decided_after:.2f}s of audio, {time.perf_counter() - started:.2f}s wall time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Post-call recording analytics throughput.
+
+    cd buttdialer/backend
+    python -m benchmarks.recording_analytics --recordings 200 --minutes 4 --workers 1 2 4 8
+
+Writes --recordings synthetic dual-channel 8 kHz PCM WAVs of --minutes each
+(two parties taking turns, with pauses, overtalk and stretches of dead air)
+and analyses them the way maintenance.analyze_recordings does: WAVs
+memory-mapped and framed with NumPy, fanned out over a process pool. Reports
+recordings per hour for each pool size, and the measures of one recording
+so they can be checked against the script that generated it.
+"""
+
+import argparse
+import os
+import struct
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from app.services.call_analytics import AnalyticsConfig, analyze_file
+
+RATE = 8000
+
+
+def conversation(minutes: float, seed: int) -> np.ndarray:
+    """int16 (samples, 2): contact on channel 0, agent on channel 1"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * RATE)
+    audio = (rng.standard_normal((total, 2)) * 8).astype(np.float32)  # line noise
+    position, speaker = 2 * RATE, 1  # two seconds of ringing, then the agent
+    while position < total:
+        turn = int(rng.uniform(1.5, 8.0) * RATE)
+        level = rng.uniform(1500, 6000)
+        audio[position:position + turn, speaker] += rng.standard_normal(min(turn, total - position)) * level
+        # Usually a short gap before the other party answers; sometimes they
+        # talk over the end of the turn, sometimes nobody says anything
+        roll = rng.random()
+        gap = -int(0.8 * RATE) if roll < 0.15 else int((5.0 if roll > 0.95 else 0.4) * RATE)
+        position += max(turn + gap, RATE // 2)
+        speaker = 1 - speaker
+    return np.clip(audio, -32768, 32767).astype("<i2")
+
+
+def write_wav(path: str, samples: np.ndarray) -> None:
+    data = samples.tobytes()
+    fmt = struct.pack("<HHIIHH", 1, 2, RATE, RATE * 4, 4, 16)
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", 36 + len(data)) + b"WAVE")
+        f.write(b"fmt " + struct.pack("<I", len(fmt)) + fmt)
+        f.write(b"data" + struct.pack("<I", len(data)) + data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--recordings", type=int, default=200)
+    parser.add_argument("--minutes", type=float, default=4.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    config = AnalyticsConfig()
+    with tempfile.TemporaryDirectory() as directory:
+        # A few distinct conversations, copied: generating is slower than analysing
+        templates = [conversation(args.minutes, seed) for seed in range(min(args.recordings, 8))]
+        paths = []
+        for i in range(args.recordings):
+            paths.append(os.path.join(directory, f"{i}.wav"))
+            write_wav(paths[-1], templates[i % len(templates)])
+        size_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+        print(f"{args.recordings} recordings x {args.minutes:g} min, {size_mb:.0f} MB")
+        print(analyze_file(paths[0], config))
+
+        audio_hours = args.recordings * args.minutes / 60
+        for workers in args.workers:
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for _ in pool.map(partial(analyze_file, config=config), paths, chunksize=4):
+                    pass
+            elapsed = time.perf_counter() - started
+            print(
+                f"{workers:>3} workers: {args.recordings / elapsed * 3600:9.0f} recordings/hour, "
+                f"{audio_hours * 3600 / elapsed:6.0f}x realtime"
+            )
+
+
+if __name__ == "__main__":
+    main()
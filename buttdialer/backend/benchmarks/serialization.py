@@ -0,0 +1,110 @@
+"""
+Rows per second for 1,000-row list pages: ORM + Pydantic vs column select + orjson.
+
+    cd buttdialer/backend
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+
+Seeds an in-memory SQLite database with the real models, then times the full
+path from query to response body for GET /calls/ as FastAPI served it before
+(ORM entities validated into CallResponse and JSON-encoded) against the
+column-only select encoded by app.core.serialization, in both the object and
+compact shapes. Uses no network and no Postgres, so numbers compare the
+serialization paths rather than the database.
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.serialization import model_columns, rows_response
+from app.db.base import Base
+from app.models.call import Call
+from app.models.user import User
+from app.schemas.call import CallResponse
+
+
+def seed(session, rows: int) -> None:
+    agent = User(email="bench@example.com", hashed_password="x", first_name="Bench", last_name="Agent")
+    session.add(agent)
+    session.flush()
+
+    started = datetime(2024, 1, 1, 9, 0)
+    session.add_all([
+        Call(
+            twilio_call_sid=f"CA{i:032d}",
+            agent_id=agent.id,
+            direction="outbound",
+            from_number="+15550000000",
+            to_number=f"+1555{i:07d}",
+            status="completed",
+            duration=30 + i % 300,
+            started_at=started + timedelta(minutes=i),
+            answered_at=started + timedelta(minutes=i, seconds=5),
+            ended_at=started + timedelta(minutes=i, seconds=35),
+            disposition="interested" if i % 3 else None,
+            notes="Follow up next week" if i % 5 == 0 else None,
+        )
+        for i in range(rows)
+    ])
+    session.commit()
+
+
+def orm_pydantic(session, rows: int) -> bytes:
+    # What FastAPI does for a response_model: validate, dump, then encode
+    calls = session.query(Call).limit(rows).all()
+    content = [CallResponse.model_validate(call).model_dump() for call in calls]
+    session.expunge_all()
+    return json.dumps(jsonable_encoder(content)).encode()
+
+
+def columns_orjson(session, rows: int) -> bytes:
+    query = session.query(*model_columns(Call, CallResponse.model_fields)).limit(rows)
+    return rows_response(query).body
+
+
+def columns_orjson_compact(session, rows: int) -> bytes:
+    query = session.query(*model_columns(Call, CallResponse.model_fields)).limit(rows)
+    return rows_response(query, compact=True).body
+
+
+def measure(name: str, func: Callable, session, rows: int, repeat: int) -> float:
+    func(session, rows)  # warm up statement cache and imports
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        body = func(session, rows)
+        timings.append(perf_counter() - start)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    rate = rows / median
+    print(f"{name:<28}{median * 1000:>10.2f}{rate:>14,.0f}{len(body) / 1024:>10.1f}")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Call.__table__])
+    session = sessionmaker(bind=engine)()
+    seed(session, args.rows)
+
+    print(f"{args.rows} rows, median of {args.repeat} runs\n")
+    print(f"{'path':<28}{'ms/page':>10}{'rows/sec':>14}{'KiB':>10}")
+    baseline = measure("orm + pydantic + json", orm_pydantic, session, args.rows, args.repeat)
+    fast = measure("columns + orjson", columns_orjson, session, args.rows, args.repeat)
+    compact = measure("columns + orjson (compact)", columns_orjson_compact, session, args.rows, args.repeat)
+    print(f"\nspeed-up: {fast / baseline:.1f}x objects, {compact / baseline:.1f}x compact")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Local stand-ins for the Twilio, HubSpot and ElevenLabs APIs.
+
+Each simulator injects configurable latency and errors, and the Twilio one
+drives status and recording webhooks back at the API the way Twilio would.
+
+    python -m benchmarks.simulators --latency-ms 150 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import io
+import random
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from email.utils import formatdate
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+TWILIO_PORT = 9101
+HUBSPOT_PORT = 9102
+ELEVENLABS_PORT = 9103
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+@dataclass
+class CallFlow:
+    """Timing of the webhooks the Twilio simulator sends per call"""
+    ring_ms: float = 2000.0
+    talk_ms: float = 15000.0
+    answer_rate: float = 0.6
+    recording_delay_ms: float = 500.0
+    retry_rate: float = 0.0  # chance each webhook is delivered twice, as on a Twilio retry
+
+
+def _add_faults(app: FastAPI, faults: Faults) -> None:
+    @app.middleware("http")
+    async def inject(request: Request, call_next):
+        delay = faults.latency_ms + random.uniform(-faults.jitter_ms, faults.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if faults.error_rate and random.random() < faults.error_rate:
+            return JSONResponse({"message": "injected failure"}, status_code=faults.error_status)
+        return await call_next(request)
+
+
+def create_twilio_app(faults: Faults, flow: CallFlow) -> FastAPI:
+    app = FastAPI(title="Twilio simulator")
+    client = httpx.AsyncClient(timeout=10.0)
+    tasks = set()
+    calls: Dict[str, Tuple[asyncio.Task, Optional[str]]] = {}  # live calls and their StatusCallback
+    answered = set()
+
+    async def post(url: str, data: Dict[str, str]) -> None:
+        deliveries = 2 if flow.retry_rate and random.random() < flow.retry_rate else 1
+        for _ in range(deliveries):
+            try:
+                await client.post(url, data=data)
+            except httpx.HTTPError:
+                pass
+
+    async def drive_call(account_sid: str, sid: str, form: Dict[str, List[str]]) -> None:
+        status_url = form.get("StatusCallback", [None])[0]
+        recording_url = form.get("RecordingStatusCallback", [None])[0]
+        base = {"AccountSid": account_sid, "CallSid": sid}
+        sequence = count()
+
+        async def post_status(**data: str) -> None:
+            if status_url:
+                await post(status_url, {
+                    **base, "SequenceNumber": str(next(sequence)), "Timestamp": formatdate(usegmt=True), **data
+                })
+
+        await post_status(CallStatus="initiated")
+        await post_status(CallStatus="ringing")
+        await asyncio.sleep(flow.ring_ms / 1000)
+
+        if random.random() >= flow.answer_rate:
+            await post_status(CallStatus=random.choice(["no-answer", "busy"]))
+            return
+
+        answered.add(sid)
+        await post_status(CallStatus="in-progress")
+        await asyncio.sleep(flow.talk_ms / 1000)
+        await post_status(CallStatus="completed", CallDuration=str(int(flow.talk_ms / 1000)))
+
+        if recording_url and form.get("Record", ["false"])[0].lower() == "true":
+            await asyncio.sleep(flow.recording_delay_ms / 1000)
+            recording_sid = f"RE{uuid4().hex}"
+            await post(recording_url, {
+                **base,
+                "RecordingSid": recording_sid,
+                "RecordingUrl": f"http://127.0.0.1:{TWILIO_PORT}/recordings/{recording_sid}",
+                "RecordingStatus": "completed",
+                "RecordingDuration": str(int(flow.talk_ms / 1000))
+            })
+
+    def call_resource(account_sid: str, sid: str, to: str, from_: str, status: str) -> Dict[str, str]:
+        return {
+            "sid": sid,
+            "account_sid": account_sid,
+            "to": to,
+            "from": from_,
+            "status": status,
+            "direction": "outbound-api",
+            "uri": f"/2010-04-01/Accounts/{account_sid}/Calls/{sid}.json"
+        }
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Calls.json", status_code=201)
+    async def create_call(account_sid: str, request: Request):
+        form = await request.form()
+        params = {key: form.getlist(key) for key in form.keys()}
+        sid = f"CA{uuid4().hex}"
+        task = asyncio.create_task(drive_call(account_sid, sid, params))
+        tasks.add(task)
+        calls[sid] = task, form.get("StatusCallback")
+        task.add_done_callback(tasks.discard)
+        task.add_done_callback(lambda _: (calls.pop(sid, None), answered.discard(sid)))
+        return call_resource(account_sid, sid, form.get("To"), form.get("From"), "queued")
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Calls/{sid}.json")
+    async def update_call(account_sid: str, sid: str, request: Request):
+        form = await request.form()
+        status = form.get("Status")
+        if status in ("completed", "canceled") and sid in calls:
+            # Hung up: a ringing call ends as canceled, an answered one completed
+            task, status_url = calls[sid]
+            final = "completed" if sid in answered else "canceled"
+            task.cancel()
+            if status_url:
+                await post(status_url, {"AccountSid": account_sid, "CallSid": sid, "CallStatus": final})
+            return call_resource(account_sid, sid, "", "", final)
+        return call_resource(account_sid, sid, "", "", status or "in-progress")
+
+    @app.get("/2010-04-01/Accounts/{account_sid}.json")
+    async def fetch_account(account_sid: str):
+        return {"sid": account_sid, "status": "active"}
+
+    @app.get("/recordings/{recording_sid}.wav")
+    async def fetch_recording(recording_sid: str):
+        # Silent 8 kHz 16-bit mono, the format Twilio serves recordings in
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(bytes(int(flow.talk_ms / 1000 * 8000) * 2))
+        return Response(content=buffer.getvalue(), media_type="audio/wav")
+
+    _add_faults(app, faults)
+    return app
+
+
+def create_hubspot_app(faults: Faults) -> FastAPI:
+    app = FastAPI(title="HubSpot simulator")
+    ids = count(1)
+    contacts: Dict[str, Dict] = {}
+
+    def record(properties: Dict) -> Dict:
+        object_id = str(next(ids))
+        return {"id": object_id, "properties": properties, "createdAt": time.time()}
+
+    @app.post("/crm/v3/objects/contacts", status_code=201)
+    async def create_contact(body: Dict):
+        contact = record(body.get("properties", {}))
+        contacts[contact["id"]] = contact
+        email = contact["properties"].get("email")
+        if email:
+            contacts[email] = contact
+        return contact
+
+    @app.patch("/crm/v3/objects/contacts/{contact_id}")
+    async def update_contact(contact_id: str, body: Dict):
+        contact = contacts.setdefault(contact_id, {"id": contact_id, "properties": {}})
+        contact["properties"].update(body.get("properties", {}))
+        return contact
+
+    @app.get("/crm/v3/objects/contacts/{contact_id}")
+    async def get_contact(contact_id: str):
+        if contact_id not in contacts:
+            return JSONResponse({"message": "not found"}, status_code=404)
+        return contacts[contact_id]
+
+    @app.get("/crm/v3/objects/contacts")
+    async def list_contacts(limit: int = 100):
+        results = [c for key, c in contacts.items() if key == c["id"]][:limit]
+        return {"results": results}
+
+    @app.post("/crm/v3/objects/contacts/search")
+    async def search_contacts(body: Dict):
+        return {"total": 0, "results": []}
+
+    @app.post("/crm/v3/objects/calls", status_code=201)
+    async def log_call(body: Dict):
+        return record(body.get("properties", {}))
+
+    @app.post("/crm/v3/objects/deals", status_code=201)
+    async def create_deal(body: Dict):
+        return record(body.get("properties", {}))
+
+    _add_faults(app, faults)
+    return app
+
+
+def create_elevenlabs_app(faults: Faults, bytes_per_char: int = 1000, chars_per_second: float = 0.0) -> FastAPI:
+    """TTS returns a synthetic body sized like 128kbps speech (~1KB per character).
+
+    With chars_per_second, synthesis takes len(text) / chars_per_second: the
+    buffered endpoint answers after all of it, the /stream endpoint sends
+    each frame as it would be generated.
+    """
+    app = FastAPI(title="ElevenLabs simulator")
+    frame = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(414)
+
+    def generation_seconds(text: str) -> float:
+        return len(text) / chars_per_second if chars_per_second else 0.0
+
+    @app.post("/v1/text-to-speech/{voice_id}")
+    async def text_to_speech(voice_id: str, body: Dict, output_format: Optional[str] = None):
+        text = body.get("text", "")
+        await asyncio.sleep(generation_seconds(text))
+        if output_format and output_format.startswith("pcm_"):
+            # ~15 characters per second of 16-bit mono speech
+            rate = int(output_format.split("_")[1])
+            samples = max(int(len(text) / 15 * rate), 1)
+            return Response(content=bytes(samples * 2), media_type="audio/pcm")
+        size = max(len(text) * bytes_per_char, len(frame))
+        audio = frame * (size // len(frame))
+        return Response(content=audio, media_type="audio/mpeg")
+
+    @app.post("/v1/text-to-speech/{voice_id}/stream")
+    async def text_to_speech_stream(voice_id: str, body: Dict):
+        text = body.get("text", "")
+        frames = max(len(text) * bytes_per_char // len(frame), 1)
+        per_frame = generation_seconds(text) / frames
+
+        async def generate():
+            for _ in range(frames):
+                await asyncio.sleep(per_frame)
+                yield frame
+
+        return StreamingResponse(generate(), media_type="audio/mpeg")
+
+    @app.get("/v1/voices")
+    async def voices():
+        return {"voices": [{"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel"}]}
+
+    @app.get("/v1/user")
+    async def user():
+        return {"subscription": {"character_count": 0, "character_limit": 10000}}
+
+    _add_faults(app, faults)
+    return app
+
+
+def serve_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    """Run an app on 127.0.0.1:port in a daemon thread; returns once it is listening"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def start_simulators(faults: Faults, flow: CallFlow) -> List[uvicorn.Server]:
+    return [
+        serve_in_thread(create_twilio_app(faults, flow), TWILIO_PORT),
+        serve_in_thread(create_hubspot_app(faults), HUBSPOT_PORT),
+        serve_in_thread(create_elevenlabs_app(faults), ELEVENLABS_PORT),
+    ]
+
+
+def simulator_env() -> Dict[str, str]:
+    """Environment that points the API at the simulators"""
+    return {
+        "TWILIO_API_BASE_URL": f"http://127.0.0.1:{TWILIO_PORT}",
+        "HUBSPOT_API_BASE_URL": f"http://127.0.0.1:{HUBSPOT_PORT}",
+        "ELEVENLABS_API_BASE_URL": f"http://127.0.0.1:{ELEVENLABS_PORT}/v1",
+    }
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=25.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--ring-ms", type=float, default=2000.0)
+    parser.add_argument("--talk-ms", type=float, default=15000.0)
+    parser.add_argument("--answer-rate", type=float, default=0.6)
+    parser.add_argument("--retry-rate", type=float, default=0.0,
+                        help="fraction of webhooks delivered twice")
+
+
+def faults_from_args(args) -> Faults:
+    return Faults(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+
+
+def flow_from_args(args) -> CallFlow:
+    return CallFlow(ring_ms=args.ring_ms, talk_ms=args.talk_ms, answer_rate=args.answer_rate,
+                    retry_rate=args.retry_rate)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local provider simulators")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    start_simulators(faults_from_args(args), flow_from_args(args))
+    print("Simulators listening; point the API at them with:")
+    for key, value in simulator_env().items():
+        print(f"  {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,120 @@
+"""
+Cold-start profile of the API: import time per module and time to first request.
+
+    cd buttdialer/backend
+    python -m benchmarks.startup --budget-import-ms 800 --budget-first-request-ms 2000
+
+Import times come from `python -X importtime -c "import app.main"` in a fresh
+interpreter. Time to first request is measured from spawning uvicorn to the
+first 200 from /health, so it includes the lifespan startup (schema version
+check, delay queue and relay start-up). Exits non-zero when a budget is
+exceeded so it can gate CI.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module: str = "app.main") -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Return (total ms, [(module, self ms, cumulative ms)]) for a cold import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.splitlines()[-1] if result.stderr else "import failed")
+
+    rows = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+        # Top-level imports (one leading space) add up to the whole import
+        if len(indent) == 1:
+            total_us += int(cumulative_us)
+    return total_us / 1000, rows
+
+
+def time_to_first_request(port: int, timeout: float = 60.0) -> float:
+    """Milliseconds from spawning uvicorn until /health answers"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        deadline = start + timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("API did not answer /health before the timeout")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def group_by_package(rows: List[Tuple[str, float, float]]) -> Dict[str, float]:
+    """Self time summed per top-level package"""
+    totals: Dict[str, float] = {}
+    for name, self_ms, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + self_ms
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile API cold start")
+    parser.add_argument("--budget-import-ms", type=float, default=800.0)
+    parser.add_argument("--budget-first-request-ms", type=float, default=2000.0)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--skip-server", action="store_true", help="only profile imports")
+    args = parser.parse_args()
+
+    import_ms, rows = profile_imports()
+    print(f"Import of app.main: {import_ms:.0f} ms (budget {args.budget_import_ms:.0f} ms)\n")
+
+    print(f"{'slowest modules (cumulative)':<60}{'self ms':>10}{'cum ms':>10}")
+    for name, self_ms, cumulative_ms in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{name:<60}{self_ms:>10.1f}{cumulative_ms:>10.1f}")
+
+    print(f"\n{'packages (self time)':<60}{'ms':>10}")
+    packages = sorted(group_by_package(rows).items(), key=lambda p: p[1], reverse=True)
+    for package, ms in packages[:args.top]:
+        print(f"{package:<60}{ms:>10.1f}")
+
+    failures = []
+    if import_ms > args.budget_import_ms:
+        failures.append(f"import {import_ms:.0f} ms > {args.budget_import_ms:.0f} ms")
+
+    if not args.skip_server:
+        first_request_ms = time_to_first_request(args.port)
+        print(f"\nTime to first request: {first_request_ms:.0f} ms "
+              f"(budget {args.budget_first_request_ms:.0f} ms)")
+        if first_request_ms > args.budget_first_request_ms:
+            failures.append(f"first request {first_request_ms:.0f} ms > {args.budget_first_request_ms:.0f} ms")
+
+    if failures:
+        print("\nOver budget: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Telephony transcode throughput and what it saves at answer time.
+
+    cd buttdialer/backend
+    python -m benchmarks.transcode --seconds 60 --prompt-seconds 20 --repeat 20
+
+Transcodes --seconds of synthetic speech-band audio from each ElevenLabs PCM
+rate to 8 kHz mu-law WAV (polyphase resampling and G.711 encoding in NumPy)
+and reports audio-seconds per second, alongside the stdlib audioop
+equivalent where this Python still has it. Then, for a --prompt-seconds
+prompt, compares transcoding on demand when a call is answered with looking
+up the pre-transcoded asset, and the bytes Twilio fetches for each format.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from app.core.audio import telephony_wav
+
+RATES = (44100, 24000, 22050, 16000)
+
+
+def speech_like(seconds: float, rate: int) -> bytes:
+    """Noise shaped by a few formant-like sines, as 16-bit PCM"""
+    rng = np.random.default_rng(1)
+    t = np.arange(int(seconds * rate)) / rate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    signal = sum(np.sin(2 * np.pi * f * t + rng.uniform(0, 6)) for f in (220, 700, 1200, 2600, 5200))
+    signal = envelope * (signal / 5 + 0.05 * rng.standard_normal(len(t)))
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def audioop_transcode(audioop, pcm: bytes, rate: int) -> bytes:
+    converted, _ = audioop.ratecv(pcm, 2, 1, rate, 8000, None)
+    return audioop.lin2ulaw(converted, 2)
+
+
+def throughput(seconds: float) -> None:
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            import audioop
+    except ImportError:
+        audioop = None
+
+    for rate in RATES:
+        pcm = speech_like(seconds, rate)
+        started = time.perf_counter()
+        telephony_wav(pcm, rate)
+        numpy_rate = seconds / (time.perf_counter() - started)
+        line = f"{rate:>6} Hz -> 8 kHz mu-law: numpy {numpy_rate:7.0f}x realtime"
+        if audioop is not None:
+            started = time.perf_counter()
+            audioop_transcode(audioop, pcm, rate)
+            line += f" | audioop {seconds / (time.perf_counter() - started):7.0f}x (no anti-alias filter)"
+        print(line)
+
+
+def answer_time(prompt_seconds: float, repeat: int) -> None:
+    os.environ["AUDIO_STORE_URI"] = tempfile.mkdtemp(prefix="transcode-")
+    from app.services.audio_store import audio_store
+
+    rate = 22050
+    pcm = speech_like(prompt_seconds, rate)
+    on_demand = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        wav = telephony_wav(pcm, rate)
+        on_demand.append(time.perf_counter() - started)
+
+    digest = audio_store.put(wav, "wav")
+    lookups = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        audio_store.cached_path(digest, "wav")
+        lookups.append(time.perf_counter() - started)
+
+    mp3_bytes = int(prompt_seconds * 128000 / 8)
+    print(
+        f"{prompt_seconds:.0f}s prompt: on-demand transcode p50 {statistics.median(on_demand) * 1000:.1f}ms, "
+        f"pre-transcoded lookup p50 {statistics.median(lookups) * 1e6:.0f}us"
+    )
+    print(f"  Twilio fetches {len(wav) / 1024:.0f} KB of mu-law WAV vs {mp3_bytes / 1024:.0f} KB of 128 kbps MP3")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--prompt-seconds", type=float, default=20.0)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    throughput(args.seconds)
+    answer_time(args.prompt_seconds, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Segment-spliced campaign audio against one full synthesis per contact.
+
+    cd buttdialer/backend
+    python -m benchmarks.tts_render --contacts 2000 --names 300 --latency-ms 400
+
+Starts the ElevenLabs simulator, then renders the same personalized script
+for --contacts contacts drawn from --names distinct first names, once with
+a full-text request per contact and once with SegmentRenderer. Reports
+syntheses, characters billed and wall time for each.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.simulators import (
+    ELEVENLABS_PORT,
+    add_fault_arguments,
+    create_elevenlabs_app,
+    faults_from_args,
+    serve_in_thread,
+    simulator_env,
+)
+
+TEMPLATE = (
+    "Hi {first_name}, this is Sam calling from Acme Solar. "
+    "We are offering free roof assessments in your area this month. "
+    "Press one to talk to an advisor, or two to be removed from our list."
+)
+
+
+async def full_text(contacts, concurrency: int) -> dict:
+    from app.services.elevenlabs_service import elevenlabs_service
+    from app.services.tts_renderer import OUTPUT_FORMAT
+
+    semaphore = asyncio.Semaphore(concurrency)
+    chars = 0
+
+    async def one(values):
+        nonlocal chars
+        text = TEMPLATE.format(**values)
+        async with semaphore:
+            chars += len(text)
+            return await elevenlabs_service.text_to_speech(text, output_format=OUTPUT_FORMAT)
+
+    await asyncio.gather(*(one(values) for _, values in contacts))
+    return {"unique_syntheses": len(contacts), "synthesized_chars": chars}
+
+
+async def segmented(contacts, concurrency: int) -> dict:
+    from app.services.tts_renderer import SegmentRenderer
+
+    renderer = SegmentRenderer(TEMPLATE, concurrency=concurrency)
+
+    async def sink(contact_id: int, wav: bytes) -> None:
+        pass
+
+    return await renderer.render_many(contacts, sink)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--contacts", type=int, default=2000)
+    parser.add_argument("--names", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    add_fault_arguments(parser)
+    parser.set_defaults(latency_ms=400.0, jitter_ms=100.0)
+    args = parser.parse_args()
+
+    serve_in_thread(create_elevenlabs_app(faults_from_args(args)), ELEVENLABS_PORT)
+    os.environ.update(simulator_env())
+
+    rng = random.Random(7)
+    names = [f"Name{i}" for i in range(args.names)]
+    contacts = [(contact_id, {"first_name": rng.choice(names)}) for contact_id in range(args.contacts)]
+
+    for label, run in (("full text", full_text), ("segmented", segmented)):
+        started = time.perf_counter()
+        stats = asyncio.run(run(contacts, args.concurrency))
+        elapsed = time.perf_counter() - started
+        print(
+            f"{label:>10}: {args.contacts} contacts, {stats['unique_syntheses']} syntheses, "
+            f"{stats['synthesized_chars']} chars, {elapsed:.1f}s "
+            f"({args.contacts / elapsed:.0f} contacts/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Time to first audio byte: buffered text_to_speech against streaming relay.
+
+    cd buttdialer/backend
+    python -m benchmarks.tts_stream --messages 50 --chars 300 --chars-per-second 150
+
+Starts the ElevenLabs simulator generating speech at --chars-per-second,
+then synthesizes --messages messages of --chars characters both ways: the
+buffered call (nothing playable until the whole MP3 has arrived) and
+TTSStreamer's relay (first chunk relayed while the rest is generated and
+written to the audio store). Reports p50/p95 time to first byte and total.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from benchmarks.simulators import (
+    ELEVENLABS_PORT,
+    add_fault_arguments,
+    create_elevenlabs_app,
+    faults_from_args,
+    serve_in_thread,
+    simulator_env,
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def report(label: str, first_byte: List[float], total: List[float]) -> None:
+    print(
+        f"{label:>9}: first byte p50 {statistics.median(first_byte) * 1000:7.0f}ms "
+        f"p95 {percentile(first_byte, 0.95) * 1000:7.0f}ms | "
+        f"total p50 {statistics.median(total) * 1000:7.0f}ms"
+    )
+
+
+async def buffered(texts: List[str]) -> None:
+    from app.services.elevenlabs_service import elevenlabs_service
+
+    timings = []
+    for text in texts:
+        started = time.perf_counter()
+        await elevenlabs_service.text_to_speech(text)
+        timings.append(time.perf_counter() - started)
+    report("buffered", timings, timings)
+
+
+async def streaming(texts: List[str]) -> None:
+    from app.services.tts_stream import tts_streamer
+
+    first_byte, total = [], []
+    for text in texts:
+        started = time.perf_counter()
+        # start() returns once the first chunk is in hand
+        chunks = await tts_streamer.start({"text": text, "voice_id": "21m00Tcm4TlvDq8ikWAM"})
+        first_byte.append(time.perf_counter() - started)
+        async for _ in chunks:
+            pass
+        total.append(time.perf_counter() - started)
+    report("streaming", first_byte, total)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--chars", type=int, default=300)
+    parser.add_argument("--chars-per-second", type=float, default=150.0,
+                        help="simulated ElevenLabs generation speed")
+    add_fault_arguments(parser)
+    parser.set_defaults(latency_ms=150.0, jitter_ms=30.0)
+    args = parser.parse_args()
+
+    app = create_elevenlabs_app(faults_from_args(args), chars_per_second=args.chars_per_second)
+    serve_in_thread(app, ELEVENLABS_PORT)
+    os.environ.update(simulator_env())
+    os.environ["AUDIO_STORE_URI"] = tempfile.mkdtemp(prefix="tts-stream-")
+
+    # Distinct texts so nothing is served from a previous run's file
+    texts = [f"{i}: " + ("word " * args.chars)[:args.chars] for i in range(args.messages)]
+    asyncio.run(buffered(texts))
+    asyncio.run(streaming(texts))
+
+
+if __name__ == "__main__":
+    main()